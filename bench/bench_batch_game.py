@@ -0,0 +1,34 @@
+"""Hands per second of `batch_game.BatchGame` compared with `headless.HeadlessGame`
+
+    python -m bench.bench_batch_game [n_tables] [n_players]
+"""
+import sys
+import time
+
+import numpy as np
+
+from libs.batch_game import BatchGame, CALL, CHECK, FOLD_ACTION, RAISE, ALLIN_ACTION
+from bench.bench_headless import main as headless_main
+
+
+def main(n_tables: int = 100000, n_players: int = 6):
+    rng = np.random.default_rng(0)
+    batch = BatchGame(n_tables, n_players, seed=0)
+
+    def policy(g):
+        # the same mix as bench_headless
+        x = rng.random(n_tables)
+        passive = np.where(g.is_check_permitted(), CHECK, CALL)
+        actions = np.select([x < 0.15, x < 0.25, x < 0.27], [FOLD_ACTION, RAISE, ALLIN_ACTION], passive)
+        return actions, g.mini_raise
+
+    start = time.perf_counter()
+    batch.start(np.full(n_players, 500), 20, np.arange(n_tables) % n_players)
+    batch.play(policy)
+    elapsed = time.perf_counter() - start
+    print(f"{n_tables} hands of {n_players} players: {n_tables / elapsed:,.0f} hands/s in lockstep")
+    headless_main(n_tables // 10, n_players)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
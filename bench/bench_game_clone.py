@@ -0,0 +1,42 @@
+"""`Game.clone` and `Game.snapshot`/`Game.restore` against `copy.deepcopy`, on a hand at the flop
+
+    python -m bench.bench_game_clone [n] [n_players]
+"""
+import copy
+import sys
+import time
+
+from libs.deck import ShufflePool
+from libs.game import Game
+from libs.player import Player
+
+
+def timeit(name: str, fn, n: int):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{name:>18}: {elapsed / n * 1e6:8.1f} us")
+
+
+def main(n: int = 10000, n_players: int = 6):
+    game = Game(shuffle_pool=ShufflePool(seed=0))
+    players = [Player(f"u{i}", f"player{i}", 500) for i in range(n_players)]
+    for player in players:
+        player.set_normal()
+    game.start(players, 20, 0)
+    while game.round_status.value == 0:
+        game.pcall(game.exe_pos) and game.pcheck(game.exe_pos)
+
+    # the parts that are shared, or that cannot be copied at all
+    shared = (game.shuffle_pool, game.events, game.lock, game.logger)
+    data = game.snapshot()
+    print(f"snapshot of {n_players} players: {len(data)} bytes")
+    timeit("deepcopy", lambda: copy.deepcopy(game, {id(x): x for x in shared}), n)
+    timeit("clone", game.clone, n)
+    timeit("snapshot", game.snapshot, n)
+    timeit("restore", lambda: Game(shuffle_pool=game.shuffle_pool).restore(data), n)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
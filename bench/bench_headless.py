@@ -0,0 +1,37 @@
+"""Hands per second of `headless.HeadlessGame` on one core
+
+    python -m bench.bench_headless [n_hands] [n_players]
+"""
+import random
+import sys
+import time
+
+from libs.deck import ShufflePool
+from libs.headless import HeadlessGame, play_hand
+
+
+def main(n_hands: int = 100000, n_players: int = 6):
+    rng = random.Random(0)
+    game = HeadlessGame(ShufflePool(seed=0))
+    chips = [500] * n_players
+
+    def policy(g, pos):
+        # mostly passive, with enough raises and all-ins to reach side pots
+        x = rng.random()
+        if x < 0.15:
+            return g.pfold(pos)
+        if x < 0.25:
+            return g.praise(pos, g.mini_raise)
+        if x < 0.27:
+            return g.pallin(pos)
+        return g.pcheck(pos) if g.is_check_permitted(pos) else g.pcall(pos)
+
+    start = time.perf_counter()
+    for hand in range(n_hands):
+        play_hand(game, policy, chips, 20, hand % n_players)
+    elapsed = time.perf_counter() - start
+    print(f"{n_hands} hands of {n_players} players: {n_hands / elapsed:,.0f} hands/s")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
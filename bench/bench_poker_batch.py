@@ -0,0 +1,37 @@
+"""Throughput of `poker_batch.evaluate_batch` compared with looping over `poker7`
+
+    python -m bench.bench_poker_batch [n_hands]
+"""
+import sys
+import time
+
+import numpy as np
+
+from libs.poker_batch import evaluate_batch
+from libs.poker_cmp import poker7
+from libs.poker_eval import RANKS, SUITS
+
+LOOP_HANDS = 20000
+
+
+def main(n_hands: int = 2000000):
+    rng = np.random.default_rng(0)
+    cards = np.argsort(rng.random((n_hands, 52), dtype=np.float32), axis=1)[:, :7]
+    deck = [r + s for s in SUITS for r in RANKS]
+    names = [[deck[i] for i in row] for row in cards[:LOOP_HANDS].tolist()]
+
+    start = time.perf_counter()
+    for hand in names:
+        poker7(hand)
+    loop = LOOP_HANDS / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    evaluate_batch(cards)
+    batch = n_hands / (time.perf_counter() - start)
+
+    print(f"{'poker7 loop':16}{loop:14,.0f} hands/s")
+    print(f"{'evaluate_batch':16}{batch:14,.0f} hands/s {batch / loop:8.1f}x")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,45 @@
+"""Compare `poker_cmp.poker7` against the combinations-based reference on random hands
+
+    python -m bench.bench_poker_cmp [n_hands]
+"""
+import random
+import sys
+import timeit
+
+from libs.card import CARDS
+from libs.poker_cmp import poker7, _poker7_combinations
+from libs.poker_eval import RANKS, SUITS, CARD_INDEX, CARD_STR_VALUES, evaluate
+
+REPEAT = 15
+
+
+def _best_times(funcs, n_hands: int):
+    """Seconds per hand of each `(func, hands)`, the best of `REPEAT` rounds
+
+    The rounds take turns, so a slow spell of the machine does not favour one function.
+    """
+    best = [float('inf')] * len(funcs)
+    for _ in range(REPEAT):
+        for i, (func, hands) in enumerate(funcs):
+            best[i] = min(best[i], timeit.timeit(lambda: [func(h) for h in hands], number=1))
+    return [t / n_hands for t in best]
+
+
+def main(n_hands: int = 5000):
+    rng = random.Random(0)
+    deck = [r + s for s in SUITS for r in RANKS]
+    hands = [rng.sample(deck, 7) for _ in range(n_hands)]
+    cards = [[CARDS[CARD_INDEX[c]] for c in h] for h in hands]
+    values = [[CARD_STR_VALUES[c] for c in h] for h in hands]
+
+    reference, lookup, lookup_cards, strength = _best_times(
+        [(_poker7_combinations, hands), (poker7, hands), (poker7, cards), (evaluate, values)], n_hands)
+
+    print(f"{'combinations poker7':24}{reference * 1e6:10.2f} us/hand")
+    print(f"{'lookup poker7':24}{lookup * 1e6:10.2f} us/hand {reference / lookup:8.1f}x")
+    print(f"{'lookup poker7 (Card)':24}{lookup_cards * 1e6:10.2f} us/hand {reference / lookup_cards:8.1f}x")
+    print(f"{'lookup evaluate':24}{strength * 1e6:10.2f} us/hand {reference / strength:8.1f}x")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
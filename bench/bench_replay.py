@@ -0,0 +1,47 @@
+"""Hands per second of `replay.replay`, on random hands recorded for the run
+
+    python -m bench.bench_replay [n_hands] [workers]
+"""
+import random
+import sys
+import time
+
+from libs.deck import ShufflePool
+from libs.game import Game
+from libs.player import Player
+from libs.replay import replay
+
+
+def record(n_hands: int):
+    rng = random.Random(0)
+    game = Game(shuffle_pool=ShufflePool(seed=0))
+    records = []
+    for hand in range(n_hands):
+        players = [Player(f"u{i}", f"player{i}", 500) for i in range(6)]
+        for player in players:
+            player.set_normal()
+        game.start(players, 20, hand % 6)
+        while game.is_running():
+            pos = game.exe_pos
+            x = rng.random()
+            if x < 0.15 or (x < 0.25 and game.praise(pos, game.mini_raise) != 0) or (x < 0.27 and game.pallin(pos)):
+                game.pfold(pos)
+            elif x >= 0.27:
+                game.pcheck(pos) if game.is_check_permitted(pos) else game.pcall(pos)
+        records.append(game.snapshot())
+    return records
+
+
+def main(n_hands: int = 20000, workers: int = None):
+    start = time.perf_counter()
+    records = record(n_hands)
+    print(f"recorded {n_hands} hands of 6 players in {time.perf_counter() - start:.1f}s, "
+          f"{sum(map(len, records)) / n_hands:.0f} bytes each")
+    for w in (0, workers):
+        report = replay(records, w)
+        assert report.divergence is None, report.divergence
+        print(f"workers={w}: {report.hands_per_second:,.0f} hands/s")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
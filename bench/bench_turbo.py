@@ -0,0 +1,39 @@
+"""Hands per second of headless bot tables, all on one asyncio loop
+
+Uses the storage, runout cache and hand log of the bot, like `run.py` does.
+
+    python -m bench.bench_turbo [n_tables] [seconds]
+"""
+import asyncio
+import sys
+import threading
+import time
+
+from bots.game import gameManager
+from libs.scheduler import default_loop_scheduler
+
+
+async def run(n_tables: int, seconds: float):
+    default_loop_scheduler.start(asyncio.get_running_loop())
+    threads = threading.active_count()
+    start = time.perf_counter()
+    tables = []
+    for i in range(n_tables):
+        table_id, err = gameManager.open_turbo(f"bench{i}", 6)
+        assert err is None, err
+        tables.append(gameManager.tables[table_id])
+    await asyncio.sleep(seconds)
+    elapsed = time.perf_counter() - start
+    hands = sum(table.counter for table in tables)
+    for table in tables:
+        gameManager.close(table.uid)
+    print(f"{n_tables} tables of 6 bots: {hands / elapsed:,.0f} hands/s, "
+          f"threads {threads} -> {threading.active_count()}")
+
+
+def main(n_tables: int = 100, seconds: float = 10):
+    asyncio.run(run(n_tables, seconds))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -5,7 +5,7 @@ import logging
 from libs.manager import gameManager
 from slackapi.client import send_msg, send_private_msg_in_channel, update_msg, delete_msg, get_username
 from slackapi.payload import card_to_emoji
-from typing import Dict, Callable
+from typing import Dict, Callable, Tuple
 
 
 logger = logging.getLogger(__name__)
@@ -28,214 +28,281 @@ class Command:
         self.need_text = need_text
         self.debug = debug
 
-    def call(self, **args):
+    async def call(self, **args):
         if not self.need_text:
             args.pop("text")
-        self.func(**args)
+        await self.func(**args)
 
 
-def handle_message(web_client: slack.WebClient, channel: str, user: str, ts: str, text: str, mentioned: bool):
+async def handle_message(web_client: slack.WebClient, channel: str, user: str, ts: str, text: str, mentioned: bool):
     text = text.strip()
     for command in commands:
         if re.search(command.pattern, text, re.IGNORECASE) is not None:
-            command.call(web_client=web_client, channel=channel, user=user, text=text)
+            await command.call(web_client=web_client, channel=channel, user=user, text=text)
             return
     if mentioned:
-        echo_help(web_client, channel, user)
+        await echo_help(web_client, channel, user)
 
 
-def _get_username(s: str, web_client: slack.WebClient, userid: str) -> str:
+async def _get_username(s: str, web_client: slack.WebClient, userid: str) -> str:
     if len(s.split()) >= 2:
         return " ".join(s.split()[1:])
     else:
-        return get_username(web_client, userid)
+        return await get_username(web_client, userid)
 
 
-def create_table(web_client: slack.WebClient, channel: str, user: str, text: str):
+async def create_table(web_client: slack.WebClient, channel: str, user: str, text: str):
     if channel in channels.keys():
-        send_msg(web_client, channel,
-                 "Failed to open a game, because there is an unfinished game in this channel! "
-                 "If you want to reopen the table, type `reopen` instead")
+        await send_msg(web_client, channel,
+                       "Failed to open a game, because there is an unfinished game in this channel! "
+                       "If you want to reopen the table, type `reopen` instead")
         return
 
-    username = _get_username(text, web_client, user)
+    username = await _get_username(text, web_client, user)
     table_id = gameManager.open(user)
     channels[channel] = ChannelInfo(table_id, web_client)
-    send_msg(web_client, channel,
-             "Successfully opened a game! Everyone is free to join the table.")
-    join_table(web_client, channel, user, username)
+    await send_msg(web_client, channel,
+                   "Successfully opened a game! Everyone is free to join the table.")
+    await join_table(web_client, channel, user, username)
 
 
-def reopen_table(web_client: slack.WebClient, channel: str, user: str, text: str):
-    username = _get_username(text, web_client, user)
+async def reopen_table(web_client: slack.WebClient, channel: str, user: str, text: str):
+    username = await _get_username(text, web_client, user)
     if channel not in channels.keys():
-        send_msg(web_client, channel,
-                 "Warning: There is no opened table in this channel. Create table instead.")
-        create_table(web_client, channel, user, username)
+        await send_msg(web_client, channel,
+                       "Warning: There is no opened table in this channel. Create table instead.")
+        await create_table(web_client, channel, user, username)
         return
 
     gameManager.close(channels[channel].table_id)
     channels.pop(channel)
-    send_msg(web_client, channel,
-             "Successfully closed table. Reopening...")
-    create_table(web_client, channel, user, username)
+    await send_msg(web_client, channel,
+                   "Successfully closed table. Reopening...")
+    await create_table(web_client, channel, user, username)
 
 
-def join_table(web_client: slack.WebClient, channel: str, user: str, text: str):
-    username = _get_username(text, web_client, user)
+async def join_table(web_client: slack.WebClient, channel: str, user: str, text: str):
+    username = await _get_username(text, web_client, user)
     if channel not in channels.keys():
-        send_msg(web_client, channel,
-                 "Failed to join the table, because there is no opened game in this channel.")
+        await send_msg(web_client, channel,
+                       "Failed to join the table, because there is no opened game in this channel.")
         return
     table_id = channels[channel].table_id
 
     pos, nplayers, total_chip, table_chip, err = gameManager.join(table_id, user, username)
     if err is not None:
-        send_msg(web_client, channel, err)
+        await send_msg(web_client, channel, err)
         return
 
-    send_msg(web_client, channel,
-             f"{username} just joined at position {pos}, total player: {nplayers}")
+    await send_msg(web_client, channel,
+                   f"{username} just joined at position {pos}, total player: {nplayers}")
 
     if nplayers == 2:
-        send_msg(web_client, channel,
-                 'Now you can start a game by replying "start" or wait for more player to join in.')
+        await send_msg(web_client, channel,
+                       'Now you can start a game by replying "start" or wait for more player to join in.')
 
-    send_private_msg_in_channel(
+    await send_private_msg_in_channel(
         web_client, channel, user, f"you have ${total_chip}, and spend ${table_chip} to join the table")
 
 
-def leave_table(web_client: slack.WebClient, channel: str, user: str):
+async def leave_table(web_client: slack.WebClient, channel: str, user: str):
     if channel not in channels.keys():
-        send_msg(web_client, channel,
-                 "Failed to join the table, because there is no opened game in this channel.")
+        await send_msg(web_client, channel,
+                       "Failed to join the table, because there is no opened game in this channel.")
         return
     table_id = channels[channel].table_id
     nplayers, err = gameManager.leave(table_id, user)
     if err is not None:
-        send_msg(web_client, channel, err)
+        await send_msg(web_client, channel, err)
         return
 
-    send_msg(web_client, channel, f"just leaf the table, total player: {nplayers}", user)
+    await send_msg(web_client, channel, f"just leaf the table, total player: {nplayers}", user)
 
 
-def start_game(web_client: slack.WebClient, channel: str, user: str):
+async def start_game(web_client: slack.WebClient, channel: str, user: str):
     if channel not in channels.keys():
-        send_msg(web_client, channel,
-                 "Failed to start, because there is no opened game in this channel.")
+        await send_msg(web_client, channel,
+                       "Failed to start, because there is no opened game in this channel.")
         return
     table_id = channels[channel].table_id
 
     hands, err = gameManager.start(table_id, user)
     if err is not None:
-        send_msg(web_client, channel, err)
+        await send_msg(web_client, channel, err)
         return
     for hand in hands:
         card_str = ""
         for card in hand['hand']:
             card_str += card_to_emoji(str(card)) + "  "
         if not hand['id'].startswith("bot"):
-            send_private_msg_in_channel(
+            await send_private_msg_in_channel(
                 web_client, channel, hand["id"], f"Your hand is {card_str}")
         else:
-            send_msg(web_client, channel, f"{hand['id']} has {card_str}")
-    send_msg(web_client, channel,
-             "Game started! I have send your hand to you personally. And type help or @me to get help message")
+            await send_msg(web_client, channel, f"{hand['id']} has {card_str}")
+    await send_msg(web_client, channel,
+                   "Game started! I have send your hand to you personally. And type help or @me to get help message")
 
 
-def add_bot(web_client: slack.WebClient, channel: str, user: str):
+async def auto_continue(web_client: slack.WebClient, channel: str, user: str, text: str):
     if channel not in channels.keys():
-        send_msg(web_client, channel,
-                 "Failed to continue, because there is no opened game in this channel.")
+        await send_msg(web_client, channel, "Failed to set auto continue, because there is no opened game in this channel.")
+        return
+    on = not text.lower().endswith("off")
+    gameManager.set_auto_continue(channels[channel].table_id, on)
+    if on:
+        await send_msg(web_client, channel, "Auto continue is on, the next hand is dealt as soon as one ends")
+    else:
+        await send_msg(web_client, channel, "Auto continue is off, type start to deal the next hand")
+
+
+async def think_delay(web_client: slack.WebClient, channel: str, user: str, text: str):
+    if channel not in channels.keys():
+        await send_msg(web_client, channel, "Failed to set think delay, because there is no opened game in this channel.")
+        return
+    seconds = float(text.split()[-1])
+    gameManager.set_think_delay(channels[channel].table_id, seconds)
+    await send_msg(web_client, channel, f"Bots think for {seconds:g}s before they move")
+
+
+async def add_bot(web_client: slack.WebClient, channel: str, user: str):
+    if channel not in channels.keys():
+        await send_msg(web_client, channel,
+                       "Failed to continue, because there is no opened game in this channel.")
         return
     table_id = channels[channel].table_id
-    err = gameManager.add_bot(table_id)
+    bot_id, pos, table_chip, err = gameManager.add_bot(table_id)
     if err is not None:
-        send_msg(web_client, channel, err)
+        await send_msg(web_client, channel, err)
         return
+    await send_msg(web_client, channel, f"{bot_id} has joined at pos {pos} with ${table_chip}")
 
 
-def bet(web_client: slack.WebClient, channel: str, user: str, text: str):
+async def bet(web_client: slack.WebClient, channel: str, user: str, text: str):
     chip = int(text.split()[-1])
     table_id = channels[channel].table_id
     err = gameManager.bet(table_id, user, chip)
     if err is not None:
-        send_msg(web_client, channel, err)
+        await send_msg(web_client, channel, err)
 
 
-def call_or_check(web_client: slack.WebClient, channel: str, user: str):
+async def call_or_check(web_client: slack.WebClient, channel: str, user: str):
     table_id = channels[channel].table_id
     err = gameManager.call_or_check(table_id, user)
     if err is not None:
-        send_msg(web_client, channel, err)
+        await send_msg(web_client, channel, err)
 
 
-def all_in(web_client: slack.WebClient, channel: str, user: str):
+async def all_in(web_client: slack.WebClient, channel: str, user: str):
     table_id = channels[channel].table_id
     err = gameManager.all_in(table_id, user)
     if err is not None:
-        send_msg(web_client, channel, err)
+        await send_msg(web_client, channel, err)
 
 
-def fold(web_client: slack.WebClient, channel: str, user: str):
+async def fold(web_client: slack.WebClient, channel: str, user: str):
     table_id = channels[channel].table_id
     err = gameManager.fold(table_id, user)
     if err is not None:
-        send_msg(web_client, channel, err)
+        await send_msg(web_client, channel, err)
 
 
-def echo_info(web_client: slack.WebClient, channel: str, user: str):
+async def pool_join(web_client: slack.WebClient, channel: str, user: str, text: str):
+    username = " ".join(text.split()[2:]) or await get_username(web_client, user)
+    pool_players[user] = (channel, web_client)
+    chip, err = gameManager.pool_join(user, username)
+    if err is not None:
+        pool_players.pop(user)
+        await send_msg(web_client, channel, err, user)
+        return
+    await send_private_msg_in_channel(
+        web_client, channel, user, f"you spend ${chip} to join the pool, wait for your hand")
+
+
+async def pool_leave(web_client: slack.WebClient, channel: str, user: str):
+    err = gameManager.pool_leave(user)
+    if err is not None:
+        await send_msg(web_client, channel, err, user)
+        return
+    await send_msg(web_client, channel, ", you left the pool", user)
+
+
+async def pool_act(web_client: slack.WebClient, channel: str, user: str, text: str):
+    args = text.lower().split()[1:]
+    chip = 0
+    if args[-1].isdigit():
+        action, chip = "raise", int(args[-1])
+    elif args[0].startswith("c"):
+        action = "call_or_check"
+    elif args[0].startswith("a"):
+        action = "all-in"
+    else:
+        action = "fold"
+    err = gameManager.pool_act(user, action, chip)
+    if err is not None:
+        await send_msg(web_client, channel, err, user)
+
+
+async def echo_info(web_client: slack.WebClient, channel: str, user: str):
     table_id = channels[channel].table_id
-    send_msg(web_client, channel, gameManager.get_game_info(table_id))
+    await send_msg(web_client, channel, gameManager.get_game_info(table_id))
 
 
-def gain_chip(web_client: slack.WebClient, channel: str, user: str):
+async def gain_chip(web_client: slack.WebClient, channel: str, user: str):
     err = gameManager.gain_chip(user)
     if err is None:
-        send_msg(web_client, channel, ", you get $500!", user)
+        await send_msg(web_client, channel, ", you get $500!", user)
     else:
-        send_msg(web_client, channel, err, user)
+        await send_msg(web_client, channel, err, user)
 
 
-def show_chip(web_client: slack.WebClient, channel: str, user: str):
+async def show_chip(web_client: slack.WebClient, channel: str, user: str):
     chip, err = gameManager.show_chip(user)
     if err is None:
-        send_msg(web_client, channel, f", you have ${chip}", user)
+        await send_msg(web_client, channel, f", you have ${chip}", user)
     else:
-        send_msg(web_client, channel, err, user)
+        await send_msg(web_client, channel, err, user)
 
 
-def echo_help(web_client: slack.WebClient, channel: str, user: str):
+async def echo_help(web_client: slack.WebClient, channel: str, user: str):
     global HELP_MSG
     if HELP_MSG == "":
         for command in commands:
             if not command.debug:
                 HELP_MSG += f"`{command.name}`: {command.description}\n"
-    send_msg(web_client, channel, HELP_MSG)
+    await send_msg(web_client, channel, HELP_MSG)
+
+
+async def send_to_pool_player(user, msg=None, blocks=None):
+    """Tell a player of the pool about their hand, in the channel they joined from"""
+    if user not in pool_players:
+        return "user not found"
+    channel, client = pool_players[user]
+    await send_private_msg_in_channel(client, channel, user, msg, blocks=blocks)
+    return None
 
 
-def send_to_channel_by_table_id(table_id, msg="void", blocks=None):
+async def send_to_channel_by_table_id(table_id, msg="void", blocks=None):
     for (channel, info) in channels.items():
         if info.table_id == table_id:
-            ts = send_msg(info.client, channel, msg, blocks=blocks)
+            ts = await send_msg(info.client, channel, msg, blocks=blocks)
             return ts, None
     return None, "table_id not found"
 
 
-def send_private_msg_to_channel_by_table_id(table_id, user, msg="void", blocks=None):
+async def send_private_msg_to_channel_by_table_id(table_id, user, msg="void", blocks=None):
     for (channel, info) in channels.items():
         if info.table_id == table_id:
             if not user.startswith("bot"):
-                send_private_msg_in_channel(info.client, channel, user, msg, blocks=blocks)
+                await send_private_msg_in_channel(info.client, channel, user, msg, blocks=blocks)
             return None
     return "table_id not found"
 
 
-def update_msg_by_table_id(table_id, ts, msg="void", blocks=None):
+async def update_msg_by_table_id(table_id, ts, msg="void", blocks=None):
     for (channel, info) in channels.items():
         if info.table_id == table_id:
             try:
-                update_msg(info.client, channel, msg, ts, blocks=blocks)
+                await update_msg(info.client, channel, msg, ts, blocks=blocks)
                 return None
             except SlackApiError:
                 logger.debug("update msg failed with ts %s, table_id %s", ts, table_id)
@@ -243,11 +310,11 @@ def update_msg_by_table_id(table_id, ts, msg="void", blocks=None):
     return "table_id not found"
 
 
-def delete_msg_by_table_id(table_id, ts):
+async def delete_msg_by_table_id(table_id, ts):
     for (channel, info) in channels.items():
         if info.table_id == table_id:
             try:
-                delete_msg(info.client, channel, ts)
+                await delete_msg(info.client, channel, ts)
                 return None
             except SlackApiError:
                 logger.debug("delete msg failed with ts %s, table_id %s", ts, table_id)
@@ -256,6 +323,8 @@ def delete_msg_by_table_id(table_id, ts):
 
 
 channels: Dict[str, ChannelInfo] = dict()
+pool_players: Dict[str, Tuple[str, slack.WebClient]] = dict()  # userid -> (channel, client)
+gameManager.pool.notify = send_to_pool_player
 
 commands = (
     Command(r"^open((\s)+(\w)*)*$", create_table, "open <name>", "open a table", need_text=True),
@@ -263,12 +332,21 @@ commands = (
     Command(r"^reopen((\s)+(\w)*)*$", reopen_table, "reopen <name>", "reopen a table", need_text=True),
     Command(r"^leave$", leave_table, "leave", "leave the table"),
     Command(r"^start$", start_game, "start", "start a game or continue the game"),
+    Command(r"^auto(\s+(on|off))?$", auto_continue, "auto [on|off]", "deal the next hand as soon as one ends",
+            need_text=True),
     Command(r"^(b(et)?(\s)+)?(\d)+$", bet, "<bet> num", "bet chips", need_text=True),
     Command(r"^c(all)?$", call_or_check, "c<all>", "call"),
     Command(r"^c(heck)?$", call_or_check, "c<heck>", "check"),
     Command(r"^a(ll)?$", all_in, "a<ll>", "all in"),
     Command(r"^f(old)?$", fold, "f<old>", "fold"),
     Command(r"^bot$", add_bot, "bot", "add a bot to the table"),
+    Command(r"^think(\s)+(\d)+(\.(\d)+)?$", think_delay, "think <seconds>", "how long bots think before they move",
+            need_text=True),
+    Command(r"^pool\s+join((\s)+(\w)*)*$", pool_join, "pool join <name>",
+            "join the fast-fold pool, where you are dealt a new hand as soon as you fold", need_text=True),
+    Command(r"^pool\s+leave$", pool_leave, "pool leave", "leave the fast-fold pool"),
+    Command(r"^p(\s)+(c(all|heck)?|a(ll)?|f(old)?|(b(et)?(\s)+)?(\d)+)$", pool_act, "p <action>",
+            "act in your pool hand, e.g. `p c`, `p f` or `p b 20`", need_text=True),
     Command(r"^chip$", show_chip, "chip", "show how many chips you have"),
     Command(r"^help$", echo_help, "help", "get help message"),
     Command(r"^info$", echo_info, "info", "show internal state of the current game", debug=True),
@@ -0,0 +1,275 @@
+"""Many hands in lockstep, as NumPy arrays with one row per table
+
+`BatchGame` keeps the state of `headless.HeadlessGame` as a struct of arrays, with the
+same betting rules as `Game`, and advances every running table by one decision per
+`step`. All tables of a batch have the same number of seats.
+"""
+from typing import Callable, Tuple
+
+import numpy as np
+
+from .headless import PLAYING, FOLD, ALLIN, PREFLOP, FLOP, END
+from .poker_batch import evaluate_batch
+
+# action codes of `BatchGame.step`
+CALL, CHECK, FOLD_ACTION, RAISE, ALLIN_ACTION = 0, 1, 2, 3, 4
+
+
+def _next_active(status: np.ndarray, pos: np.ndarray) -> np.ndarray:
+    """The next seat after `pos` that is still playing in each row, -1 if none"""
+    n = status.shape[1]
+    seats = (pos[:, None] + np.arange(1, n)) % n
+    playing = np.take_along_axis(status, seats, axis=1) == PLAYING
+    first = playing.argmax(axis=1)
+    return np.where(playing.any(axis=1), seats[np.arange(len(pos)), first], -1)
+
+
+def _payouts(bets: np.ndarray, live: np.ndarray, strengths: np.ndarray, first: np.ndarray) -> np.ndarray:
+    """`pot.build_pots` and `pot.settle_pots` for every row at once"""
+    rows, n = bets.shape
+    levels = np.sort(np.where(live, bets, np.iinfo(bets.dtype).max), axis=1)
+    top = np.where(live, bets, 0).max(axis=1)
+    # the seat order from `first`, which gets the odd chips of split pots
+    offset = (np.arange(n) - first[:, None]) % n
+    payouts = np.zeros_like(bets)
+    previous = np.zeros(rows, dtype=bets.dtype)
+    for k in range(n):
+        level = levels[:, k]
+        valid = live.sum(axis=1) > k
+        level = np.where(valid, level, previous)
+        amount = (np.minimum(bets, level[:, None]) - np.minimum(bets, previous[:, None])).sum(axis=1)
+        # chips of folded seats above the highest live bet go to the last pot
+        amount += np.where(level == top, np.maximum(bets - top[:, None], 0).sum(axis=1), 0)
+        amount = np.where(valid & (level > previous), amount, 0)
+        eligible = live & (bets >= level[:, None])
+        best = np.where(eligible, strengths, -1).max(axis=1)
+        winners = eligible & (strengths == best[:, None])
+        count = np.maximum(winners.sum(axis=1), 1)
+        share, odd = amount // count, amount % count
+        before = (winners[:, None, :] & (offset[:, None, :] < offset[:, :, None])).sum(axis=2)
+        payouts += winners * (share[:, None] + (before < odd[:, None]))
+        previous = level
+    return payouts
+
+
+class BatchGame:
+    def __init__(self, n_tables: int, n_players: int, seed=None):
+        if n_players < 2:
+            raise ValueError("a game requires at least two players")
+        self.n_tables = n_tables
+        self.nplayers = n_players
+        self.rng = np.random.default_rng(seed)
+        self.rows = np.arange(n_tables)
+        shape = (n_tables, n_players)
+        self.chips = np.zeros(shape, dtype=np.int64)
+        self.bets = np.zeros(shape, dtype=np.int64)
+        self.status = np.zeros(shape, dtype=np.int8)
+        self.orders = np.zeros((n_tables, 52), dtype=np.uint8)
+        self.n_live = np.zeros(n_tables, dtype=np.int64)
+        self.board_len = np.zeros(n_tables, dtype=np.int64)
+        self.round_status = np.zeros(n_tables, dtype=np.int64)
+        self.running = np.zeros(n_tables, dtype=bool)
+        self.btn = np.zeros(n_tables, dtype=np.int64)
+        self.sb = np.zeros(n_tables, dtype=np.int64)
+        self.bb = np.zeros(n_tables, dtype=np.int64)
+        self.exe_pos = np.zeros(n_tables, dtype=np.int64)
+        self.next_round = np.zeros(n_tables, dtype=np.int64)
+        self.total_pot = np.zeros(n_tables, dtype=np.int64)
+        self.highest_bet = np.zeros(n_tables, dtype=np.int64)
+        self.mini_raise = np.zeros(n_tables, dtype=np.int64)
+        self.last_round_bet = np.zeros(n_tables, dtype=np.int64)
+        self.last_aggressive = np.zeros(n_tables, dtype=np.int64)
+        self.ante = 0
+        self.strengths = np.zeros(shape, dtype=np.int64)
+        self.chip_changes = np.zeros(shape, dtype=np.int64)
+
+    def start(self, chips, ante: int, btn, orders: np.ndarray = None):
+        """Start a hand at every table
+
+        Args:
+            chips (array_like): the chips of each seat, (n_tables, n_players) or (n_players,)
+            ante (int): the big blind
+            btn (array_like): the button of each table, or one for all tables
+            orders (np.ndarray) optional: (n_tables, 52) card orders, shuffled by default
+        """
+        n = self.nplayers
+        self.chips[:] = chips
+        self.bets[:] = 0
+        self.status[:] = PLAYING
+        if orders is None:
+            orders = self.rng.permuted(np.tile(np.arange(52, dtype=np.uint8), (self.n_tables, 1)), axis=1)
+        self.orders[:] = orders
+        self.n_live[:] = n
+        self.board_len[:] = 0
+        self.round_status[:] = PREFLOP
+        self.running[:] = True
+        self.btn[:] = btn
+        self.ante = ante
+        self.total_pot[:] = 0
+        self.highest_bet[:] = 0
+        self.mini_raise[:] = 0
+        self.last_round_bet[:] = 0
+        self.strengths[:] = 0
+        self.chip_changes[:] = 0
+
+        # nobody has folded or gone all-in yet, so the next active seats are the next seats
+        self.sb[:] = self.btn if n == 2 else (self.btn + 1) % n
+        self.bb[:] = (self.sb + 1) % n
+        self.exe_pos[:] = (self.bb + 1) % n
+        self.next_round[:] = self.exe_pos
+        self.last_aggressive[:] = self.exe_pos
+
+        self._put_chip(self.rows, self.sb, ante // 2)
+        self._put_chip(self.rows, self.bb, ante)
+        self.highest_bet[:] = ante
+        self.mini_raise[:] = ante * 2
+
+    def _put_chip(self, rows, pos, num):
+        """`Game.put_chip` at `pos` of each row in `rows`, returns where it succeeded"""
+        remaining = self.chips[rows, pos] - self.bets[rows, pos]
+        ok = remaining >= num
+        rows, pos, num, remaining = rows[ok], pos[ok], np.broadcast_to(num, ok.shape)[ok], remaining[ok]
+        allin = remaining == num
+        self.status[rows[allin], pos[allin]] = ALLIN
+        self.bets[rows, pos] += num
+        self.total_pot[rows] += num
+        return ok
+
+    def is_check_permitted(self) -> np.ndarray:
+        return self.bets[self.rows, self.exe_pos] >= self.highest_bet
+
+    def step(self, actions: np.ndarray, amounts: np.ndarray = None) -> np.ndarray:
+        """Apply one action at every running table, by its player at `exe_pos`
+
+        Args:
+            actions (np.ndarray): an action code of each table, e.g. `CALL`
+            amounts (np.ndarray) optional: the chips of each `RAISE`
+
+        Returns:
+            ok (np.ndarray): where the action was valid, like a return value of 0 in `Game`
+        """
+        running = np.nonzero(self.running)[0]
+        actions = np.asarray(actions)[running]
+        pos = self.exe_pos[running]
+        bet = self.bets[running, pos]
+        ok = np.zeros(self.n_tables, dtype=bool)
+
+        sel = actions == CALL
+        rows = running[sel]
+        ok[rows] = self._put_chip(rows, pos[sel], self.highest_bet[rows] - bet[sel])
+
+        sel = (actions == CHECK) & (bet >= self.highest_bet[running])
+        ok[running[sel]] = True
+
+        sel = actions == FOLD_ACTION
+        rows = running[sel]
+        self.status[rows, pos[sel]] = FOLD
+        self.n_live[rows] -= 1
+        ok[rows] = True
+
+        sel = actions == RAISE
+        if sel.any():
+            amounts = np.asarray(amounts, dtype=np.int64)[running]
+            sel &= bet - self.last_round_bet[running] + amounts >= self.mini_raise[running]
+            rows, p = running[sel], pos[sel]
+            done = self._put_chip(rows, p, amounts[sel])
+            rows, p = rows[done], p[done]
+            new_bet = self.bets[rows, p]
+            self.next_round[rows] = p
+            self.mini_raise[rows] += new_bet - self.highest_bet[rows]
+            self.highest_bet[rows] = new_bet
+            self.last_aggressive[rows] = p
+            ok[rows] = True
+
+        sel = actions == ALLIN_ACTION
+        rows, p = running[sel], pos[sel]
+        chip = self.chips[rows, p]
+        up = chip > self.highest_bet[rows]
+        raised = rows[up]
+        self.mini_raise[raised] += chip[up] - self.highest_bet[raised]
+        self.highest_bet[raised] = chip[up]
+        self.next_round[raised] = p[up]
+        self.last_aggressive[raised] = p[up]
+        self._put_chip(rows, p, chip - bet[sel])
+        ok[rows] = True
+
+        self._invoke_next_player(np.nonzero(ok)[0])
+        return ok
+
+    def _invoke_next_player(self, rows: np.ndarray):
+        """`Game.invoke_next_player` for each row in `rows`
+
+        The recursion of `Game` at a street change goes at most one level deep, so it
+        is unrolled here.
+        """
+        ending = rows[self.n_live[rows] == 1]
+        rows = rows[self.n_live[rows] > 1]
+
+        r = _next_active(self.status[rows], self.exe_pos[rows])
+        runout = rows[r == -1]
+        self.board_len[runout] = 5
+        ending = np.concatenate([ending, runout])
+
+        to_street = (r != -1) & (r == self.next_round[rows])
+        street = rows[to_street]
+
+        acting = (r != -1) & ~to_street
+        acted = rows[acting]
+        self.exe_pos[acted] = r[acting]
+        waiting = self.status[acted, self.next_round[acted]] != PLAYING
+        skip = acted[waiting]
+        self.next_round[skip] = _next_active(self.status[skip], self.next_round[skip])
+
+        self.round_status[street] += 1
+        self.last_round_bet[street] = self.highest_bet[street]
+        self.board_len[street] = np.where(self.round_status[street] == FLOP, 3,
+                                          np.minimum(self.board_len[street] + 1, 5))
+        ending = np.concatenate([ending, street[self.round_status[street] == END]])
+        street = street[self.round_status[street] != END]
+        first = _next_active(self.status[street], self.btn[street])
+        runout = street[first == -1]
+        self.exe_pos[runout] = self.btn[runout]
+        self.board_len[runout] = 5
+        ending = np.concatenate([ending, runout])
+        street, first = street[first != -1], first[first != -1]
+        self.exe_pos[street] = first
+        self.last_aggressive[street] = first
+        self.next_round[street] = first
+        self.mini_raise[street] = self.ante
+
+        if len(ending):
+            self._end(ending)
+
+    def _end(self, rows: np.ndarray):
+        n = self.nplayers
+        live = self.status[rows] != FOLD
+        showdown = rows[self.n_live[rows] >= 2]
+        if len(showdown):
+            orders = self.orders[showdown].astype(np.intp)
+            hole = orders[:, :2 * n].reshape(len(showdown), n, 2)
+            board = np.broadcast_to(orders[:, None, 2 * n:2 * n + 5], (len(showdown), n, 5))
+            cards = np.concatenate([hole, board], axis=2).reshape(-1, 7)
+            self.strengths[showdown] = evaluate_batch(cards).reshape(len(showdown), n)
+        bets = self.bets[rows]
+        payouts = _payouts(bets, live, self.strengths[rows], (self.btn[rows] + 1) % n)
+        self.chip_changes[rows] = payouts - bets
+        self.round_status[rows] = END
+        self.running[rows] = False
+
+    def play(self, policy: Callable[['BatchGame'], Tuple[np.ndarray, np.ndarray]]) -> np.ndarray:
+        """Play the started hands to the end, `policy(game)` returns (actions, amounts)
+
+        After an invalid action the player checks or folds, like a player who times out
+        at the table.
+
+        Returns:
+            chip_changes (np.ndarray): (n_tables, n_players), the chips won or lost
+        """
+        while self.running.any():
+            running = self.running.copy()
+            actions, amounts = policy(self)
+            ok = self.step(actions, amounts)
+            failed = running & ~ok
+            if failed.any():
+                self.step(np.where(failed, np.where(self.is_check_permitted(), CHECK, FOLD_ACTION), -1))
+        return self.chip_changes
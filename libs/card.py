@@ -1,15 +1,63 @@
+from typing import Dict, Tuple
+
+from .poker_eval import CARD_VALUES, RANKS, card_index
+
+
 class Card(object):
+    """A playing card. There are only 52 instances, `Card(color, num)` returns the shared one
+
+    Attributes:
+        color (int): the suit, 0..3 for `shcd`
+        num (int): 1 for `A`, 2..13 for `2`..`K`
+        rank (int): 0 for `2`, 12 for `A`, the rank used by `poker_eval`
+        index (int): `color * 13 + rank`, see `poker_eval.card_index`
+        mask (int): `1 << index`
+        value (int): the evaluation value, see `poker_eval.CARD_VALUES`
+    """
+    __slots__ = ('color', 'num', 'rank', 'index', 'mask', 'value', '_str')
+
     _COLOR = 'shcd'
     _NUM2CHAR = 'EA23456789TJQK'
+    _interned: Dict[Tuple[int, int], 'Card'] = {}
 
-    def __init__(self, color, num):
+    def __new__(cls, color, num):
+        card = cls._interned.get((color, num))
+        if card is not None:
+            return card
         if color < 0 or color > 3 or num < 1 or num > 13:
             raise ValueError
-        self.color = color
-        self.num = num
+        card = super().__new__(cls)
+        card.color = color
+        card.num = num
+        card._str = f'{Card._NUM2CHAR[num]}{Card._COLOR[color]}'
+        card.rank = RANKS.index(card._str[0])
+        card.index = color * 13 + card.rank
+        card.mask = 1 << card.index
+        card.value = CARD_VALUES[card.index]
+        cls._interned[(color, num)] = card
+        return card
+
+    def __reduce__(self):
+        return Card, (self.color, self.num)
 
     def __repr__(self):
-        return f'{Card._NUM2CHAR[self.num]}{Card._COLOR[self.color]}'
+        return self._str
 
     def __str__(self):
-        return f'{Card._NUM2CHAR[self.num]}{Card._COLOR[self.color]}'
+        return self._str
+
+
+# all cards, CARDS[i].index == i
+CARDS: Tuple[Card, ...] = tuple(sorted((Card(color, num) for color in range(4) for num in range(1, 14)),
+                                       key=lambda c: c.index))
+INDEX_OF: Dict[Card, int] = {card: card.index for card in CARDS}
+RANK_OF: Dict[Card, int] = {card: card.rank for card in CARDS}
+
+
+def to_index(card) -> int:
+    """Get the index of a `Card`, a card string such as `As` or an index"""
+    if isinstance(card, Card):
+        return card.index
+    if isinstance(card, int):
+        return card
+    return card_index(card)
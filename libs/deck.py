@@ -0,0 +1,69 @@
+"""Dealing cards from pre-generated shuffles
+
+A `ShufflePool` owns one RNG stream and generates shuffles in bulk with NumPy: while one
+batch is being dealt, the next one is generated on a background thread. Seeding the pool
+makes every deck it produces reproducible, so each table or simulation worker can have
+its own independent stream.
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Sequence
+
+import numpy as np
+
+from .card import Card, CARDS
+
+BATCH_SIZE = 1024
+
+_refiller = ThreadPoolExecutor(max_workers=1, thread_name_prefix='shuffle')
+
+
+class ShufflePool:
+    def __init__(self, seed=None, batch_size: int = BATCH_SIZE):
+        self.rng = np.random.default_rng(seed)
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.batch: np.ndarray = self._generate()
+        self.pos = 0
+        self.next_batch: Future = _refiller.submit(self._generate)
+
+    def _generate(self) -> np.ndarray:
+        return self.rng.permuted(np.tile(np.arange(52, dtype=np.uint8), (self.batch_size, 1)), axis=1)
+
+    def next_order(self) -> bytes:
+        """Get the next shuffle, the order of the 52 card indexes"""
+        with self.lock:
+            if self.pos == self.batch_size:
+                self.batch = self.next_batch.result()
+                self.pos = 0
+                self.next_batch = _refiller.submit(self._generate)
+            order = self.batch[self.pos].tobytes()
+            self.pos += 1
+            return order
+
+
+class Deck(object):
+    """A shuffled deck, `dealt` is the mask (`1 << index`) of the cards dealt so far"""
+
+    def __init__(self, pool: ShufflePool = None, order: Sequence[int] = None):
+        if order is None:
+            order = (pool or default_pool).next_order()
+        self.order = bytes(order)
+        self.pos = 0
+        self.dealt = 0
+
+    def get_card(self) -> Card:
+        card = CARDS[self.order[self.pos]]
+        self.pos += 1
+        self.dealt |= card.mask
+        return card
+
+    def is_dealt(self, card: Card) -> bool:
+        return self.dealt & card.mask != 0
+
+    def remaining(self) -> int:
+        return 52 - self.pos
+
+
+# for the decks and games that are not given a pool of their own, a new pool is only needed for a seed
+default_pool = ShufflePool()
@@ -0,0 +1,153 @@
+"""Monte Carlo equity of known hands against a partial board
+
+The unseen cards are dealt at random in batches, each batch is scored with
+`poker_batch.evaluate_batch` in a worker process and sampling stops as soon as every
+player's equity is known within `margin` at the given `confidence`, or the sample
+budget is used up.
+"""
+from __future__ import annotations
+import logging
+import math
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from .poker_batch import evaluate_batch
+from .card import to_index
+from .game import Game
+from .player import Player
+
+DEFAULT_SAMPLES = 200000
+BATCH_SIZE = 10000
+
+logger = logging.getLogger(__name__)
+
+
+class Equity(NamedTuple):
+    win: float  # probability to win the whole pot
+    tie: float  # probability to split the pot
+    share: float  # expected share of the pot
+
+
+def _tally(hands: List[List[int]], common: np.ndarray) -> Tuple[List[int], List[int], List[float]]:
+    """Score every hand against each row of five public cards, return (wins, ties, shares) of each hand"""
+    n = len(common)
+    strengths = np.stack([
+        evaluate_batch(np.hstack([np.broadcast_to(np.array(hand, dtype=np.intp), (n, 2)), common]))
+        for hand in hands], axis=1)
+    winners = strengths == strengths.max(axis=1, keepdims=True)
+    n_winners = winners.sum(axis=1, keepdims=True)
+    wins = (winners & (n_winners == 1)).sum(axis=0)
+    ties = (winners & (n_winners > 1)).sum(axis=0)
+    shares = (winners / n_winners).sum(axis=0)
+    return wins.tolist(), ties.tolist(), shares.tolist()
+
+
+def _z_value(confidence: float) -> float:
+    """The z with P(|Z| < z) = `confidence` for a standard normal Z, by bisection on `math.erf`"""
+    low, high = 0.0, 10.0
+    for _ in range(60):
+        mid = (low + high) / 2
+        if math.erf(mid / math.sqrt(2)) < confidence:
+            low = mid
+        else:
+            high = mid
+    return (low + high) / 2
+
+
+def unseen_cards(hands: List[List[int]], board: List[int]) -> np.ndarray:
+    """Get the indexes of the cards that are neither in `hands` nor on `board`"""
+    known = set(board).union(*hands)
+    return np.array([i for i in range(52) if i not in known], dtype=np.intp)
+
+
+def _simulate(hands: List[List[int]], board: List[int], n: int, seed) -> Tuple[List[int], List[int], List[float]]:
+    """Deal `n` random runouts, return (wins, ties, shares) of each hand"""
+    rng = np.random.default_rng(seed)
+    runouts = rng.permuted(np.tile(unseen_cards(hands, board), (n, 1)), axis=1)[:, :5 - len(board)]
+    return _tally(hands, np.hstack([np.broadcast_to(np.array(board, dtype=np.intp), (n, len(board))), runouts]))
+
+
+class EquityEngine:
+    """Estimate equities with a pool of `workers` processes, no pool if `workers` is 0"""
+
+    def __init__(self, workers: int = None):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.workers = workers
+        self.executor: Executor = ProcessPoolExecutor(self.workers) if self.workers > 0 else None
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run_round(self, hands, board, seeds) -> List[Tuple[List[int], List[int], List[float]]]:
+        if self.executor is None:
+            return [_simulate(hands, board, BATCH_SIZE, seed) for seed in seeds]
+        futures = [self.executor.submit(_simulate, hands, board, BATCH_SIZE, seed) for seed in seeds]
+        return [f.result() for f in futures]
+
+    def estimate(self, hands: Sequence[Sequence], board: Sequence = (), samples: int = DEFAULT_SAMPLES,
+                 seed: int = 0, confidence: float = 0.95, margin: float = 0.005) -> Tuple[List[Equity], int]:
+        """Estimate the equity of each hand
+
+        Args:
+            hands (Sequence[Sequence]): two hole cards for each player, as `Card`s,
+                card strings or card indexes
+            board (Sequence): zero to five public cards
+            samples (int): the most runouts to deal, rounded up to whole batches
+            seed (int): the same seed always gives the same result
+            confidence (float): the confidence level of the early stop
+            margin (float): stop once every share is known within +/- `margin`
+
+        Returns:
+            equities (List[Equity]): the equity of each hand
+            samples (int): the number of runouts actually dealt
+        """
+        hands = [[to_index(c) for c in hand] for hand in hands]
+        board = [to_index(c) for c in board]
+        cards = board + [c for hand in hands for c in hand]
+        if len(hands) < 2 or any(len(hand) != 2 for hand in hands) or len(board) > 5:
+            raise ValueError("expect at least two hands of two cards and at most five public cards")
+        if len(set(cards)) != len(cards):
+            raise ValueError("duplicate cards")
+        if samples <= 0:
+            raise ValueError("samples should be positive")
+
+        if len(board) == 5:
+            wins, ties, shares = _simulate(hands, board, 1, seed)
+            return [Equity(w, t, s) for w, t, s in zip(wins, ties, shares)], 1
+
+        z = _z_value(confidence)
+        seeds = iter(np.random.SeedSequence(seed).spawn(-(-samples // BATCH_SIZE)))
+        wins = [0] * len(hands)
+        ties = [0] * len(hands)
+        shares = [0.0] * len(hands)
+        n = 0
+        while n < samples:
+            round_seeds = [s for _, s in zip(range(max(self.workers, 1)), seeds)]
+            for w, t, s in self._run_round(hands, board, round_seeds):
+                wins = [a + b for a, b in zip(wins, w)]
+                ties = [a + b for a, b in zip(ties, t)]
+                shares = [a + b for a, b in zip(shares, s)]
+            n += len(round_seeds) * BATCH_SIZE
+            if all(z * (p * (1 - p) / n) ** 0.5 < margin for p in (s / n for s in shares)):
+                break
+        logger.debug("equity of %d hands: %d samples", len(hands), n)
+        return [Equity(w / n, t / n, s / n) for w, t, s in zip(wins, ties, shares)], n
+
+
+def game_equity(game: Game, engine: EquityEngine, **kwargs) -> Dict[Player, Equity]:
+    """Estimate the equity of every player who is still in the hand of a running `Game`"""
+    players = [p for p in game.players if p.is_normal() and not p.is_fold()]
+    equities, _ = engine.estimate([p.cards for p in players], game.pub_cards, **kwargs)
+    return dict(zip(players, equities))
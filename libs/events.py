@@ -0,0 +1,218 @@
+"""Typed game events, delivered to subscribers off the game lock
+
+`Game` publishes events while holding its lock; publishing only puts the event in the
+bounded queue of each subscriber, whose own thread consumes them in order. A slow
+subscriber, e.g. one calling Slack, delays only itself, and blocks `publish` only once
+its queue is full. A subscriber may instead be called on the loop of the async runtime,
+through a `LoopScheduler`, so that thousands of tables do not need a thread each; there
+`publish` blocks the same way when the publisher can wait for the loop, and drops the
+event otherwise.
+
+Events carry a `GameView`, an immutable copy of what renderers need, taken when the
+event happened, so subscribers never read the live game. The same views are what
+`Game.state` holds for readers outside the lock.
+"""
+import asyncio
+import logging
+import queue
+import threading
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+
+from .scheduler import LoopScheduler
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 1024
+
+
+class PlayerView(NamedTuple):
+    userid: str
+    username: str
+    remaining_chip: int
+    chip_bet: int
+    is_normal: bool
+    is_fold: bool
+    action: str  # the action in this round, "" if none yet
+    action_chip: int
+    chip: int
+    cards: tuple
+    mode: Any  # PlayerMode
+    status: Any  # PlayerStatus
+    rank: Optional[int]
+    hand: Optional[tuple]
+
+
+class GameView(NamedTuple):
+    round_status: Any  # RoundStatus
+    pub_cards: tuple
+    total_pot: int
+    ante: int
+    btn: int
+    sb: int
+    exe_pos: int
+    players: Tuple[PlayerView, ...]
+    game_status: Any  # GameStatus
+    bb: int
+    next_round: int
+    highest_bet: int
+    version: int  # of `Game.state`, which increases with every transition
+
+
+class TurnStarted(NamedTuple):
+    """The player at `view.exe_pos` is to act"""
+    view: GameView
+
+
+class ActionTaken(NamedTuple):
+    """A player acted, `view` is the state after the action"""
+    view: GameView
+    pos: int
+    action: str
+    chip: int
+
+
+class StreetEnded(NamedTuple):
+    """The betting of `view.round_status` is over, before the next street is dealt"""
+    view: GameView
+
+
+class AllInRunout(NamedTuple):
+    """Nobody can act any more, the rest of the board is about to be dealt
+
+    The equities of the runout are left to subscribers, see `runout.runout_equity`.
+    """
+    view: GameView
+
+
+class HandEnded(NamedTuple):
+    view: GameView
+    result: Any  # Result
+    snapshot: bytes  # `Game.snapshot` of the finished hand, for the hand history
+
+
+class Subscription:
+    def __init__(self, fn: Callable[[Any], Any], maxsize: int):
+        self.fn = fn
+        self.queue: queue.Queue = queue.Queue(maxsize)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def put(self, event):
+        self.queue.put(event)
+
+    def close(self):
+        self.queue.put(None)
+
+    def join(self):
+        self.queue.join()
+
+    def _run(self):
+        while True:
+            event = self.queue.get()
+            if event is None:
+                return
+            try:
+                self.fn(event)
+            except Exception:
+                logger.exception("subscriber %r failed on %s", self.fn, type(event).__name__)
+            finally:
+                self.queue.task_done()
+
+
+class ScheduledSubscription:
+    """Calls `fn` on a `LoopScheduler`, which runs its callbacks in order, instead of a thread
+
+    At most `maxsize` events wait for the loop. A publisher on another thread then waits,
+    like on a full queue, while one on the loop itself, or before the loop is started,
+    could wait forever, so the event is dropped.
+    """
+
+    def __init__(self, fn: Callable[[Any], Any], scheduler: LoopScheduler, maxsize: int):
+        self.fn = fn
+        self.scheduler = scheduler
+        self.maxsize = maxsize
+        self.cond = threading.Condition()
+        self.pending = 0
+        self.closed = False
+
+    def _can_wait(self) -> bool:
+        loop = self.scheduler.loop
+        if loop is None or not loop.is_running():
+            return False
+        try:
+            return asyncio.get_running_loop() is not loop
+        except RuntimeError:
+            return True
+
+    def put(self, event):
+        with self.cond:
+            if 0 < self.maxsize <= self.pending:
+                if not self._can_wait():
+                    logger.warning("subscriber %r is %d events behind, dropped %s",
+                                   self.fn, self.pending, type(event).__name__)
+                    return
+                self.cond.wait_for(lambda: self.pending < self.maxsize)
+            self.pending += 1
+        try:
+            self.scheduler.call_later(0, self._call, event)
+        except Exception:
+            with self.cond:
+                self.pending -= 1
+                self.cond.notify_all()
+            raise
+
+    def close(self):
+        self.closed = True
+
+    def join(self):
+        """Not on the scheduler, which would wait for itself"""
+        with self.cond:
+            self.cond.wait_for(lambda: self.pending == 0)
+
+    def _call(self, event):
+        try:
+            if not self.closed:
+                self.fn(event)
+        except Exception:
+            logger.exception("subscriber %r failed on %s", self.fn, type(event).__name__)
+        finally:
+            with self.cond:
+                self.pending -= 1
+                self.cond.notify_all()
+
+
+class EventBus:
+    def __init__(self, maxsize: int = QUEUE_SIZE):
+        self.maxsize = maxsize
+        self.subscriptions: List[Subscription] = []
+
+    def subscribe(self, fn: Callable[[Any], Any], scheduler: LoopScheduler = None):
+        """Call `fn(event)` for every event from now on, in order, on a thread of its own
+
+        Args:
+            scheduler (LoopScheduler) optional: call `fn` on its loop instead; `fn` should
+                then be short
+        """
+        if scheduler is None:
+            subscription = Subscription(fn, self.maxsize)
+        else:
+            subscription = ScheduledSubscription(fn, scheduler, self.maxsize)
+        self.subscriptions = self.subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscriptions = [s for s in self.subscriptions if s is not subscription]
+        subscription.close()
+
+    def publish(self, event):
+        """Never raises, `Game` publishes in the middle of a transition"""
+        for subscription in self.subscriptions:
+            try:
+                subscription.put(event)
+            except Exception:
+                logger.exception("failed to publish %s to %r", type(event).__name__, subscription.fn)
+
+    def join(self):
+        """Wait until every event published so far is consumed"""
+        for subscription in self.subscriptions:
+            subscription.join()
@@ -0,0 +1,307 @@
+"""Random hands through `Game`, checking its invariants after every action
+
+A `Case` is one hand: the stacks, the blind, the button, the deck order and the actions
+tried, legal or not, each by the player to act or by someone else. `run_case` plays it
+and checks after every action that
+
+- chips are conserved, `total_pot` is the sum of the bets and nobody bets more than
+  they have,
+- a rejected action changes nothing,
+- the turn passes to the next player who can act, and each street starts after the
+  button with the right number of public cards,
+- the pots add up to the bets, only live players are eligible, the best of them win
+  and the chip changes add up to zero after `Result.execute`.
+
+`fuzz` plays random cases on a pool of processes, and shrinks the first failing case
+to as few and as simple actions as still fail. When the actions of a case run out
+before the hand ends, the player to act checks or folds, so every case is a whole hand.
+
+    python -m libs.fuzz [n_hands] [workers]
+"""
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, List, NamedTuple, Optional, Tuple
+
+from .game import Game, GameStatus, RoundStatus
+from .player import Player
+
+MAX_PLAYERS = 9
+CHUNK_SIZE = 500
+# the public cards of each round while it is being bet
+BOARD_SIZE = {RoundStatus.PREFLOP: 0, RoundStatus.FLOP: 3, RoundStatus.TURN: 4, RoundStatus.RIVER: 5}
+
+
+class Case(NamedTuple):
+    chips: Tuple[int, ...]
+    ante: int
+    btn: int
+    order: bytes
+    # (seat, action, num of a raise), the seat counts from the player to act, -1 and
+    # the number of players are seats that do not exist
+    actions: Tuple[Tuple[int, str, int], ...]
+
+
+class Failure(NamedTuple):
+    case: Case
+    message: str
+
+
+class FuzzReport(NamedTuple):
+    hands: int
+    elapsed: float
+    failure: Optional[Failure]  # the first one, shrunk, None if every hand passed
+
+    @property
+    def hands_per_second(self) -> float:
+        return self.hands / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class InvariantError(Exception):
+    pass
+
+
+class _FixedOrder:
+    def __init__(self, order: bytes):
+        self.order = order
+
+    def next_order(self) -> bytes:
+        return self.order
+
+
+def _check(cond: bool, message: str, *args):
+    if not cond:
+        raise InvariantError(message % args)
+
+
+def _seats(game: Game) -> tuple:
+    return (game.round_status, game.exe_pos, game.total_pot, game.highest_bet, len(game.pub_cards),
+            tuple((p.chip_bet, p.status) for p in game.players))
+
+
+def _check_state(game: Game):
+    players = game.players
+    _check(game.total_pot == sum(p.chip_bet for p in players), "total_pot %d is not the sum of the bets %s",
+           game.total_pot, [p.chip_bet for p in players])
+    for pos, p in enumerate(players):
+        _check(0 <= p.chip_bet <= p.chip, "seat %d bets %d of %d chips", pos, p.chip_bet, p.chip)
+        if not p.is_fold():
+            _check(p.is_allin() == (p.chip_bet == p.chip), "seat %d is %s with %d of %d chips bet", pos,
+                   p.status.name, p.chip_bet, p.chip)
+    cards = [c for p in players for c in p.cards] + game.pub_cards
+    _check(len(set(cards)) == len(cards), "a card is dealt twice: %s", cards)
+    if game.is_running():
+        _check(game.highest_bet == max(p.chip_bet for p in players), "highest_bet %d is not the highest bet %s",
+               game.highest_bet, [p.chip_bet for p in players])
+        _check(len(game.pub_cards) == BOARD_SIZE[game.round_status], "%d public cards on the %s",
+               len(game.pub_cards), game.round_status.name)
+        _check(players[game.exe_pos].is_playing(), "seat %d is to act but is %s", game.exe_pos,
+               players[game.exe_pos].status.name)
+
+
+def _check_turn(game: Game, before: tuple, pos: int):
+    """After an accepted action of `pos`"""
+    round_status = before[0]
+    if not game.is_running():
+        return
+    if game.round_status == round_status:
+        expected = game.find_next_active_player(pos)
+        _check(game.exe_pos == expected, "seat %d is to act after %d, not %d", game.exe_pos, pos, expected)
+    else:
+        _check(game.round_status == round_status + 1, "%s follows %s", game.round_status.name, round_status.name)
+        expected = game.find_next_active_player(game.btn)
+        _check(game.exe_pos == expected, "seat %d starts the %s, not %d", game.exe_pos, game.round_status.name,
+               expected)
+
+
+def _check_result(game: Game, chips: List[int]):
+    players = game.players
+    _check(game.game_status == GameStatus.WAITING and game.round_status == RoundStatus.END, "the hand is not over")
+    result = game.result
+    _check(set(result.chip_changes) == set(players), "chip changes of %s", list(result.chip_changes))
+    _check(sum(result.chip_changes.values()) == 0, "chip changes %s do not add up to 0",
+           list(result.chip_changes.values()))
+    bets = [p.chip_bet for p in players]
+    live = [p.is_normal() and not p.is_fold() for p in players]
+    _check(sum(pot.amount for pot in result.pots) == sum(bets), "pots %s do not add up to the bets %s",
+           result.pots, bets)
+    payouts = [0] * len(players)
+    for pot in result.pots:
+        _check(all(live[s] for s in pot.eligible), "a folded seat is eligible for %s", pot)
+        _check(set(pot.winners) <= set(pot.eligible), "a winner is not eligible for %s", pot)
+        _check(sum(pot.shares) == pot.amount, "the shares of %s do not add up", pot)
+        if sum(live) >= 2 and pot.eligible:
+            best = max(players[s].rank for s in pot.eligible)
+            _check(sorted(pot.winners) == sorted(s for s in pot.eligible if players[s].rank == best),
+                   "the best hands of %s do not win, ranks %s", pot, [p.rank for p in players])
+        for seat, share in zip(pot.winners, pot.shares):
+            payouts[seat] += share
+    for pos, p in enumerate(players):
+        _check(result.chip_changes[p] == payouts[pos] - p.chip_bet, "seat %d changes %d, but wins %d of %d bet",
+               pos, result.chip_changes[p], payouts[pos], p.chip_bet)
+    result.execute()
+    _check(sum(p.chip for p in players) == sum(chips), "%d chips after the hand, %d before",
+           sum(p.chip for p in players), sum(chips))
+    _check(all(p.chip >= 0 for p in players), "negative chips %s", [p.chip for p in players])
+
+
+def _apply(game: Game, pos: int, action: str, num: int) -> int:
+    if action == "raise":
+        return game.praise(pos, num)
+    if action == "all-in":
+        return game.pallin(pos)
+    return getattr(game, "p" + action)(pos)
+
+
+def run_case(case: Case, choose: Callable[[Game], Tuple[int, str, int]] = None) -> Tuple[Case, Optional[str]]:
+    """Play a case, return it with the actions actually tried and the first broken invariant
+
+    Args:
+        choose (Callable) optional: picks an action for `game` once the actions of
+            `case` run out, check or fold by default
+    """
+    game = Game(shuffle_pool=_FixedOrder(case.order))
+    players = [Player(f"u{i}", f"player{i}", chip) for i, chip in enumerate(case.chips)]
+    for player in players:
+        player.set_normal()
+    n = len(players)
+    tried = []
+    try:
+        _check(game.start(players, case.ante, case.btn) == 0, "the hand does not start")
+        _check_state(game)
+        actions = iter(case.actions)
+        while game.is_running():
+            step = next(actions, None)
+            if step is None:
+                if choose is None:
+                    pos = game.exe_pos
+                    step = (0, "check" if game.is_check_permitted(pos) else "fold", 0)
+                else:
+                    step = choose(game)
+            tried.append(step)
+            seat, action, num = step
+            pos = (game.exe_pos + seat) % n if 0 <= seat < n else seat
+            before = _seats(game)
+            legal = game.legal_actions(pos)
+            ret = _apply(game, pos, action, num)
+            expected = {"check": legal.check, "call": legal.call is not None, "fold": legal.fold,
+                        "raise": legal.can_raise(num), "all-in": legal.allin is not None}[action]
+            _check((ret == 0) == expected, "%s %d at seat %d returns %d", action, num, pos, ret)
+            if ret != 0:
+                _check(_seats(game) == before, "rejected %s %d at seat %d changes the game", action, num, pos)
+            else:
+                _check_turn(game, before, pos)
+            _check_state(game)
+        _check_result(game, list(case.chips))
+    except InvariantError as e:
+        return case._replace(actions=tuple(tried)), str(e)
+    except Exception as e:
+        return case._replace(actions=tuple(tried)), f"{type(e).__name__}: {e}"
+    return case._replace(actions=tuple(tried)), None
+
+
+def random_case(rng: random.Random) -> Case:
+    """The table of a case, without actions, every stack covers the big blind as at a table"""
+    n = rng.randint(2, MAX_PLAYERS)
+    ante = rng.choice((2, 20, 50))
+    chips = tuple(rng.choice((ante, ante + 1, 3 * ante, rng.randint(ante, 40 * ante), 100 * ante)) for _ in range(n))
+    order = list(range(52))
+    rng.shuffle(order)
+    return Case(chips, ante, rng.randrange(n), bytes(order), ())
+
+
+def random_chooser(rng: random.Random) -> Callable[[Game], Tuple[int, str, int]]:
+    """Mostly legal actions of the player to act, with amounts around the limits"""
+
+    def choose(game: Game) -> Tuple[int, str, int]:
+        n = game.nplayers
+        seat = 0 if rng.random() < 0.9 else rng.choice((-1, rng.randrange(1, n), n))
+        action = rng.choice(("call", "call", "check", "check", "fold", "raise", "raise", "all-in"))
+        num = 0
+        if action == "raise":
+            legal = game.legal_actions(game.exe_pos)
+            low = legal.min_raise if legal.min_raise is not None else game.mini_raise
+            high = legal.max_raise if legal.max_raise is not None else low
+            num = rng.choice((low, low - 1, high, high + 1, rng.randint(low, max(low, high)), 0, -low))
+        return seat, action, num
+
+    return choose
+
+
+def shrink(case: Case, fails: Callable[[Case], bool]) -> Case:
+    """Remove and simplify actions of a failing case, as long as it still fails"""
+    actions = list(case.actions)
+    size = max(len(actions) // 2, 1)
+    while size >= 1:
+        i = 0
+        while i < len(actions):
+            candidate = actions[:i] + actions[i + size:]
+            if fails(case._replace(actions=tuple(candidate))):
+                actions = candidate
+            else:
+                i += size
+        size //= 2
+    for i in range(len(actions)):
+        seat, action, num = actions[i]
+        for simpler in ((0, action, num), (seat, action, 0), (0, "check", 0), (0, "fold", 0)):
+            if simpler == actions[i]:
+                continue
+            candidate = actions[:i] + [simpler] + actions[i + 1:]
+            if fails(case._replace(actions=tuple(candidate))):
+                actions = candidate
+                break
+    return case._replace(actions=tuple(actions))
+
+
+def _fuzz_chunk(seeds: range) -> Tuple[int, Optional[Failure]]:
+    for i, seed in enumerate(seeds):
+        rng = random.Random(seed)
+        case, message = run_case(random_case(rng), random_chooser(rng))
+        if message is not None:
+            return i + 1, Failure(case, message)
+    return len(seeds), None
+
+
+def _first_failure(results: Iterable[Tuple[int, Optional[Failure]]]) -> Tuple[int, Optional[Failure]]:
+    """Count the hands of chunk results up to the first failure, which is returned with them"""
+    hands = 0
+    for n, failure in results:
+        hands += n
+        if failure is not None:
+            return hands, failure
+    return hands, None
+
+
+def fuzz(n_hands: int, workers: int = None, seed: int = 0, chunk_size: int = CHUNK_SIZE) -> FuzzReport:
+    """Play `n_hands` random hands on a pool of `workers` processes, no pool if `workers` is 0"""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    start = time.perf_counter()
+    chunks = [range(s, min(s + chunk_size, seed + n_hands)) for s in range(seed, seed + n_hands, chunk_size)]
+    if workers == 0:
+        hands, failure = _first_failure(map(_fuzz_chunk, chunks))
+    else:
+        executor = ProcessPoolExecutor(workers)
+        futures = [executor.submit(_fuzz_chunk, chunk) for chunk in chunks]
+        try:
+            hands, failure = _first_failure(f.result() for f in futures)
+        finally:
+            # drop the chunks not started yet, `shutdown` only learns to cancel them in 3.9
+            for future in futures:
+                future.cancel()
+            executor.shutdown()
+    elapsed = time.perf_counter() - start
+    if failure is not None:
+        case = shrink(failure.case, lambda c: run_case(c)[1] is not None)
+        failure = Failure(case, run_case(case)[1])
+    return FuzzReport(hands, elapsed, failure)
+
+
+if __name__ == '__main__':
+    import sys
+    report = fuzz(*map(int, sys.argv[1:]))
+    print(f"{report.hands} hands, {report.hands_per_second:,.0f} hands/s")
+    if report.failure is not None:
+        print(f"{report.failure.message}\n{report.failure.case}")
+        sys.exit(1)
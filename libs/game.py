@@ -1,16 +1,26 @@
 from enum import IntEnum
 from functools import wraps
-import random
 import threading
 import logging
 import uuid
-import time
-from itertools import groupby
-from typing import List, Dict, Callable, Any
+from typing import List, Dict, Tuple
 
-from .poker_cmp import poker7
-from .player import Player
-from .card import Card
+from .poker_cmp import Board
+from .poker_eval import best_hand
+from .player import Player, write_players, read_players
+from .card import INDEX_OF, RANK_OF
+from .deck import Deck, ShufflePool, default_pool
+from .pot import Pot, build_pots, settle_pots
+from .snapshot import Writer, Reader
+from .legal import LegalActions, NO_ACTIONS, legal_actions
+from .events import (EventBus, GameView, PlayerView, TurnStarted, ActionTaken, StreetEnded, AllInRunout,
+                     HandEnded)
+
+
+SNAPSHOT_MAGIC = b'PKGS'
+SNAPSHOT_VERSION = 2
+# the actions of `RoundAction`, by their code in a snapshot
+ACTION_NAMES = ("", "call", "fold", "check", "raise", "all-in")
 
 
 class GameStatus(IntEnum):
@@ -37,9 +47,12 @@ def status(ss):
         @wraps(func)
         def wrapper(self, *args, **kwargs):
             with self.lock:
-                if self.game_status in ss:
-                    return func(self, *args, **kwargs)
-                return -1
+                if self.game_status not in ss:
+                    return -1
+                ret = func(self, *args, **kwargs)
+                if ret == 0:
+                    self.update_state()
+                return ret
         return wrapper
     return dec
 
@@ -48,16 +61,12 @@ class Result:
     def __init__(self):
         self.type: ResultType = ResultType.ALL_FOLD
         self.chip_changes: Dict[Player, int] = dict()
+        # the main pot and the side pots, whose seats are positions in `Game.players`
+        self.pots: List[Pot] = []
 
     def add_result(self, player: Player, chip: int):
         self.chip_changes[player] = chip
 
-    def win_bet(self, player: Player, chip: int):
-        self.chip_changes[player] += chip
-
-    def lose_bet(self, player: Player, chip: int):
-        self.chip_changes[player] -= chip
-
     def execute(self):
         for player, chip in self.chip_changes.items():
             player.chip += chip
@@ -75,6 +84,9 @@ class Action:
     def set_disabled(self):
         self.active = False
 
+    def copy(self) -> 'Action':
+        return Action(self.action, self.chip, self.active)
+
 
 class RoundAction:
     def __init__(self, round_status: RoundStatus, players: List[Player]):
@@ -87,13 +99,57 @@ class RoundAction:
         self.actions[player.userid] = Action(action, chip)
 
 
-def default_notifier(round_status: RoundStatus, stall: bool):
-    pass
+def _write_rounds(w: Writer, players: List[Player], round_actions: List[RoundAction]):
+    w.pack('B', len(round_actions))
+    for round_action in round_actions:
+        for player in players:
+            action = round_action.actions[player.userid]
+            w.pack('Bq?', ACTION_NAMES.index(action.action), action.chip, action.active)
+
+
+def _read_rounds(r: Reader, players: List[Player]) -> List[RoundAction]:
+    round_actions = []
+    for i in range(r.one('B')):
+        round_action = RoundAction(RoundStatus(i), [])
+        for player in players:
+            code, chip, active = r.unpack('Bq?')
+            round_action.actions[player.userid] = Action(ACTION_NAMES[code], chip, active)
+        round_actions.append(round_action)
+    return round_actions
+
+
+def _write_result(w: Writer, players: List[Player], result: Result):
+    w.pack('B', result.type.value)
+    for player in players:
+        chip = result.chip_changes.get(player)
+        w.pack('?q', chip is not None, chip or 0)
+    w.pack('B', len(result.pots))
+    for pot in result.pots:
+        w.pack('q', pot.amount)
+        w.bytes(bytes(pot.eligible))
+        w.bytes(bytes(pot.winners))
+        w.pack(f'{len(pot.shares)}q', *pot.shares)
+
+
+def _read_result(r: Reader, players: List[Player]) -> Result:
+    result = Result()
+    result.type = ResultType(r.one('B'))
+    for player in players:
+        present, chip = r.unpack('?q')
+        if present:
+            result.add_result(player, chip)
+    for _ in range(r.one('B')):
+        pot = Pot(r.one('q'), list(r.bytes()))
+        pot.winners = list(r.bytes())
+        pot.shares = list(r.unpack(f'{len(pot.winners)}q'))
+        result.pots.append(pot)
+    return result
 
 
 class Game:
-    def __init__(self, notifier: Callable[[RoundStatus, bool], Any] = default_notifier):
-        self.notifier = notifier
+    def __init__(self, events: EventBus = None, shuffle_pool: ShufflePool = None):
+        self.events = events
+        self.shuffle_pool = shuffle_pool if shuffle_pool is not None else default_pool
         self.players: List[Player] = []
         self.game_status: GameStatus = GameStatus.WAITING
         self.round_status: RoundStatus = None
@@ -107,28 +163,39 @@ class Game:
         self.next_round = 0
         self.total_pot = 0
         self.pub_cards = []
+        self.board = Board()
         self.highest_bet = 0
         self.mini_raise = 0
         self.last_round_bet = 0
         self.last_aggressive = 0
         self.result = Result()
         self.lock = threading.RLock()
+        # the legal actions of `exe_pos`, until the next action
+        self.legal: LegalActions = None
         self.round_actions: List[RoundAction] = []
+        # every action of the hand in order, as (pos, action, chip_bet after the action)
+        self.action_log: List[Tuple[int, str, int]] = []
         self.id = uuid.uuid4()
         self.logger = logging.getLogger(__name__)
+        # the latest state after a transition, replaced as a whole so that readers need no lock
+        self.version = 0
+        self.state: GameView = self.view()
 
     def init_game(self, players: List[Player], ante: int, btn: int):
         self.players = players
         for player in self.players:
             player.init()
         self.round_actions = [RoundAction(i, self.players) for i in RoundStatus]
+        self.action_log = []
+        self.legal = None
         self.round_status = RoundStatus.PREFLOP
         self.nplayers = len(self.players)
-        self.deck = Deck()
+        self.deck = Deck(self.shuffle_pool)
         self.btn = btn
         self.ante = ante
         self.exe_pos = -1
         self.pub_cards = []
+        self.board = Board()
         self.highest_bet = 0
         self.mini_raise = 0
         self.last_round_bet = 0
@@ -153,9 +220,12 @@ class Game:
         return self.game_status == GameStatus.RUNNING
 
     def force_end(self):
-        self.notifier = default_notifier
-        self.game_status = GameStatus.WAITING
-        self.round_status = RoundStatus.END
+        with self.lock:
+            self.events = None
+            self.legal = None
+            self.game_status = GameStatus.WAITING
+            self.round_status = RoundStatus.END
+            self.update_state()
 
     @status([GameStatus.WAITING])
     def start(self, players: List[Player], ante: int, btn: int):
@@ -178,7 +248,10 @@ class Game:
         # a flag for end of one round
         self.exe_pos = self.bb
         self.next_round = self.exe_pos
+        # the first turn is published once the blinds are in
+        events, self.events = self.events, None
         self.invoke_next_player()
+        self.events = events
         self.next_round = self.exe_pos
         self.last_aggressive = self.exe_pos
 
@@ -186,6 +259,7 @@ class Game:
         self.put_chip(self.bb, self.ante)
         self.highest_bet = self.ante
         self.mini_raise = self.ante * 2
+        self.publish(TurnStarted)
 
         return 0
 
@@ -200,7 +274,7 @@ class Game:
     def invoke_next_player(self):
         self.logger.debug("%s: invoke next player", self.id)
         if self.get_active_player_num() == 1:
-            self.notifier(self.round_status, True)
+            self.publish(StreetEnded)
             self.logger.debug("%s: invoke next player, player_num == 1, go to end", self.id)
             self.end()
             return
@@ -209,19 +283,14 @@ class Game:
         self.logger.debug("%s: invoke next player, next pos %d", self.id, r)
         if r == -1:
             # all-in case
-            self.pub_cards += [self.deck.get_card()
-                               for _ in range(len(self.pub_cards), 5)]
-            self.notifier(self.round_status, True)
-            self.end()
+            self.run_out()
             return
 
         self.logger.debug("%s: invoke next player, next round %d", self.id, self.next_round)
 
         if r == self.next_round:
-            # enter next phase
-            self.notifier(self.round_status, True)
-            # FIXME: This is not elegant, but I cannot find another way to do it!
-            time.sleep(1)
+            # enter next phase, the next street starts right away, pacing the display is up to subscribers
+            self.publish(StreetEnded)
 
             self.round_status = RoundStatus(self.round_status.value + 1)
             self.last_round_bet = self.highest_bet
@@ -242,72 +311,100 @@ class Game:
             self.mini_raise = self.ante
         else:
             self.exe_pos = r
-            self.notifier(self.round_status, False)
+            self.publish(TurnStarted)
 
         # fold or allin at beginning
         if not self.players[self.next_round].is_playing():
             self.next_round = self.find_next_active_player(self.next_round)
 
+    def run_out(self):
+        """Deal the rest of the board and end the hand, nobody can act any more
+
+        `AllInRunout` is published before the rest of the board comes out, so that subscribers
+        can show the equities of the runout, which are too slow to work out here.
+        """
+        if len(self.pub_cards) < 5:
+            self.publish(AllInRunout)
+        for _ in range(len(self.pub_cards), 5):
+            self.deal_pub_card()
+        self.end()
+
+    def add_action(self, pos: int, action: str, chip: int):
+        self.legal = None
+        self.round_actions[self.round_status.value].add_action(self.players[pos], action, chip)
+        self.action_log.append((pos, action, self.players[pos].chip_bet))
+        self.publish(ActionTaken, pos, action, chip)
+
+    def publish(self, event_type, *args):
+        """Publish `event_type(self.view(), *args)` if anyone listens"""
+        if self.events is not None:
+            self.events.publish(event_type(self.view(), *args))
+
+    def view(self) -> GameView:
+        """Take an immutable copy of the state"""
+        actions = self.round_actions[self.round_status.value].actions if self.round_actions else {}
+        players = []
+        for player in self.players:
+            action = actions.get(player.userid)
+            active = action is not None and action.active
+            players.append(PlayerView(
+                player.userid, player.username, player.get_remaining_chip(), player.chip_bet, player.is_normal(),
+                player.is_fold(), action.action if active else "", action.chip if active else 0,
+                player.chip, tuple(player.cards), player.mode, player.status, player.rank, player.hand))
+        return GameView(self.round_status, tuple(self.pub_cards), self.total_pot, self.ante, self.btn, self.sb,
+                        self.exe_pos, tuple(players), self.game_status, self.bb, self.next_round, self.highest_bet,
+                        self.version)
+
+    def update_state(self):
+        """Replace `state` after a transition, called with the lock held"""
+        self.version += 1
+        self.state = self.view()
+
+    def deal_pub_card(self):
+        card = self.deck.get_card()
+        self.pub_cards.append(card)
+        self.board.add(card)
+
     def flop(self):
-        self.pub_cards = [self.deck.get_card() for _ in range(3)]
+        for _ in range(3):
+            self.deal_pub_card()
 
     def turn(self):
-        self.pub_cards.append(self.deck.get_card())
+        self.deal_pub_card()
 
     def river(self):
-        self.pub_cards.append(self.deck.get_card())
-
-    def win_pot(self, winners: List[Player], exclude_players: List[Player]):
-        """Calculate how many chips the `winner` wins and set result for all players
-
-        Args:
-            winners (List[Player]): the winners, if more than one player, they split the pot.
-                Note that the winners are sorted in **descending** order of their bet, which
-                is crucial because we always want to deal with the main pot first
-            exclude_players (List[Player]): players in this list will not lose chips
-                to `winner`, because they have a bigger hand
-        """
-        n_winners = len(winners)
-        for player in self.players:
-            if player in winners or player in exclude_players:
-                continue
-            for winner in winners:
-                could_win = min(player.chip_bet, winner.chip_bet)
-                self.result.win_bet(winner, could_win // n_winners)
-                self.result.lose_bet(player, could_win // n_winners)
-                player.chip_bet -= could_win
+        self.deal_pub_card()
 
     def end(self):
-        # Initialize self.result
-        for player in self.players:
-            self.result.add_result(player, 0)
         self.result.type = ResultType.ALL_FOLD
 
-        active_players: List[Player] = list(
-            filter(lambda p: p.is_normal() and not p.is_fold(), self.players))
-        if len(active_players) == 0:
+        live = [p.is_normal() and not p.is_fold() for p in self.players]
+        if not any(live):
             raise RuntimeError("No active player?")
 
         # Only when there are more than two active players, comparision is needed
-        if len(active_players) >= 2:
+        strengths = [0] * self.nplayers
+        if sum(live) >= 2:
             self.result.type = ResultType.ALL_IN
-            for p in active_players:
-                hand, rank = poker7([str(i) for i in p.cards + self.pub_cards])
-                p.set_rank_and_hand(rank, hand)
+            for pos, p in enumerate(self.players):
+                if not live[pos]:
+                    continue
+                rank = self.board.strength(p.cards)
+                p.set_rank_and_hand(rank, best_hand(p.cards + self.pub_cards, rank, INDEX_OF, RANK_OF))
+                strengths[pos] = rank
                 if not p.is_allin():
                     self.result.type = ResultType.COMPARE
-            active_players.sort(key=lambda p: p.chip_bet, reverse=False)
-            active_players.sort(key=lambda p: p.rank, reverse=True)
 
-        grouped_active_players = [list(g) for _, g in groupby(active_players, lambda x: x.rank)]
-
-        exclude_players = []
-        for winner_players in grouped_active_players:
-            self.win_pot(winner_players, exclude_players)
-            exclude_players.extend(winner_players)
+        # odd chips of a split pot go to the first winners after the button
+        self.result.pots = build_pots([p.chip_bet for p in self.players], live)
+        payouts = settle_pots(self.result.pots, strengths, (self.btn + 1) % self.nplayers)
+        for p, payout in zip(self.players, payouts):
+            self.result.add_result(p, payout - p.chip_bet)
 
         self.round_status = RoundStatus.END
         self.game_status = GameStatus.WAITING
+        if self.events is not None:
+            self.publish(HandEnded, self.result, self.snapshot())
 
     def get_active_player_num(self):
         count = 0
@@ -330,12 +427,22 @@ class Game:
     def is_check_permitted(self, pos):
         return self.players[pos].chip_bet >= self.highest_bet
 
+    def legal_actions(self, pos) -> LegalActions:
+        """What the player at `pos` may do now, nothing unless the player is to act"""
+        with self.lock:
+            if self.game_status != GameStatus.RUNNING or pos != self.exe_pos:
+                return NO_ACTIONS
+            if self.legal is None:
+                player = self.players[pos]
+                self.legal = legal_actions(player.get_remaining_chip(), player.chip_bet, self.highest_bet,
+                                           self.mini_raise, self.last_round_bet)
+            return self.legal
+
     @status([GameStatus.RUNNING])
     def pcall(self, pos):
         if pos != self.exe_pos or self.put_chip(pos, self.highest_bet - self.players[pos].chip_bet) < 0:
             return -1
-        self.round_actions[self.round_status.value].add_action(
-            self.players[pos], "call", self.players[pos].chip_bet - self.last_round_bet)
+        self.add_action(pos, "call", self.players[pos].chip_bet - self.last_round_bet)
         self.invoke_next_player()
         return 0
 
@@ -344,7 +451,7 @@ class Game:
         if pos != self.exe_pos:
             return -1
         self.players[pos].set_fold()
-        self.round_actions[self.round_status.value].add_action(self.players[pos], "fold", 0)
+        self.add_action(pos, "fold", 0)
         self.invoke_next_player()
         return 0
 
@@ -352,7 +459,7 @@ class Game:
     def pcheck(self, pos):
         if pos != self.exe_pos or not self.is_check_permitted(pos):
             return -1
-        self.round_actions[self.round_status.value].add_action(self.players[pos], "check", 0)
+        self.add_action(pos, "check", 0)
         self.invoke_next_player()
         return 0
 
@@ -366,7 +473,7 @@ class Game:
         if self.put_chip(pos, num):
             return -1
         self.next_round = self.exe_pos
-        self.round_actions[self.round_status.value].add_action(self.players[pos], "raise", cur_round_bet)
+        self.add_action(pos, "raise", cur_round_bet)
         diff_raise = self.players[pos].chip_bet - self.highest_bet
         self.highest_bet = self.players[pos].chip_bet
         self.mini_raise += diff_raise
@@ -387,16 +494,98 @@ class Game:
             self.next_round = self.exe_pos
             self.last_aggressive = pos
         self.put_chip(pos, self.players[pos].get_remaining_chip())
-        self.round_actions[self.round_status.value].add_action(
-            self.players[pos], "all-in", self.players[pos].chip_bet - self.last_round_bet)
+        self.add_action(pos, "all-in", self.players[pos].chip_bet - self.last_round_bet)
         self.invoke_next_player()
         return 0
 
+    def snapshot(self) -> bytes:
+        """Encode the state of the hand, which `restore` brings back, as compact bytes
 
-class Deck(object):
-    def __init__(self):
-        self.deck_cards = random.sample(range(52), 52)
-
-    def get_card(self):
-        num = self.deck_cards.pop()
-        return Card(num // 13, num % 13 + 1)
+        Events, the shuffle pool and the lock are not part of a game's state, and are
+        kept by the game that restores it.
+        """
+        with self.lock:
+            w = Writer()
+            w.buf += SNAPSHOT_MAGIC
+            w.pack('BBBB', SNAPSHOT_VERSION, self.game_status.value,
+                   255 if self.round_status is None else self.round_status.value, self.nplayers)
+            w.pack('bbbbbbqqqqq', self.btn, self.sb, self.bb, self.exe_pos, self.next_round, self.last_aggressive,
+                   self.ante, self.total_pot, self.highest_bet, self.mini_raise, self.last_round_bet)
+            w.buf += self.id.bytes
+            w.pack('?', self.deck is not None)
+            if self.deck is not None:
+                w.bytes(self.deck.order)
+                w.pack('B', self.deck.pos)
+            w.cards(self.pub_cards)
+            write_players(w, self.players)
+            _write_rounds(w, self.players, self.round_actions)
+            w.pack('H', len(self.action_log))
+            for pos, action, chip_bet in self.action_log:
+                w.pack('BBq', pos, ACTION_NAMES.index(action), chip_bet)
+            _write_result(w, self.players, self.result)
+            return w.getvalue()
+
+    def restore(self, data: bytes) -> 'Game':
+        """Load a `snapshot` into this game, replacing its players"""
+        r = Reader(data)
+        if r.data[:4] != SNAPSHOT_MAGIC:
+            raise ValueError("not a game snapshot")
+        r.offset = 4
+        version, game_status, round_status, nplayers = r.unpack('BBBB')
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"unsupported snapshot version {version}")
+        with self.lock:
+            self.game_status = GameStatus(game_status)
+            self.round_status = None if round_status == 255 else RoundStatus(round_status)
+            self.nplayers = nplayers
+            (self.btn, self.sb, self.bb, self.exe_pos, self.next_round, self.last_aggressive, self.ante,
+             self.total_pot, self.highest_bet, self.mini_raise, self.last_round_bet) = r.unpack('bbbbbbqqqqq')
+            self.id = uuid.UUID(bytes=bytes(r.data[r.offset:r.offset + 16]))
+            r.offset += 16
+            self.deck = None
+            if r.one('?'):
+                self.deck = Deck(order=r.bytes())
+                for _ in range(r.one('B')):
+                    self.deck.get_card()
+            self.pub_cards = r.cards()
+            self.board = Board(self.pub_cards)
+            self.players = read_players(r, nplayers)
+            self.round_actions = _read_rounds(r, self.players)
+            self.action_log = []
+            for _ in range(r.one('H')):
+                pos, code, chip_bet = r.unpack('BBq')
+                self.action_log.append((pos, ACTION_NAMES[code], chip_bet))
+            self.result = _read_result(r, self.players)
+            self.legal = None
+            self.update_state()
+        return self
+
+    def clone(self) -> 'Game':
+        """An independent copy of the hand, much cheaper than `copy.deepcopy`
+
+        The clone shares the shuffle pool, and publishes no events.
+        """
+        with self.lock:
+            game = Game.__new__(Game)
+            game.__dict__.update(self.__dict__)
+            game.events = None
+            game.lock = threading.RLock()
+            game.players = [p.clone() for p in self.players]
+            to_clone = dict(zip(self.players, game.players))
+            game.pub_cards = list(self.pub_cards)
+            game.board = Board()
+            game.board.total, game.board.n_cards = self.board.total, self.board.n_cards
+            if self.deck is not None:
+                game.deck = Deck(order=self.deck.order)
+                game.deck.pos, game.deck.dealt = self.deck.pos, self.deck.dealt
+            game.round_actions = []
+            for round_action in self.round_actions:
+                copied = RoundAction(round_action.round_status, [])
+                copied.actions = {userid: a.copy() for userid, a in round_action.actions.items()}
+                game.round_actions.append(copied)
+            game.action_log = list(self.action_log)
+            game.result = Result()
+            game.result.type = self.result.type
+            game.result.chip_changes = {to_clone[p]: chip for p, chip in self.result.chip_changes.items()}
+            game.result.pots = [pot.copy() for pot in self.result.pots]
+            return game
@@ -0,0 +1,244 @@
+"""The betting rules of `Game` without lock, events or logging
+
+`HeadlessGame` plays one hand at a time on plain lists indexed by seat, deals from the
+same card orders as `Deck` and settles with the same pots, so a hand played here ends
+with the same chip changes as in `Game`. It is meant for simulating many hands, e.g.
+for bots and regression tests; the table keeps using `Game`.
+"""
+from typing import Callable, List, Sequence
+
+from .deck import ShufflePool, default_pool
+from .legal import LegalActions, NO_ACTIONS, legal_actions
+from .poker_eval import CARD_VALUES, evaluate_sum
+from .pot import Pot, build_pots, settle_pots
+
+# the values of `PlayerStatus` and `RoundStatus`, as plain ints
+PLAYING, FOLD, ALLIN = 0, 1, 2
+PREFLOP, FLOP, TURN, RIVER, END = 0, 1, 2, 3, 4
+
+
+class HeadlessGame:
+    def __init__(self, shuffle_pool: ShufflePool = None):
+        self.shuffle_pool = shuffle_pool if shuffle_pool is not None else default_pool
+        self.running = False
+        self.nplayers = 0
+        self.chips: List[int] = []
+        self.bets: List[int] = []
+        self.status: List[int] = []
+        self.n_live = 0
+        self.order = b''
+        self.hole: List[tuple] = []
+        self.board: List[int] = []
+        self.board_sum = 0
+        self.round_status = PREFLOP
+        self.btn = 0
+        self.sb = 0
+        self.bb = 0
+        self.ante = 0
+        self.exe_pos = 0
+        self.next_round = 0
+        self.total_pot = 0
+        self.highest_bet = 0
+        self.mini_raise = 0
+        self.last_round_bet = 0
+        self.last_aggressive = 0
+        self.strengths: List[int] = []
+        self.pots: List[Pot] = []
+        self.chip_changes: List[int] = []
+
+    def start(self, chips: Sequence[int], ante: int, btn: int, order: bytes = None):
+        """Start a hand
+
+        Args:
+            chips (Sequence[int]): the chips of each seat
+            ante (int): the big blind
+            btn (int): the button
+            order (bytes) optional: the card order, a new shuffle of the pool by default
+        """
+        n = self.nplayers = len(chips)
+        self.chips = list(chips)
+        self.bets = [0] * n
+        self.status = [PLAYING] * n
+        self.n_live = n
+        self.order = order = order if order is not None else self.shuffle_pool.next_order()
+        self.hole = [(order[2 * i], order[2 * i + 1]) for i in range(n)]
+        self.board = []
+        self.board_sum = 0
+        self.round_status = PREFLOP
+        self.btn = btn
+        self.ante = ante
+        self.total_pot = 0
+        self.highest_bet = 0
+        self.mini_raise = 0
+        self.last_round_bet = 0
+        self.strengths = [0] * n
+        self.pots = []
+        self.chip_changes = [0] * n
+        self.running = True
+
+        self.sb = btn if n == 2 else self.find_next_active_player(btn)
+        self.bb = self.find_next_active_player(self.sb)
+        self.exe_pos = self.bb
+        self.next_round = self.bb
+        self.invoke_next_player()
+        self.next_round = self.exe_pos
+        self.last_aggressive = self.exe_pos
+
+        self.put_chip(self.sb, ante // 2)
+        self.put_chip(self.bb, ante)
+        self.highest_bet = ante
+        self.mini_raise = ante * 2
+        return 0
+
+    def find_next_active_player(self, pos):
+        status = self.status
+        n = self.nplayers
+        new_pos = (pos + 1) % n
+        while new_pos != pos:
+            if status[new_pos] == PLAYING:
+                return new_pos
+            new_pos = (new_pos + 1) % n
+        return -1
+
+    def invoke_next_player(self):
+        if self.n_live == 1:
+            self.end()
+            return
+
+        r = self.find_next_active_player(self.exe_pos)
+        if r == -1:
+            while len(self.board) < 5:
+                self.deal_pub_card()
+            self.end()
+            return
+
+        if r == self.next_round:
+            self.round_status += 1
+            self.last_round_bet = self.highest_bet
+            if self.round_status == FLOP:
+                self.deal_pub_card()
+                self.deal_pub_card()
+                self.deal_pub_card()
+            elif self.round_status == END:
+                self.end()
+                return
+            else:
+                self.deal_pub_card()
+            self.exe_pos = self.btn
+            self.next_round = self.btn
+            self.invoke_next_player()
+            self.last_aggressive = self.exe_pos
+            self.next_round = self.exe_pos
+            self.mini_raise = self.ante
+        else:
+            self.exe_pos = r
+
+        if self.status[self.next_round] != PLAYING:
+            self.next_round = self.find_next_active_player(self.next_round)
+
+    def deal_pub_card(self):
+        card = self.order[2 * self.nplayers + len(self.board)]
+        self.board.append(card)
+        self.board_sum += CARD_VALUES[card]
+
+    def end(self):
+        n = self.nplayers
+        live = [s != FOLD for s in self.status]
+        if self.n_live >= 2:
+            for pos in range(n):
+                if live[pos]:
+                    a, b = self.hole[pos]
+                    self.strengths[pos] = evaluate_sum(self.board_sum + CARD_VALUES[a] + CARD_VALUES[b])
+        self.pots = build_pots(self.bets, live)
+        payouts = settle_pots(self.pots, self.strengths, (self.btn + 1) % n)
+        self.chip_changes = [payout - bet for payout, bet in zip(payouts, self.bets)]
+        self.round_status = END
+        self.running = False
+
+    def put_chip(self, pos, num):
+        remaining_chip = self.chips[pos] - self.bets[pos]
+        if remaining_chip < num:
+            return -1
+        if remaining_chip == num:
+            self.status[pos] = ALLIN
+        self.bets[pos] += num
+        self.total_pot += num
+        return 0
+
+    def is_check_permitted(self, pos):
+        return self.bets[pos] >= self.highest_bet
+
+    def legal_actions(self, pos) -> LegalActions:
+        if not self.running or pos != self.exe_pos:
+            return NO_ACTIONS
+        return legal_actions(self.chips[pos] - self.bets[pos], self.bets[pos], self.highest_bet, self.mini_raise,
+                             self.last_round_bet)
+
+    def pcall(self, pos):
+        if not self.running or pos != self.exe_pos or self.put_chip(pos, self.highest_bet - self.bets[pos]) < 0:
+            return -1
+        self.invoke_next_player()
+        return 0
+
+    def pfold(self, pos):
+        if not self.running or pos != self.exe_pos:
+            return -1
+        self.status[pos] = FOLD
+        self.n_live -= 1
+        self.invoke_next_player()
+        return 0
+
+    def pcheck(self, pos):
+        if not self.running or pos != self.exe_pos or self.bets[pos] < self.highest_bet:
+            return -1
+        self.invoke_next_player()
+        return 0
+
+    def praise(self, pos, num):
+        if not self.running or pos != self.exe_pos:
+            return -1
+        if self.bets[pos] - self.last_round_bet + num < self.mini_raise:
+            return -1
+        if self.put_chip(pos, num):
+            return -1
+        self.next_round = pos
+        diff_raise = self.bets[pos] - self.highest_bet
+        self.highest_bet = self.bets[pos]
+        self.mini_raise += diff_raise
+        self.last_aggressive = pos
+        self.invoke_next_player()
+        return 0
+
+    def pallin(self, pos):
+        if not self.running or pos != self.exe_pos:
+            return -1
+        chip = self.chips[pos]
+        if chip > self.highest_bet:
+            self.mini_raise += chip - self.highest_bet
+            self.highest_bet = chip
+            self.next_round = pos
+            self.last_aggressive = pos
+        self.put_chip(pos, chip - self.bets[pos])
+        self.invoke_next_player()
+        return 0
+
+
+def play_hand(game: HeadlessGame, policy: Callable[[HeadlessGame, int], int], chips: Sequence[int], ante: int,
+              btn: int, order: bytes = None) -> List[int]:
+    """Play a whole hand, asking `policy(game, pos)` to act for the player at `pos`
+
+    The policy returns what the action returned. After an invalid action the player
+    checks or folds, like a player who times out at the table.
+
+    Returns:
+        chip_changes (List[int]): the chips won or lost by each seat
+    """
+    game.start(chips, ante, btn, order)
+    while game.running:
+        pos = game.exe_pos
+        if policy(game, pos) != 0:
+            if game.is_check_permitted(pos):
+                game.pcheck(pos)
+            else:
+                game.pfold(pos)
+    return game.chip_changes
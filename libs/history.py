@@ -0,0 +1,145 @@
+"""An append-only log of finished hands, for audits and analytics
+
+Each hand is a `Game.snapshot` taken when the hand ended. The log is a directory of
+segment files, `00000001.hands`, `00000002.hands`, ..., where each record is
+
+    length (u32) | crc32 (u32) | snapshot
+
+`HandLog.append` only buffers the record; a thread of the log writes the buffered
+records and fsyncs them in batches, every `sync_interval` seconds or once `batch_size`
+records are waiting. The directory and the thread are only set up by the first append.
+A new segment is started when one reaches `segment_size` bytes, and every time the log
+is opened, so nothing is ever written after a torn record.
+"""
+import logging
+import os
+import struct
+import threading
+import zlib
+from typing import Iterator, List
+
+from .game import Game
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct('<II')
+SUFFIX = '.hands'
+SEGMENT_SIZE = 64 * 1024 * 1024
+SYNC_INTERVAL = 1.0
+BATCH_SIZE = 256
+
+
+def segments(directory: str) -> List[str]:
+    """The paths of the segments in `directory`, oldest first"""
+    names = sorted(name for name in os.listdir(directory) if name.endswith(SUFFIX))
+    return [os.path.join(directory, name) for name in names]
+
+
+class HandLog:
+    def __init__(self, directory: str, segment_size: int = SEGMENT_SIZE, sync_interval: float = SYNC_INTERVAL,
+                 batch_size: int = BATCH_SIZE):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.sync_interval = sync_interval
+        self.batch_size = batch_size
+        self.segment_no = 0
+        self.file = None
+        self.write_lock = threading.Lock()  # taken before `cond`, keeps the records in order
+        self.cond = threading.Condition()  # for `pending`, so that `append` never waits for the disk
+        self.pending: List[bytes] = []
+        self.closed = False
+        self.thread: threading.Thread = None
+
+    def _open(self):
+        """Set up the directory and start the writer, called with `cond` held"""
+        os.makedirs(self.directory, exist_ok=True)
+        existing = segments(self.directory)
+        self.segment_no = int(os.path.basename(existing[-1])[:-len(SUFFIX)]) if existing else 0
+        self.thread = threading.Thread(target=self._run, name='hand-log', daemon=True)
+        self.thread.start()
+
+    def append(self, snapshot: bytes):
+        """Buffer the snapshot of a finished hand, it is on disk after the next sync"""
+        with self.cond:
+            if self.closed:
+                raise ValueError("hand log is closed")
+            if self.thread is None:
+                self._open()
+            self.pending.append(snapshot)
+            if len(self.pending) >= self.batch_size:
+                self.cond.notify()
+
+    def flush(self):
+        """Write and fsync everything appended so far"""
+        with self.write_lock:
+            with self.cond:
+                records, self.pending = self.pending, []
+            self._write(records)
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+        if self.thread is not None:
+            self.thread.join()
+
+    def _run(self):
+        while True:
+            with self.cond:
+                if not self.closed and len(self.pending) < self.batch_size:
+                    self.cond.wait(self.sync_interval)
+                closed = self.closed
+            try:
+                self.flush()
+            except OSError:
+                logger.exception("failed to write the hand log at %s", self.directory)
+            if closed:
+                with self.write_lock:
+                    if self.file is not None:
+                        self.file.close()
+                        self.file = None
+                return
+
+    def _write(self, records: List[bytes]):
+        if not records:
+            return
+        for record in records:
+            if self.file is None or self.file.tell() >= self.segment_size:
+                self._next_segment()
+            self.file.write(HEADER.pack(len(record), zlib.crc32(record)))
+            self.file.write(record)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def _next_segment(self):
+        if self.file is not None:
+            self.file.close()
+        self.segment_no += 1
+        path = os.path.join(self.directory, f'{self.segment_no:08d}{SUFFIX}')
+        self.file = open(path, 'ab')
+
+
+def read_records(directory: str) -> Iterator[bytes]:
+    """Stream the snapshots in the log, oldest first
+
+    A segment is read record by record, and a torn or corrupt record at its end, left
+    by a crash while writing, ends that segment.
+    """
+    for path in segments(directory):
+        with open(path, 'rb') as f:
+            while True:
+                header = f.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    break
+                length, crc = HEADER.unpack(header)
+                record = f.read(length)
+                if len(record) < length or zlib.crc32(record) != crc:
+                    logger.warning("%s: torn record at %d", path, f.tell() - len(record) - HEADER.size)
+                    break
+                yield record
+
+
+def read_hands(directory: str) -> Iterator[Game]:
+    """Stream the finished hands in the log as games, oldest first"""
+    for record in read_records(directory):
+        yield Game().restore(record)
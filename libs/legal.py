@@ -0,0 +1,46 @@
+"""What the player to act may do, with the exact amounts that `Game` accepts"""
+from typing import NamedTuple, Optional
+
+
+class LegalActions(NamedTuple):
+    """The legal actions at a decision point, all amounts are chips put in by the action
+
+    Attributes:
+        check (bool): whether `pcheck` is accepted
+        call (Optional[int]): the chips `pcall` puts in, None if it is rejected
+        min_raise (Optional[int]): the smallest `num` of `praise`, None if no raise is accepted
+        max_raise (Optional[int]): the largest `num` of `praise`, which puts the player all in
+        allin (Optional[int]): the chips `pallin` puts in, None if it is rejected
+        fold (bool): whether `pfold` is accepted
+    """
+    check: bool
+    call: Optional[int]
+    min_raise: Optional[int]
+    max_raise: Optional[int]
+    allin: Optional[int]
+    fold: bool
+
+    def can_raise(self, num: int) -> bool:
+        return self.min_raise is not None and self.min_raise <= num <= self.max_raise
+
+
+# for anyone who is not to act
+NO_ACTIONS = LegalActions(False, None, None, None, None, False)
+
+
+def legal_actions(remaining: int, bet: int, highest_bet: int, mini_raise: int, last_round_bet: int) -> LegalActions:
+    """The legal actions of the player to act
+
+    Args:
+        remaining (int): the chips the player has not bet yet
+        bet (int): the chips the player has bet in this hand
+        highest_bet (int): the highest bet of this hand
+        mini_raise (int): the smallest bet of a raise in this round
+        last_round_bet (int): the highest bet when this round started
+    """
+    to_call = highest_bet - bet
+    min_raise = max(mini_raise + last_round_bet - bet, 0)
+    if min_raise > remaining:
+        min_raise = None
+    return LegalActions(to_call <= 0, max(to_call, 0) if to_call <= remaining else None, min_raise,
+                        remaining if min_raise is not None else None, remaining, True)
@@ -1,11 +1,17 @@
 from __future__ import annotations
+import os
 from enum import Enum
 from typing import Dict
 from .table import Table
 from .storage import Storage
+from .runout import RunoutCache
+from .history import HandLog
+from .pool import FastFoldPool
 import logging
 
 MAX_PLAYER = 9
+RUNOUT_CACHE_PATH = os.environ.get("POKER_RUNOUT_CACHE", "RunoutCache.dat")
+HAND_LOG_PATH = os.environ.get("POKER_HAND_LOG", "hands")
 
 
 class Status(Enum):
@@ -16,21 +22,45 @@ class Status(Enum):
 
 
 class GameManager:
-    def __init__(self):
+    def __init__(self, runout_cache_path: str = RUNOUT_CACHE_PATH, hand_log_path: str = HAND_LOG_PATH):
         print("gamemanager")
         self.logger = logging.getLogger(__name__)
         self.tables: Dict[str, Table] = dict()
         self.storage = Storage('PokerGame.dat')
+        # neither is opened before it is used: the cache by the first all-in that is run out,
+        # the log by the first hand that ends
+        self.runout_cache = RunoutCache(runout_cache_path)
+        self.hand_log = HandLog(hand_log_path)
+        self.pool = FastFoldPool(self.storage)
 
     def init_status(self):
         pass
 
     # TODO: need to protect through lock
     def open(self, user_id: str):
-        table = Table(user_id, self.storage)
+        table = Table(user_id, self.storage, self.runout_cache, self.hand_log)
         self.tables[table.uid] = table
         return table.uid
 
+    def open_turbo(self, user_id: str, n_bots: int):
+        """Open a headless table of bots that deal hands back to back at engine speed,
+        e.g. for load tests or to record hands, return (table_id, err)
+
+        The table plays until fewer than two bots have chips, or until it is closed.
+        """
+        table = Table(user_id, self.storage, self.runout_cache, self.hand_log)
+        table.turbo = True
+        table.auto_continue = True
+        for _ in range(n_bots):
+            _, _, _, err = table.add_bot_player()
+            if err is not None:
+                return None, err
+        _, err = table.start(user_id)
+        if err is not None:
+            return None, err
+        self.tables[table.uid] = table
+        return table.uid, None
+
     def close(self, table_id):
         self.tables[table_id].force_close()
         self.tables.pop(table_id)
@@ -50,7 +80,27 @@ class GameManager:
         table = self.tables[table_id]
         return table.start(user_id)
 
+    def set_auto_continue(self, table_id, on: bool):
+        table = self.tables[table_id]
+        table.auto_continue = on
+
+    def set_think_delay(self, table_id, seconds: float):
+        table = self.tables[table_id]
+        table.think_delay = seconds
+
+    def pool_join(self, user_id, username):
+        """Join the fast-fold pool, return (chip, err)"""
+        return self.pool.join(user_id, username)
+
+    def pool_leave(self, user_id):
+        return self.pool.leave(user_id)
+
+    def pool_act(self, user_id, action: str, chip: int = 0) -> str:
+        """Act in the pool hand of the player, `action` is e.g. `call_or_check`, `raise` or `fold`"""
+        return self.pool.act(user_id, action, chip)
+
     def add_bot(self, table_id):
+        """Add a bot to a table, return (bot_id, pos, table_chip, err)"""
         table = self.tables[table_id]
         return table.add_bot_player()
 
@@ -0,0 +1,138 @@
+"""Outs on the flop and on the turn
+
+Every card is a precomputed value (see `poker_eval.CARD_VALUES`) whose bits carry its
+card mask, suit counters and rank key, so the hand made with an unseen card is one
+addition and one `evaluate_sum` lookup. The unseen cards are the complement of the
+mask of the known ones. A whole street costs at most 45 lookups per player.
+"""
+from typing import Dict, List, NamedTuple, Sequence
+
+from .card import Card, CARDS, to_index
+from .player import Player
+from .poker_eval import (CARD_VALUES, evaluate_sum, hand_category, HIGH_CARD, ONE_PAIR, TWO_PAIR,
+                         THREE_OF_A_KIND, FOUR_OF_A_KIND)
+
+CATEGORY_NAMES = ('high card', 'pair', 'two pair', 'trips', 'straight', 'flush',
+                  'full house', 'quads', 'straight flush')
+
+_ALL = (1 << 52) - 1
+
+
+class Out(NamedTuple):
+    card: Card
+    category: int  # the category of the hand made with `card`, e.g. `poker_eval.FLUSH`
+
+
+def _unseen(known: Sequence[int]) -> List[int]:
+    mask = _ALL
+    for i in known:
+        mask &= ~(1 << i)
+    unseen = []
+    while mask:
+        low = mask & -mask
+        unseen.append(low.bit_length() - 1)
+        mask ^= low
+    return unseen
+
+
+def _check_board(board: List[int]):
+    if len(board) not in (3, 4):
+        raise ValueError("outs are only defined on the flop and on the turn")
+
+
+def _board_category(cards: List[int]) -> int:
+    """The category of three to five public cards on their own"""
+    if len(cards) == 5:
+        return hand_category(evaluate_sum(sum(CARD_VALUES[i] for i in cards)))
+    # fewer cards make neither a straight nor a flush
+    ranks = [i % 13 for i in cards]
+    pairs = len(cards) - len(set(ranks))
+    if pairs == 0:
+        return HIGH_CARD
+    most = max(map(ranks.count, ranks))
+    if most == 4:
+        return FOUR_OF_A_KIND
+    if most == 3:
+        return THREE_OF_A_KIND
+    return TWO_PAIR if pairs == 2 else ONE_PAIR
+
+
+def outs(hands: Sequence[Sequence], board: Sequence) -> List[List[Out]]:
+    """Get the cards that would put each player alone in the lead on the next street
+
+    A player who is leading alone already has no outs.
+
+    Args:
+        hands (Sequence[Sequence]): two hole cards of each live player, as `Card`s, card
+            strings or card indexes
+        board (Sequence): the three or four public cards
+
+    Returns:
+        outs (List[List[Out]]): the outs of each player, ordered by card index
+    """
+    hands = [[to_index(c) for c in hand] for hand in hands]
+    board = [to_index(c) for c in board]
+    _check_board(board)
+    board_sum = sum(CARD_VALUES[i] for i in board)
+    sums = [board_sum + CARD_VALUES[a] + CARD_VALUES[b] for a, b in hands]
+    n = len(hands)
+
+    def leader(strengths):
+        best = max(strengths)
+        return strengths.index(best) if strengths.count(best) == 1 else -1
+
+    current = leader([evaluate_sum(s) for s in sums])
+    result: List[List[Out]] = [[] for _ in range(n)]
+    for card in _unseen([i for hand in hands for i in hand] + board):
+        value = CARD_VALUES[card]
+        strengths = [evaluate_sum(s + value) for s in sums]
+        i = leader(strengths)
+        if i >= 0 and i != current:
+            result[i].append(Out(CARDS[card], hand_category(strengths[i])))
+    return result
+
+
+def street_outs(game) -> Dict[Player, List[Out]]:
+    """Get the outs of each live player of a running `Game` to the next card, e.g. for bots
+
+    They are only worked out when asked for, there are none before the flop and on the river.
+    """
+    if len(game.pub_cards) not in (3, 4):
+        return dict()
+    players = [p for p in game.players if p.is_normal() and not p.is_fold()]
+    return dict(zip(players, outs([p.cards for p in players], game.pub_cards)))
+
+
+def draws(hole: Sequence, board: Sequence) -> List[Out]:
+    """Get the cards that improve the category of a hand, seen from its own player
+
+    Only the player's cards are known. A card counts only if it improves the hand by
+    more categories than it improves the board, so pairing the board is not an out.
+    """
+    hole = [to_index(c) for c in hole]
+    board = [to_index(c) for c in board]
+    _check_board(board)
+    hand_sum = sum(CARD_VALUES[i] for i in hole + board)
+    board_sum = sum(CARD_VALUES[i] for i in board)
+    current = hand_category(evaluate_sum(hand_sum)) - _board_category(board)
+    # four public cards only pair up, which depends on the rank of the new card alone
+    by_rank = [_board_category(board + [rank]) for rank in range(13)] if len(board) == 3 else None
+    result = []
+    for card in _unseen(hole + board):
+        value = CARD_VALUES[card]
+        category = hand_category(evaluate_sum(hand_sum + value))
+        if by_rank is None:
+            board_category = hand_category(evaluate_sum(board_sum + value))
+        else:
+            board_category = by_rank[card % 13]
+        if category - board_category > current:
+            result.append(Out(CARDS[card], category))
+    return result
+
+
+def describe_outs(outs: List[Out]) -> str:
+    """Describe outs, e.g. `9 to flush, 3 to trips`, strongest first"""
+    counts = {}
+    for out in outs:
+        counts[out.category] = counts.get(out.category, 0) + 1
+    return ', '.join(f"{counts[c]} to {CATEGORY_NAMES[c]}" for c in sorted(counts, reverse=True))
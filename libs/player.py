@@ -1,4 +1,7 @@
 from enum import Enum
+from typing import List
+
+from .snapshot import Writer, Reader
 
 
 class PlayerStatus(Enum):
@@ -68,3 +71,52 @@ class Player:
 
     def set_leaving(self) -> None:
         self.mode = PlayerMode.LEAVING
+
+    def snapshot(self) -> bytes:
+        w = Writer()
+        self.write(w)
+        return w.getvalue()
+
+    def restore(self, data: bytes) -> 'Player':
+        self.read(Reader(data))
+        return self
+
+    def write(self, w: Writer):
+        w.str(self.userid)
+        w.str(self.username)
+        w.pack('qBqBBH?', self.chip, self.mode.value, self.chip_bet, self.status.value, self.timeout_count,
+               self.rank or 0, self.hand is not None)
+        w.cards(self.cards)
+        w.cards(self.hand or ())
+
+    def read(self, r: Reader):
+        self.userid = r.str()
+        self.username = r.str()
+        self.chip, mode, self.chip_bet, status, self.timeout_count, rank, has_hand = r.unpack('qBqBBH?')
+        self.mode = PlayerMode(mode)
+        self.status = PlayerStatus(status)
+        self.rank = rank or None
+        self.cards = r.cards()
+        hand = r.cards()
+        self.hand = tuple(hand) if has_hand else None
+
+    def clone(self) -> 'Player':
+        """A copy that shares nothing mutable, much cheaper than `copy.deepcopy`"""
+        player = Player.__new__(Player)
+        player.__dict__.update(self.__dict__)
+        player.cards = list(self.cards)
+        return player
+
+
+def write_players(w: Writer, players: List[Player]):
+    for player in players:
+        player.write(w)
+
+
+def read_players(r: Reader, n: int) -> List[Player]:
+    players = []
+    for _ in range(n):
+        player = Player.__new__(Player)
+        player.read(r)
+        players.append(player)
+    return players
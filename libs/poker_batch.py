@@ -0,0 +1,63 @@
+"""Vectorized hand evaluation with NumPy
+
+Scores many hands in one call with the same tables as `poker_eval`, so a strength here
+equals `poker7(...)[1]` for the same cards. Cards are indexes in [0, 52), see
+`poker_eval.card_index`.
+"""
+import numpy as np
+
+from .poker_eval import CARD_VALUES, tables, _HASH_MUL, _BUCKET_SHIFT, _SUIT_SHIFT, _RANK_SHIFT
+
+# rows evaluated at a time, which bounds the size of the temporary arrays
+CHUNK = 1 << 18
+
+_RANK_PART = np.array([v >> _RANK_SHIFT for v in CARD_VALUES], dtype=np.uint64)
+_SUIT_PART = np.array([(v >> _SUIT_SHIFT) & 0xFFF for v in CARD_VALUES], dtype=np.int64)
+_MASK_PART = np.array([v & ((1 << _SUIT_SHIFT) - 1) for v in CARD_VALUES], dtype=np.int64)
+
+_tables = tables()
+_FLUSH_SUIT = np.asarray(_tables.flush_suit)
+_FLUSH = np.asarray(_tables.flush)
+_DISP = np.asarray(_tables.disp).astype(np.uint64)
+_SLOTS = np.asarray(_tables.slots)
+_CATEGORY = np.asarray(_tables.classes)[::6]
+
+
+def _evaluate_chunk(cards: np.ndarray) -> np.ndarray:
+    rank_sum = _RANK_PART[cards].sum(axis=1)
+    suit = _FLUSH_SUIT[_SUIT_PART[cards].sum(axis=1)]
+
+    h = (rank_sum * np.uint64(_HASH_MUL)) & np.uint64(0xFFFFFFFF)
+    slot = (h + _DISP[h >> np.uint64(_BUCKET_SHIFT)]) % np.uint64(len(_SLOTS))
+    strengths = _SLOTS[slot]
+
+    flush = np.nonzero(suit)[0]
+    if len(flush):
+        mask = _MASK_PART[cards[flush]].sum(axis=1)
+        shift = 13 * (suit[flush].astype(np.int64) - 1)
+        strengths[flush] = _FLUSH[(mask >> shift) & 0x1FFF]
+    return strengths
+
+
+def evaluate_batch(cards) -> np.ndarray:
+    """Evaluate N hands at once
+
+    Args:
+        cards (array_like): an (N, 7) integer array of card indexes, (N, 5) and (N, 6)
+            are accepted as well
+
+    Returns:
+        strengths (np.ndarray): an (N,) uint16 array, the strength of each hand
+    """
+    cards = np.asarray(cards, dtype=np.intp)
+    if cards.ndim != 2 or not 5 <= cards.shape[1] <= 7:
+        raise ValueError(f"expect an (N, 5..7) array of cards, got shape {cards.shape}")
+    strengths = np.empty(len(cards), dtype=np.uint16)
+    for start in range(0, len(cards), CHUNK):
+        strengths[start:start + CHUNK] = _evaluate_chunk(cards[start:start + CHUNK])
+    return strengths
+
+
+def hand_categories(strengths) -> np.ndarray:
+    """Get the category of each strength, the same numbers as `poker_eval.hand_category`"""
+    return _CATEGORY[np.asarray(strengths, dtype=np.intp)]
@@ -1,5 +1,14 @@
 from itertools import combinations
 
+from .card import CARDS, INDEX_OF, RANK_OF
+from .poker_eval import CARD_INDEX, CARD_RANK, CARD_STR_VALUES, evaluate_sum, best_hand
+
+# both `Card`s and card strings are keys, so `poker7` takes either without converting them
+_VALUE_OF = {**CARD_STR_VALUES, **{card: card.value for card in CARDS}}
+_INDEX_OF = {**CARD_INDEX, **INDEX_OF}
+_RANK_OF = {**CARD_RANK, **RANK_OF}
+_value_of = _VALUE_OF.__getitem__
+
 
 def _card_ranks(cards):
     ranks = ['0123456789TJQKA'.index(r) for r, x in cards]
@@ -56,12 +65,54 @@ def _hand_rank(hand):
         return 0, ranks
 
 
-def poker7(cards):
+def _poker7_combinations(cards):
+    """The reference implementation of `poker7`, which ranks all 21 combinations"""
     hands = combinations(cards, 5)
     hand = max(hands, key=_hand_rank)
     return hand, _hand_rank(hand)
 
 
+def poker7(cards):
+    """Find the best five of seven cards
+
+    Args:
+        cards (List[Card]): seven cards, card strings such as ['As', 'Td', ...] work as well
+
+    Returns:
+        hand (Tuple[Card]): the best five cards
+        rank (int): the strength of the hand, see `poker_eval`
+    """
+    strength = evaluate_sum(sum(map(_value_of, cards)))
+    return best_hand(cards, strength, _INDEX_OF, _RANK_OF), strength
+
+
+class Board:
+    """The public cards of a hand, kept as the sum of their values
+
+    Cards are added as they are dealt (and may be removed again to walk through
+    runouts), so scoring a player only costs adding the two hole cards to the sum.
+    """
+    __slots__ = ('total', 'n_cards')
+
+    def __init__(self, cards=()):
+        self.total = 0
+        self.n_cards = 0
+        for card in cards:
+            self.add(card)
+
+    def add(self, card):
+        self.total += card.value
+        self.n_cards += 1
+
+    def remove(self, card):
+        self.total -= card.value
+        self.n_cards -= 1
+
+    def strength(self, hole) -> int:
+        """Get the strength of two hole cards with the board, which has 3 to 5 cards"""
+        return evaluate_sum(self.total + hole[0].value + hole[1].value)
+
+
 if __name__ == '__main__':
     cards = "2s 3d 4s 5s As 9s Ts".split()
     print(poker7(cards))
@@ -0,0 +1,306 @@
+"""Lookup-table hand evaluator
+
+Every card is encoded as one integer value, so that the sum of the values of a hand
+carries everything needed to score it:
+
+    bits  0..51  a bit per card (13 * suit + rank), the card mask of the hand
+    bits 52..63  four 3-bit counters, the number of cards of each suit
+    bits 64..    the sum of the rank keys plus `1 << 23` per card
+
+The rank keys are chosen so that the sum is unique for every rank multiset of the
+same size, and the per-card `1 << 23` separates hands of 5, 6 and 7 cards. A hand
+with five or more cards of one suit is scored through a table indexed by the 13-bit
+rank mask of that suit, any other hand through a perfect hash of its rank sum.
+
+A strength is an int in [1, 7462], the bigger the better. Two hands have the same
+strength iff `poker_cmp._hand_rank` considers their best five cards equal.
+
+The tables are built once, saved to `TABLE_PATH` and memory-mapped at import time.
+"""
+import os
+import mmap
+import struct
+import tempfile
+from itertools import combinations, combinations_with_replacement
+from typing import List, NamedTuple, Sequence, Tuple
+
+TABLE_PATH = os.environ.get(
+    "POKER_EVAL_TABLE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "poker_eval.tbl"))
+
+RANKS = '23456789TJQKA'
+SUITS = 'shcd'
+
+# category of a strength, the same numbers as the first item of `poker_cmp._hand_rank`
+HIGH_CARD = 0
+ONE_PAIR = 1
+TWO_PAIR = 2
+THREE_OF_A_KIND = 3
+STRAIGHT = 4
+FLUSH = 5
+FULL_HOUSE = 6
+FOUR_OF_A_KIND = 7
+STRAIGHT_FLUSH = 8
+
+N_CLASSES = 7462
+
+# the sums of any 7 (or 6, or 5) of these keys with at most 4 of each are all different
+_RANK_KEYS = (0, 1, 5, 22, 98, 453, 2031, 8698, 22854, 83661, 262349, 636345, 1479181)
+_CARD_COUNT = 1 << 23
+_SUIT_SHIFT = 52
+_RANK_SHIFT = 64
+_HASH_MUL = 0x9E3779B1
+_BUCKET_BITS = 15
+_BUCKET_SHIFT = 32 - _BUCKET_BITS
+_LOAD_FACTOR = 0.9
+
+_MAGIC = b'PKEV'
+_VERSION = 1
+_HEADER = struct.Struct('<4sIIII')  # magic, version, n_classes, n_buckets, n_slots
+_ALIGN = 8
+
+
+def card_index(card: str) -> int:
+    """Convert a card string such as `As` or `Td` to its index in [0, 52)"""
+    return SUITS.index(card[1]) * 13 + RANKS.index(card[0])
+
+
+def card_value(index: int) -> int:
+    """Get the evaluation value of the card with the given index"""
+    suit, rank = divmod(index, 13)
+    return ((_RANK_KEYS[rank] + _CARD_COUNT) << _RANK_SHIFT) | (1 << (_SUIT_SHIFT + 3 * suit)) | (1 << index)
+
+
+CARD_VALUES: Tuple[int, ...] = tuple(card_value(i) for i in range(52))
+CARD_INDEX = {r + s: card_index(r + s) for s in SUITS for r in RANKS}
+CARD_STR_VALUES = {card: CARD_VALUES[i] for card, i in CARD_INDEX.items()}
+CARD_RANK = {card: i % 13 for card, i in CARD_INDEX.items()}
+
+
+def _classify(ranks: Sequence[int], flush: bool) -> tuple:
+    """Rank five cards, given their ranks (0 for `2`, 12 for `A`) and whether they are suited"""
+    counts = sorted(((ranks.count(r), r) for r in set(ranks)), reverse=True)
+    order = tuple(r for _, r in counts)
+    if len(counts) == 5:
+        if order == (12, 3, 2, 1, 0):
+            return (STRAIGHT_FLUSH if flush else STRAIGHT, 3)
+        if order[0] - order[4] == 4:
+            return (STRAIGHT_FLUSH if flush else STRAIGHT, order[0])
+        return (FLUSH if flush else HIGH_CARD,) + order
+    pattern = tuple(c for c, _ in counts)
+    category = {
+        (4, 1): FOUR_OF_A_KIND,
+        (3, 2): FULL_HOUSE,
+        (3, 1, 1): THREE_OF_A_KIND,
+        (2, 2, 1): TWO_PAIR,
+        (2, 1, 1, 1): ONE_PAIR,
+    }[pattern]
+    return (category,) + order
+
+
+def _rank_multisets(size: int):
+    for ranks in combinations_with_replacement(range(13), size):
+        if all(ranks.count(r) <= 4 for r in set(ranks)):
+            yield ranks
+
+
+def _perfect_hash(keys: List[int]) -> Tuple[List[int], int, List[Tuple[int, int]]]:
+    """Hash-and-displace: every key goes to `(h + disp[h >> _BUCKET_SHIFT]) % n_slots`
+
+    Returns:
+        disp (List[int]): the displacement of each bucket
+        n_slots (int): the size of the slot table
+        placement (List[(int, int)]): (key, slot) pairs
+    """
+    n_slots = int(len(keys) / _LOAD_FACTOR) + 1
+    buckets = [[] for _ in range(1 << _BUCKET_BITS)]
+    for key in keys:
+        h = (key * _HASH_MUL) & 0xFFFFFFFF
+        buckets[h >> _BUCKET_SHIFT].append((key, h))
+    disp = [0] * len(buckets)
+    used = bytearray(n_slots)
+    placement = []
+    for b in sorted(range(len(buckets)), key=lambda i: -len(buckets[i])):
+        if not buckets[b]:
+            break
+        d = 0
+        while True:
+            slots = [(h + d) % n_slots for _, h in buckets[b]]
+            if len(set(slots)) == len(slots) and not any(used[s] for s in slots):
+                break
+            d += 1
+        for (key, _), slot in zip(buckets[b], slots):
+            used[slot] = 1
+            placement.append((key, slot))
+        disp[b] = d
+    return disp, n_slots, placement
+
+
+def _pad(buf: bytes) -> bytes:
+    return buf + bytes(-len(buf) % _ALIGN)
+
+
+def _five_card_strengths():
+    """Rank all distinct five-card hands, return ({(ranks, suited): strength}, class descriptions)"""
+    five = {}
+    for ranks in _rank_multisets(5):
+        five[(ranks, False)] = _classify(ranks, False)
+        if len(set(ranks)) == 5:
+            five[(ranks, True)] = _classify(ranks, True)
+    classes = sorted(set(five.values()))
+    assert len(classes) == N_CLASSES
+    strength_of = {cls: i + 1 for i, cls in enumerate(classes)}
+
+    # a class is described by its category and the ranks of one of its hands
+    class_ranks = [bytes(6)] * (N_CLASSES + 1)
+    for (ranks, _), cls in five.items():
+        class_ranks[strength_of[cls]] = bytes((cls[0],) + tuple(sorted(ranks, reverse=True)))
+    return {hand: strength_of[cls] for hand, cls in five.items()}, class_ranks
+
+
+def _flush_tables(five_strength):
+    """Return (flush suit + 1 or 0 of each suit counter, strength of each suited rank mask)"""
+    flush_suit = bytearray(4096)
+    for counts in range(4096):
+        for suit in range(4):
+            if (counts >> (3 * suit)) & 7 >= 5:
+                flush_suit[counts] = suit + 1
+
+    flush_table = [0] * 8192
+    for mask in range(8192):
+        ranks = tuple(r for r in range(13) if mask >> r & 1)
+        if 5 <= len(ranks) <= 7:
+            flush_table[mask] = max(five_strength[(c, True)] for c in combinations(ranks, 5))
+    return flush_suit, flush_table
+
+
+def build_tables(path: str = TABLE_PATH):
+    """Generate all lookup tables and save them to `path`"""
+    five_strength, class_ranks = _five_card_strengths()
+    flush_suit, flush_table = _flush_tables(five_strength)
+
+    rank_strength = {}
+    for size in (5, 6, 7):
+        for ranks in _rank_multisets(size):
+            key = sum(_RANK_KEYS[r] for r in ranks) + size * _CARD_COUNT
+            rank_strength[key] = max(five_strength[(c, False)] for c in combinations(ranks, 5))
+
+    disp, n_slots, placement = _perfect_hash(list(rank_strength))
+    slots = [0] * n_slots
+    for key, slot in placement:
+        slots[slot] = rank_strength[key]
+
+    data = _pad(_HEADER.pack(_MAGIC, _VERSION, N_CLASSES, len(disp), n_slots))
+    data += _pad(bytes(flush_suit))
+    data += _pad(struct.pack(f'<{len(flush_table)}H', *flush_table))
+    data += _pad(struct.pack(f'<{len(disp)}H', *disp))
+    data += _pad(struct.pack(f'<{n_slots}H', *slots))
+    data += _pad(b''.join(class_ranks))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.poker_eval.')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+
+def _map_tables(path: str):
+    with open(path, 'rb') as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, n_classes, n_buckets, n_slots = _HEADER.unpack_from(buf)
+    if magic != _MAGIC or version != _VERSION or n_classes != N_CLASSES:
+        raise ValueError(f"{path} is not a valid table file")
+    view = memoryview(buf)
+    sections = []
+    offset = _HEADER.size + (-_HEADER.size % _ALIGN)
+    for size, fmt in ((4096, 'B'), (8192, 'H'), (n_buckets, 'H'), (n_slots, 'H'), ((n_classes + 1) * 6, 'B')):
+        nbytes = size * struct.calcsize(fmt)
+        sections.append(view[offset:offset + nbytes].cast(fmt))
+        offset += nbytes + (-nbytes % _ALIGN)
+    return buf, n_slots, sections
+
+
+def load_tables(path: str = TABLE_PATH):
+    """Memory-map the tables at `path`, build them first if they are missing or stale"""
+    global _buf, _n_slots, _flush_suit, _flush, _disp, _slots, _classes, _needs
+    try:
+        _buf, _n_slots, sections = _map_tables(path)
+    except (OSError, ValueError):
+        build_tables(path)
+        _buf, _n_slots, sections = _map_tables(path)
+    _flush_suit, _flush, _disp, _slots, _classes = sections
+    # how many cards of each rank the five cards of a strength have
+    _needs = [[0] * 13 for _ in range(N_CLASSES + 1)]
+    for strength in range(1, N_CLASSES + 1):
+        for r in _classes[strength * 6 + 1:strength * 6 + 6]:
+            _needs[strength][r] += 1
+
+
+def evaluate(values) -> int:
+    """Get the strength of 5, 6 or 7 cards given as their values (see `CARD_VALUES`)"""
+    return evaluate_sum(sum(values))
+
+
+def evaluate_sum(s: int) -> int:
+    """Get the strength of 5, 6 or 7 cards given as the sum of their values"""
+    suit = _flush_suit[(s >> _SUIT_SHIFT) & 0xFFF]
+    if suit:
+        return _flush[(s >> (13 * suit - 13)) & 0x1FFF]
+    h = ((s >> _RANK_SHIFT) * _HASH_MUL) & 0xFFFFFFFF
+    return _slots[(h + _disp[h >> _BUCKET_SHIFT]) % _n_slots]
+
+
+class Tables(NamedTuple):
+    flush_suit: memoryview
+    flush: memoryview
+    disp: memoryview
+    slots: memoryview
+    classes: memoryview
+
+
+def tables() -> Tables:
+    """Get the memory-mapped tables, e.g. to wrap them in arrays"""
+    return Tables(_flush_suit, _flush, _disp, _slots, _classes)
+
+
+def hand_category(strength: int) -> int:
+    """Get the category of a strength, e.g. `FLUSH`"""
+    return _classes[strength * 6]
+
+
+def hand_ranks(strength: int) -> Tuple[int, ...]:
+    """Get the ranks (0 for `2`, 12 for `A`) of the five cards of a strength in descending order"""
+    return tuple(_classes[strength * 6 + 1:strength * 6 + 6])
+
+
+def best_hand(cards: Sequence, strength: int, index_of=CARD_INDEX, rank_of=CARD_RANK) -> tuple:
+    """Pick the five cards that make `strength` out of `cards`
+
+    Args:
+        cards (Sequence): the cards that `strength` is evaluated from
+        strength (int): the strength of `cards`
+        index_of (Mapping): maps a card to its index, `CARD_INDEX` for card strings
+        rank_of (Mapping): maps a card to its rank, `CARD_RANK` for card strings
+    """
+    base = strength * 6
+    if _classes[base] == FLUSH or _classes[base] == STRAIGHT_FLUSH:
+        suit = max(range(4), key=lambda s: sum(1 for c in cards if index_of[c] // 13 == s))
+        wanted = {suit * 13 + r for r in _classes[base + 1:base + 6]}
+        return tuple(c for c in cards if index_of[c] in wanted)
+    need = _needs[strength][:]
+    hand = []
+    for c in cards:
+        r = rank_of[c]
+        if need[r]:
+            need[r] -= 1
+            hand.append(c)
+    return tuple(hand)
+
+
+load_tables()
+
+
+if __name__ == '__main__':
+    build_tables()
+    load_tables()
+    print(f"tables are saved to {TABLE_PATH}")
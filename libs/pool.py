@@ -0,0 +1,297 @@
+"""Fast-fold: players wait in one pool instead of sitting at a table
+
+A player who folds leaves the hand at once and is queued for the next one, while the
+hand goes on without them. Whenever `hand_size` players are waiting, the longest
+waiting ones are dealt a new hand, so seating a player is a push and a pop on a heap.
+
+Chips are kept in memory while players move between hands. The pool buys a player in
+once, like a table does, and writes the chips of the players that moved to `Storage`
+in one transaction every `flush_interval` seconds, and when a player leaves.
+
+The player to act has `max_await` seconds, like at a table, after which they check or
+fold on a timer of the scheduler. The messages to the players go through `notify`, which
+the Slack side sets, and are sent on the loop of the scheduler.
+"""
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from slackapi.payload import build_prompt_payload, card_to_emoji
+from .deck import ShufflePool, default_pool
+from .game import Game
+from .outs import draws, describe_outs
+from .player import Player
+from .scheduler import Timer, LoopScheduler, default_loop_scheduler
+from .storage import Storage
+
+HAND_SIZE = 6
+BUY_IN = 200
+FLUSH_INTERVAL = 5.0
+MAX_AWAIT = 60
+
+logger = logging.getLogger(__name__)
+
+
+class PoolEntry:
+    """A player of the pool, `hand` is the one they are in, if any"""
+    __slots__ = ('userid', 'username', 'chip', 'hand', 'ticket', 'leaving', 'timeout_count')
+
+    def __init__(self, userid: str, username: str, chip: int):
+        self.userid = userid
+        self.username = username
+        self.chip = chip
+        self.hand: Optional['PoolHand'] = None
+        self.ticket = -1  # of the latest queueing, older heap items of this player are stale
+        self.leaving = False
+        self.timeout_count = 0
+
+
+class PoolHand:
+    def __init__(self, game: Game, entries: List[PoolEntry]):
+        self.id = str(game.id)
+        self.game = game
+        self.entries = entries  # in the order of `game.players`
+        self.deadline = math.inf  # the monotonic time the player to act times out
+        self.turn_timer: Optional[Timer] = None  # the only timer of the hand in the scheduler, at most
+
+
+class FastFoldPool:
+    def __init__(self, storage: Storage, hand_size: int = HAND_SIZE, ante: int = 2, buy_in: int = BUY_IN,
+                 flush_interval: float = FLUSH_INTERVAL, shuffle_pool: ShufflePool = None,
+                 max_await: float = MAX_AWAIT, scheduler: LoopScheduler = None):
+        if hand_size < 2:
+            raise ValueError("a hand requires at least two players")
+        self.uid = str(uuid.uuid4())
+        self.storage = storage
+        self.hand_size = hand_size
+        self.ante = ante
+        self.buy_in = buy_in
+        self.flush_interval = flush_interval
+        self.shuffle_pool = shuffle_pool if shuffle_pool is not None else default_pool
+        self.max_await = max_await
+        self.scheduler = scheduler if scheduler is not None else default_loop_scheduler
+        # async (userid, msg, blocks), tells a player about their hands
+        self.notify: Callable[[str, str, Optional[list]], Awaitable] = None
+        self.lock = threading.RLock()
+        self.entries: Dict[str, PoolEntry] = dict()
+        self.hands: Dict[str, PoolHand] = dict()
+        # (queued at, ticket, userid), the longest waiting player first
+        self.waiting: List[Tuple[float, int, str]] = []
+        self.n_waiting = 0
+        self.tickets = itertools.count()
+        self.counter = 0  # number of hands
+        self.dirty: Dict[str, int] = dict()  # userid -> chips not written to storage yet
+        self.flushed_at = time.monotonic()
+
+    def join(self, userid: str, username: str) -> Tuple[int, Optional[str]]:
+        """Buy in and wait for a hand, return (chip, err)"""
+        with self.lock:
+            if userid in self.entries:
+                return -1, "already in the pool"
+            chip, err = self.storage.transfer_user_chip_to_table(userid, self.buy_in, self.uid)
+            if err is not None:
+                return -1, err
+            if chip < self.ante:
+                self.storage.leave_table(userid, self.uid, chip)
+                return -1, "not enough chips to play"
+            entry = PoolEntry(userid, username, chip)
+            self.entries[userid] = entry
+            self._enqueue(entry)
+            self._fill()
+            return chip, None
+
+    def leave(self, userid: str) -> Optional[str]:
+        """Fold if in a hand, and cash out"""
+        with self.lock:
+            entry = self.entries.get(userid)
+            if entry is None:
+                return "is not in the pool"
+            entry.leaving = True
+            if entry.hand is None:
+                self._cash_out(entry)
+                return None
+            # a player out of turn folds at their turn, and is cashed out then
+            hand = entry.hand
+            if hand.game.pfold(hand.entries.index(entry)) == 0:
+                self._after_action(hand)
+            return None
+
+    def act(self, userid: str, action: str, num: int = 0) -> Optional[str]:
+        """Take `action` of `Game`, e.g. `call` or `raise`, or `call_or_check`, in the hand of the player, return err"""
+        with self.lock:
+            entry = self.entries.get(userid)
+            if entry is None or entry.hand is None:
+                return "is not in a hand"
+            hand = entry.hand
+            pos = hand.entries.index(entry)
+            game = hand.game
+            if action == "call_or_check":
+                action = "check" if game.legal_actions(pos).check else "call"
+            if action == "raise":
+                ret = game.praise(pos, num)
+            elif action == "all-in":
+                ret = game.pallin(pos)
+            elif action in ("call", "check", "fold"):
+                ret = getattr(game, "p" + action)(pos)
+            else:
+                return f"unknown action {action}"
+            if ret != 0:
+                return f"invalid {action}"
+            self._after_action(hand)
+            if time.monotonic() - self.flushed_at >= self.flush_interval:
+                self.flush()
+            return None
+
+    def hand_of(self, userid: str) -> Optional[PoolHand]:
+        entry = self.entries.get(userid)
+        return entry.hand if entry is not None else None
+
+    def flush(self) -> Optional[str]:
+        """Write the chips of the players who moved since the last flush, in one transaction, return err
+
+        The chips stay dirty unless they were written, and are tried again at the next flush.
+        """
+        with self.lock:
+            self.flushed_at = time.monotonic()
+            if not self.dirty:
+                return None
+            err = self.storage.change_table_chips(self.uid, list(self.dirty.items()))
+            if err is not None:
+                logger.warning("%s: flush failed: %s", self.uid, err)
+                return err
+            self.dirty = dict()
+            return None
+
+    def _after_action(self, hand: PoolHand):
+        """Move the players who folded on to the next hand, and settle the hand if it is over"""
+        game = hand.game
+        while game.is_running() and hand.entries[game.exe_pos].leaving:
+            game.pfold(game.exe_pos)
+        for entry, player in zip(hand.entries, game.players):
+            if entry.hand is hand and player.is_fold():
+                # a folded player loses the bet and nothing else, whatever happens later
+                self._leave_hand(entry, player.chip - player.chip_bet)
+        if game.is_running():
+            self._start_turn(hand)
+        else:
+            self._finish_hand(hand)
+        self._fill()
+
+    def _finish_hand(self, hand: PoolHand):
+        game = hand.game
+        if hand.turn_timer is not None:
+            hand.turn_timer.cancel()
+        game.result.execute()
+        for entry, player in zip(hand.entries, game.players):
+            if entry.hand is hand:
+                chip = game.result.chip_changes.get(player, 0)
+                act = "win" if chip >= 0 else "lose"
+                self._notify(entry.userid, f"Pool hand over, you {act} {abs(chip)}, current chip: {player.chip}")
+                self._leave_hand(entry, player.chip)
+        del self.hands[hand.id]
+
+    def _start_turn(self, hand: PoolHand):
+        """Prompt the player to act, who has `max_await` seconds from now"""
+        game = hand.game
+        pos = game.exe_pos
+        player = game.players[pos]
+        hand.deadline = time.monotonic() + self.max_await
+        # deadlines only move later, so a pending timer is kept and moves on when it fires
+        if hand.turn_timer is None:
+            hand.turn_timer = self.scheduler.call_at(hand.deadline, self._on_turn_timer, hand)
+        board = " ".join(card_to_emoji(str(card)) for card in game.pub_cards) or "none"
+        self._notify(player.userid, f"Your turn in the pool, board: {board}, pot: ${game.total_pot}")
+        player_draws = ""
+        if len(game.pub_cards) in (3, 4):
+            player_draws = describe_outs(draws(player.cards, game.pub_cards))
+        self._notify(player.userid, None, build_prompt_payload(player.cards, game.legal_actions(pos), player_draws))
+
+    def _on_turn_timer(self, hand: PoolHand):
+        with self.lock:
+            hand.turn_timer = None
+            if self.hands.get(hand.id) is not hand:
+                return
+            if time.monotonic() < hand.deadline:
+                hand.turn_timer = self.scheduler.call_at(hand.deadline, self._on_turn_timer, hand)
+                return
+            self._timeout_turn(hand)
+
+    def _timeout_turn(self, hand: PoolHand):
+        """Check or fold for the player to act, who leaves the pool on the second timeout"""
+        game = hand.game
+        pos = game.exe_pos
+        entry = hand.entries[pos]
+        entry.timeout_count += 1
+        if entry.timeout_count >= 2:
+            entry.leaving = True
+            self._notify(entry.userid, f"timeout {entry.timeout_count} times: you are leaving the pool")
+        elif game.legal_actions(pos).check:
+            game.pcheck(pos)
+            self._notify(entry.userid, "timeout: you check")
+        else:
+            game.pfold(pos)
+            self._notify(entry.userid, "timeout: you fold")
+        self._after_action(hand)
+
+    def _notify(self, userid: str, msg: Optional[str], blocks: list = None):
+        if self.notify is not None:
+            self.scheduler.call_later(0, self.notify, userid, msg, blocks)
+
+    def _leave_hand(self, entry: PoolEntry, chip: int):
+        entry.chip = chip
+        entry.hand = None
+        self.dirty[entry.userid] = chip
+        if entry.leaving:
+            self._cash_out(entry)
+        elif chip >= self.ante:
+            self._enqueue(entry)
+
+    def _cash_out(self, entry: PoolEntry):
+        self.dirty.pop(entry.userid, None)
+        self.storage.leave_table(entry.userid, self.uid, entry.chip)
+        del self.entries[entry.userid]
+        if entry.ticket >= 0:
+            self.n_waiting -= 1
+        entry.ticket = -1
+
+    def _enqueue(self, entry: PoolEntry):
+        entry.ticket = next(self.tickets)
+        heapq.heappush(self.waiting, (time.monotonic(), entry.ticket, entry.userid))
+        self.n_waiting += 1
+
+    def _pop(self) -> PoolEntry:
+        while True:
+            _, ticket, userid = heapq.heappop(self.waiting)
+            entry = self.entries.get(userid)
+            if entry is not None and entry.ticket == ticket:
+                entry.ticket = -1
+                self.n_waiting -= 1
+                return entry
+
+    def _fill(self):
+        """Deal new hands while enough players wait"""
+        while self.n_waiting >= self.hand_size:
+            entries = [self._pop() for _ in range(self.hand_size)]
+            players = [Player(e.userid, e.username, e.chip) for e in entries]
+            for player in players:
+                player.set_normal()
+            game = Game(shuffle_pool=self.shuffle_pool)
+            hand = PoolHand(game, entries)
+            for entry in entries:
+                entry.hand = hand
+            self.hands[hand.id] = hand
+            game.start(players, self.ante, self.counter % self.hand_size)
+            self.counter += 1
+            for entry, player in zip(entries, players):
+                cards = "  ".join(card_to_emoji(str(card)) for card in player.cards)
+                self._notify(entry.userid, f"New pool hand, your hand is {cards}")
+            if game.is_running():
+                self._start_turn(hand)
+            else:
+                # everyone was all in with the blinds
+                self._after_action(hand)
@@ -0,0 +1,92 @@
+"""Main pot and side pots
+
+Everything works on seat positions and plain lists, so that both `Game` and the
+simulation engines can use it without creating any `Player` or `Result`.
+"""
+from typing import List, Sequence
+
+
+class Pot:
+    """A pot, the main pot is the first one
+
+    Attributes:
+        amount (int): the chips in this pot
+        eligible (List[int]): the seats that may win this pot
+        winners (List[int]): the seats that won this pot, set by `settle_pots`
+        shares (List[int]): the chips of each winner, set by `settle_pots`
+    """
+    __slots__ = ('amount', 'eligible', 'winners', 'shares')
+
+    def __init__(self, amount: int, eligible: List[int]):
+        self.amount = amount
+        self.eligible = eligible
+        self.winners: List[int] = []
+        self.shares: List[int] = []
+
+    def copy(self) -> 'Pot':
+        pot = Pot(self.amount, list(self.eligible))
+        pot.winners = list(self.winners)
+        pot.shares = list(self.shares)
+        return pot
+
+    def __repr__(self):
+        return f'Pot({self.amount}, eligible={self.eligible}, winners={self.winners}, shares={self.shares})'
+
+
+def build_pots(bets: Sequence[int], live: Sequence[bool]) -> List[Pot]:
+    """Split the bets into a main pot and side pots
+
+    Each all-in of a live player caps a pot. The chips of folded players go to the
+    pots their bets reach, but folded players are not eligible to win.
+
+    Args:
+        bets (Sequence[int]): the total bet of each seat in this hand
+        live (Sequence[bool]): whether the seat has not folded
+    """
+    order = sorted(range(len(bets)), key=bets.__getitem__)
+    pots: List[Pot] = []
+    level = 0  # the chips below `level` of every seat are in the pots already
+    amount = 0  # the chips of folded seats between `level` and the next live bet
+    for k, seat in enumerate(order):
+        bet = bets[seat]
+        if bet <= level:
+            continue
+        if not live[seat]:
+            amount += bet - level
+            continue
+        # every seat from k on has bet at least `bet`
+        amount += (bet - level) * (len(order) - k)
+        pots.append(Pot(amount, [s for s in order[k:] if live[s]]))
+        level = bet
+        amount = 0
+    # folded seats that bet more than any live seat
+    if amount:
+        if pots:
+            pots[-1].amount += amount
+        else:
+            pots.append(Pot(amount, []))
+    return pots
+
+
+def settle_pots(pots: List[Pot], strengths: Sequence[int], first: int = 0) -> List[int]:
+    """Give each pot to its strongest eligible seats
+
+    Split pots are divided evenly; the odd chips go one by one to the winners in seat
+    order starting from `first` (usually the seat after the button).
+
+    Returns:
+        payouts (List[int]): the chips won by each seat
+    """
+    n = len(strengths)
+    payouts = [0] * n
+    for pot in pots:
+        if not pot.eligible:
+            continue
+        best = max(strengths[s] for s in pot.eligible)
+        winners = sorted((s for s in pot.eligible if strengths[s] == best), key=lambda s: (s - first) % n)
+        share, odd = divmod(pot.amount, len(winners))
+        pot.winners = winners
+        pot.shares = [share + (i < odd) for i in range(len(winners))]
+        for seat, chips in zip(winners, pot.shares):
+            payouts[seat] += chips
+    return payouts
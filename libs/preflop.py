@@ -0,0 +1,208 @@
+"""Preflop equity tables of the 169 canonical starting hands
+
+The 1326 two-card hands fall into 169 classes: 13 pairs, 78 suited and 78 offsuit
+hands. A class is the cell of a 13x13 grid, `hi * 13 + lo` for suited hands,
+`lo * 13 + hi` for offsuit hands and `r * 13 + r` for pairs, where `hi` > `lo` are
+ranks (0 for `2`, 12 for `A`).
+
+Two tables are generated offline with `python -m libs.preflop [iterations] [workers]`:
+
+    heads_up[i][j]  the pot share of class i against class j
+    multiway[i][k]  the pot share of class i against k + 1 random hands
+
+and saved as 16-bit fixed point numbers to `TABLE_PATH`, which is memory-mapped at
+import time, so a lookup costs no simulation at all.
+"""
+import os
+import sys
+import mmap
+import struct
+import tempfile
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+from .card import to_index
+from .poker_eval import RANKS
+
+TABLE_PATH = os.environ.get(
+    "POKER_PREFLOP_TABLE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "preflop.tbl"))
+
+N_CLASSES = 169
+MAX_OPPONENTS = 8  # MAX_PLAYER - 1
+HEADS_UP_ITERATIONS = 2000
+MULTIWAY_ITERATIONS = 20000
+
+_MAGIC = b'PKPF'
+_VERSION = 1
+_HEADER = struct.Struct('<4sIII')  # magic, version, n_classes, max_opponents
+_SCALE = 0xFFFF
+_HEADS_UP_CHUNK = 8
+_MULTIWAY_CHUNK = 256
+
+logger = logging.getLogger(__name__)
+
+
+def hand_class(card1, card2) -> int:
+    """Get the class of two hole cards, given as `Card`s, card strings or card indexes"""
+    i1, i2 = to_index(card1), to_index(card2)
+    hi, lo = max(i1 % 13, i2 % 13), min(i1 % 13, i2 % 13)
+    if i1 // 13 == i2 // 13:
+        return hi * 13 + lo
+    return lo * 13 + hi
+
+
+def class_name(cls: int) -> str:
+    """Get the name of a class, e.g. `AA`, `AKs` or `72o`"""
+    row, col = divmod(cls, 13)
+    if row == col:
+        return RANKS[row] * 2
+    if row > col:
+        return RANKS[row] + RANKS[col] + 's'
+    return RANKS[col] + RANKS[row] + 'o'
+
+
+def class_combos(cls: int) -> List[tuple]:
+    """Get all (card index, card index) hands of a class"""
+    return [(a, b) for a in range(52) for b in range(a + 1, 52) if hand_class(a, b) == cls]
+
+
+def _simulate(heads_up_iterations: int, multiway_iterations: int, seed):
+    """Return the sums of pot shares of (heads_up, multiway) over the given iterations"""
+    import numpy as np
+    from .poker_batch import evaluate_batch
+
+    rng = np.random.default_rng(seed)
+    # every class padded to 12 hands by repetition, so that each hand is equally likely
+    combos = np.array([c * (12 // len(c)) for c in map(class_combos, range(N_CLASSES))])
+
+    def deal(classes):
+        return combos[classes, rng.integers(0, 12, len(classes))]
+
+    def complete(hands, n_cards):
+        """Deal `n_cards` random cards not in `hands` to each row, in random order"""
+        keys = rng.random((len(hands), 52), dtype=np.float32)
+        np.put_along_axis(keys, hands, 2, axis=1)
+        return np.argsort(keys, axis=1)[:, :n_cards]
+
+    heads_up = np.zeros(N_CLASSES * N_CLASSES)
+    hero_classes = np.repeat(np.arange(N_CLASSES), N_CLASSES)
+    villain_classes = np.tile(np.arange(N_CLASSES), N_CLASSES)
+    for start in range(0, heads_up_iterations, _HEADS_UP_CHUNK):
+        n = min(_HEADS_UP_CHUNK, heads_up_iterations - start)
+        hero = deal(np.tile(hero_classes, n))
+        villain_cls = np.tile(villain_classes, n)
+        villain = deal(villain_cls)
+        while True:
+            clash = (hero[:, :, None] == villain[:, None, :]).any(axis=(1, 2))
+            if not clash.any():
+                break
+            villain[clash] = deal(villain_cls[clash])
+        board = complete(np.hstack([hero, villain]), 5)
+        hs = evaluate_batch(np.hstack([hero, board]))
+        vs = evaluate_batch(np.hstack([villain, board]))
+        heads_up += ((hs > vs) + 0.5 * (hs == vs)).reshape(n, -1).sum(axis=0)
+
+    multiway = np.zeros((N_CLASSES, MAX_OPPONENTS))
+    for k in range(1, MAX_OPPONENTS + 1):
+        for start in range(0, multiway_iterations, _MULTIWAY_CHUNK):
+            n = min(_MULTIWAY_CHUNK, multiway_iterations - start)
+            hero = deal(np.tile(np.arange(N_CLASSES), n))
+            rest = complete(hero, 2 * k + 5)
+            board = rest[:, 2 * k:]
+            strengths = np.stack([evaluate_batch(np.hstack([hero, board]))] + [
+                evaluate_batch(np.hstack([rest[:, 2 * i:2 * i + 2], board])) for i in range(k)], axis=1)
+            winners = strengths == strengths.max(axis=1, keepdims=True)
+            share = winners[:, 0] / winners.sum(axis=1)
+            multiway[:, k - 1] += share.reshape(n, -1).sum(axis=0)
+    return heads_up.reshape(N_CLASSES, N_CLASSES), multiway
+
+
+def generate(path: str = TABLE_PATH, heads_up_iterations: int = HEADS_UP_ITERATIONS,
+             multiway_iterations: int = MULTIWAY_ITERATIONS, workers: int = None, seed: int = 0):
+    """Simulate both tables and save them to `path`
+
+    Every cell of `heads_up` gets `heads_up_iterations` samples in each direction and
+    every cell of `multiway` gets `multiway_iterations` samples.
+    """
+    import numpy as np
+
+    workers = workers or os.cpu_count() or 1
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    hu_parts = [heads_up_iterations // workers + (i < heads_up_iterations % workers) for i in range(workers)]
+    mw_parts = [multiway_iterations // workers + (i < multiway_iterations % workers) for i in range(workers)]
+    with ProcessPoolExecutor(workers) as executor:
+        results = list(executor.map(_simulate, hu_parts, mw_parts, seeds))
+    heads_up = sum(r[0] for r in results)
+    multiway = sum(r[1] for r in results)
+
+    # a share against j is one minus j's share against us, so both directions count
+    heads_up = (heads_up + heads_up_iterations - heads_up.T) / (2 * heads_up_iterations)
+    multiway = multiway / multiway_iterations
+
+    data = _HEADER.pack(_MAGIC, _VERSION, N_CLASSES, MAX_OPPONENTS)
+    data += np.rint(heads_up * _SCALE).astype('<u2').tobytes()
+    data += np.rint(multiway * _SCALE).astype('<u2').tobytes()
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.preflop.')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+
+def load_tables(path: str = TABLE_PATH):
+    """Memory-map the tables at `path`"""
+    global _buf, _heads_up, _multiway
+    with open(path, 'rb') as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, n_classes, max_opponents = _HEADER.unpack_from(buf)
+    if magic != _MAGIC or version != _VERSION or n_classes != N_CLASSES or max_opponents != MAX_OPPONENTS:
+        raise ValueError(f"{path} is not a valid table file")
+    view = memoryview(buf)
+    offset = _HEADER.size
+    _heads_up = view[offset:offset + N_CLASSES * N_CLASSES * 2].cast('H')
+    offset += N_CLASSES * N_CLASSES * 2
+    _multiway = view[offset:offset + N_CLASSES * MAX_OPPONENTS * 2].cast('H')
+    _buf = buf
+
+
+def is_loaded() -> bool:
+    return _buf is not None
+
+
+def _check_loaded():
+    if _buf is None:
+        raise RuntimeError(f"no preflop table, generate it with `python -m {__name__}`")
+
+
+def heads_up_equity(hero: int, villain: int) -> float:
+    """Get the pot share of class `hero` against class `villain`"""
+    _check_loaded()
+    return _heads_up[hero * N_CLASSES + villain] / _SCALE
+
+
+def multiway_equity(hero: int, n_opponents: int) -> float:
+    """Get the pot share of class `hero` against `n_opponents` random hands"""
+    _check_loaded()
+    if not 1 <= n_opponents <= MAX_OPPONENTS:
+        raise ValueError(f"n_opponents should be in [1, {MAX_OPPONENTS}]")
+    return _multiway[hero * MAX_OPPONENTS + n_opponents - 1] / _SCALE
+
+
+_buf = None
+if os.path.exists(TABLE_PATH):
+    try:
+        load_tables()
+    except ValueError:
+        logger.warning("%s is stale, regenerate it with `python -m %s`", TABLE_PATH, __name__)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    args = list(map(int, sys.argv[1:]))
+    iterations = args[0] if args else HEADS_UP_ITERATIONS
+    generate(TABLE_PATH, iterations, iterations * MULTIWAY_ITERATIONS // HEADS_UP_ITERATIONS, *args[1:2])
+    load_tables()
+    logger.info("tables are saved to %s", TABLE_PATH)
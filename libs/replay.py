@@ -0,0 +1,167 @@
+"""Replay recorded hands through `Game` and check they end the same way
+
+A recorded hand is a `Game.snapshot` of a finished hand, as kept by `history.HandLog`:
+the deck order, the players with their chips before the hand, the button, the blind
+and `Game.action_log`. Replaying deals the same deck, applies the same actions and
+compares the chip changes, ranks and pot winners with the recording, so a change to
+the evaluator, the pots or the betting rules can be checked against real hands.
+
+A player who leaves the table out of turn is skipped by `Game` from then on, which a
+replay cannot know, so such a hand is reported as a divergence.
+"""
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .game import Game
+from .history import read_records
+from .player import Player
+
+CHUNK_SIZE = 2000
+
+logger = logging.getLogger(__name__)
+
+
+class Divergence(NamedTuple):
+    index: int  # of the hand in the replayed records
+    game_id: str
+    reason: str
+
+
+class ReplayReport(NamedTuple):
+    hands: int
+    elapsed: float
+    divergence: Optional[Divergence]  # the first one, None if every hand matched
+
+    @property
+    def hands_per_second(self) -> float:
+        return self.hands / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class _RecordedDeck:
+    """Stands in for the `ShufflePool` of a replay, dealing the recorded order"""
+
+    def __init__(self):
+        self.order = b''
+
+    def next_order(self) -> bytes:
+        return self.order
+
+
+def _outcome(game: Game):
+    return ([game.result.chip_changes.get(p) for p in game.players], [p.rank for p in game.players],
+            [(pot.amount, pot.eligible, pot.winners, pot.shares) for pot in game.result.pots])
+
+
+def _apply(game: Game, pos: int, action: str, chip_bet: int) -> int:
+    """Take a recorded action, a raise is recorded as the bet it brings the player to"""
+    if action == "raise":
+        return game.praise(pos, chip_bet - game.players[pos].chip_bet)
+    if action == "all-in":
+        return game.pallin(pos)
+    return getattr(game, "p" + action)(pos)
+
+
+def _compare(recorded: Game, game: Game) -> Optional[str]:
+    expected, actual = _outcome(recorded), _outcome(game)
+    for name, e, a in zip(("chip changes", "ranks", "pots"), expected, actual):
+        if e != a:
+            return f"{name} {a} instead of {e}"
+    return None
+
+
+def replay_hand(recorded: Game, game: Game = None) -> Optional[str]:
+    """Replay a finished hand, return how it diverged from the recording, None if it did not"""
+    if game is None:
+        game = Game(shuffle_pool=_RecordedDeck())
+    game.shuffle_pool.order = recorded.deck.order
+    players = [Player(p.userid, p.username, p.chip) for p in recorded.players]
+    for player in players:
+        player.set_normal()
+    if game.start(players, recorded.ante, recorded.btn) != 0:
+        return "failed to start"
+    for i, (pos, action, chip_bet) in enumerate(recorded.action_log):
+        if _apply(game, pos, action, chip_bet) != 0:
+            return f"action {i}, {action} at {pos}, is rejected"
+        if players[pos].chip_bet != chip_bet:
+            return f"action {i}, {action} at {pos}, bets {players[pos].chip_bet} instead of {chip_bet}"
+    if game.is_running():
+        return "the hand does not end"
+    return _compare(recorded, game)
+
+
+def _replay_chunk(start: int, records: List[bytes]) -> Tuple[int, Optional[Divergence]]:
+    """Replay `records`, which start at index `start`, up to the first divergence"""
+    recorded = Game()
+    game = Game(shuffle_pool=_RecordedDeck())
+    for i, record in enumerate(records):
+        recorded.restore(record)
+        reason = replay_hand(recorded, game)
+        if reason is not None:
+            return i + 1, Divergence(start + i, str(recorded.id), reason)
+    return len(records), None
+
+
+def _chunks(records: Iterable[bytes], size: int) -> Iterator[Tuple[int, List[bytes]]]:
+    it = iter(records)
+    start = 0
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def replay(records: Iterable[bytes], workers: int = None, chunk_size: int = CHUNK_SIZE) -> ReplayReport:
+    """Replay recorded hands on a pool of `workers` processes, no pool if `workers` is 0
+
+    Records are streamed to the workers in chunks, with a few chunks in flight, and the
+    replay stops at the first divergence.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    start_time = time.perf_counter()
+    hands = 0
+    divergence = None
+    if workers == 0:
+        for start, chunk in _chunks(records, chunk_size):
+            n, divergence = _replay_chunk(start, chunk)
+            hands += n
+            if divergence is not None:
+                break
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            chunks = _chunks(records, chunk_size)
+            futures = deque(executor.submit(_replay_chunk, *c) for c in islice(chunks, workers * 2))
+            while futures:
+                n, divergence = futures.popleft().result()
+                hands += n
+                if divergence is not None:
+                    for future in futures:
+                        future.cancel()
+                    break
+                for c in islice(chunks, 1):
+                    futures.append(executor.submit(_replay_chunk, *c))
+    elapsed = time.perf_counter() - start_time
+    logger.debug("replayed %d hands in %.1fs", hands, elapsed)
+    return ReplayReport(hands, elapsed, divergence)
+
+
+def replay_log(directory: str, workers: int = None) -> ReplayReport:
+    """Replay every hand in the `history.HandLog` at `directory`"""
+    return replay(read_records(directory), workers)
+
+
+if __name__ == '__main__':
+    import sys
+    report = replay_log(sys.argv[1])
+    print(f"{report.hands} hands, {report.hands_per_second:,.0f} hands/s")
+    if report.divergence is not None:
+        print(f"first divergence: hand {report.divergence.index} ({report.divergence.game_id}): "
+              f"{report.divergence.reason}")
+        sys.exit(1)
@@ -0,0 +1,187 @@
+"""Exact equity of an all-in by enumerating every remaining runout
+
+Equities do not change when the suits are renamed or the players are reordered, so
+results are cached under a canonical key: the smallest form of (hands, board) over the
+24 suit permutations, with each hand, the board and the list of hands sorted. The cache
+is a small in-memory LRU in front of a bounded LRU table in sqlite.
+"""
+import sqlite3
+import struct
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import chain, combinations, permutations
+from math import factorial
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .card import to_index
+from .equity import Equity, _tally, unseen_cards
+from .poker_eval import RANKS, SUITS
+
+CHUNK = 1 << 17
+MEMORY_ENTRIES = 1024
+DEFAULT_MAX_ENTRIES = 200000
+
+_SUIT_PERMUTATIONS = list(permutations(range(4)))
+
+logger = logging.getLogger(__name__)
+
+
+def _comb(n: int, k: int) -> int:
+    """The number of k-subsets of n items, `math.comb` is not there before Python 3.8"""
+    return factorial(n) // (factorial(k) * factorial(n - k))
+
+
+@lru_cache(maxsize=8)
+def _combinations(n: int, k: int) -> np.ndarray:
+    """All k-subsets of range(n) as a (comb(n, k), k) array"""
+    flat = np.fromiter(chain.from_iterable(combinations(range(n), k)), dtype=np.uint8, count=_comb(n, k) * k)
+    return flat.reshape(_comb(n, k), k)
+
+
+def _enumerate(hands: List[List[int]], board: List[int]) -> List[Equity]:
+    rest = unseen_cards(hands, board)
+    runouts = _combinations(len(rest), 5 - len(board))
+    wins = [0] * len(hands)
+    ties = [0] * len(hands)
+    shares = [0.0] * len(hands)
+    fixed = np.array(board, dtype=np.intp)
+    for start in range(0, len(runouts), CHUNK):
+        chunk = rest[runouts[start:start + CHUNK]]
+        common = np.hstack([np.broadcast_to(fixed, (len(chunk), len(board))), chunk])
+        for i, (w, t, s) in enumerate(zip(*_tally(hands, common))):
+            wins[i] += w
+            ties[i] += t
+            shares[i] += s
+    n = len(runouts)
+    return [Equity(w / n, t / n, s / n) for w, t, s in zip(wins, ties, shares)]
+
+
+def canonical_key(hands: List[List[int]], board: List[int]) -> Tuple[str, List[int]]:
+    """Get the canonical key of a spot
+
+    Returns:
+        key (str): e.g. `AsKs,QhQd|2s3s4h`, the same for all isomorphic spots
+        order (List[int]): the position of each hand of `hands` in the key
+    """
+    best = None
+    for perm in _SUIT_PERMUTATIONS:
+        mapped = [tuple(sorted(perm[c // 13] * 13 + c % 13 for c in hand)) for hand in hands]
+        form = (sorted(mapped), sorted(perm[c // 13] * 13 + c % 13 for c in board))
+        if best is None or form < best[0]:
+            best = form, mapped
+    (sorted_hands, sorted_board), mapped = best
+
+    def name(cards):
+        return ''.join(RANKS[c % 13] + SUITS[c // 13] for c in cards)
+
+    key = ','.join(map(name, sorted_hands)) + '|' + name(sorted_board)
+    return key, [sorted_hands.index(hand) for hand in mapped]
+
+
+class RunoutCache:
+    """A bounded LRU of canonical key -> equities, kept in the sqlite database at `db`
+
+    The database is only opened by the first `get` or `put`.
+    """
+
+    def __init__(self, db: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.db = db
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.memory: OrderedDict = OrderedDict()
+        self.conn: sqlite3.Connection = None
+        self.size = 0
+        self.clock = 0
+
+    def _connect(self):
+        if self.conn is not None:
+            return
+        self.conn = sqlite3.connect(self.db, check_same_thread=False)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS runout(
+            key VARCHAR(64) PRIMARY KEY,
+            equity BLOB,
+            used INT
+            );""")
+        self.conn.execute("""CREATE INDEX IF NOT EXISTS runout_used ON runout(used);""")
+        self.conn.commit()
+        self.size, clock = self.conn.execute("""SELECT COUNT(*), MAX(used) FROM runout;""").fetchone()
+        self.clock = clock or 0
+
+    def _remember(self, key: str, equities: List[Equity]):
+        self.memory[key] = equities
+        self.memory.move_to_end(key)
+        if len(self.memory) > MEMORY_ENTRIES:
+            self.memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[List[Equity]]:
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                return self.memory[key]
+            self._connect()
+            row = self.conn.execute("""SELECT equity FROM runout WHERE key = ?;""", (key,)).fetchone()
+            if row is None:
+                return None
+            self.clock += 1
+            self.conn.execute("""UPDATE runout SET used = ? WHERE key = ?;""", (self.clock, key))
+            self.conn.commit()
+            values = struct.unpack(f'<{len(row[0]) // 8}d', row[0])
+            equities = [Equity(*values[i:i + 3]) for i in range(0, len(values), 3)]
+            self._remember(key, equities)
+            return equities
+
+    def put(self, key: str, equities: List[Equity]):
+        blob = struct.pack(f'<{len(equities) * 3}d', *chain.from_iterable(equities))
+        with self.lock:
+            self._remember(key, equities)
+            self._connect()
+            self.clock += 1
+            cursor = self.conn.execute(
+                """INSERT OR IGNORE INTO runout (key, equity, used) VALUES (?, ?, ?);""", (key, blob, self.clock))
+            self.size += cursor.rowcount
+            if self.size > self.max_entries:
+                self.conn.execute(
+                    """DELETE FROM runout WHERE key IN (SELECT key FROM runout ORDER BY used LIMIT ?);""",
+                    (self.size - self.max_entries,))
+                self.size = self.max_entries
+            self.conn.commit()
+
+
+def exact_equity(hands: Sequence[Sequence], board: Sequence = (), cache: RunoutCache = None) -> List[Equity]:
+    """Get the exact equity of each hand over all runouts of the board
+
+    Args:
+        hands (Sequence[Sequence]): two hole cards of each player, as `Card`s, card
+            strings or card indexes
+        board (Sequence): zero to five public cards
+        cache (RunoutCache) optional: where to look up and save the result
+    """
+    hands = [[to_index(c) for c in hand] for hand in hands]
+    board = [to_index(c) for c in board]
+    key, order = canonical_key(hands, board)
+    equities = cache.get(key) if cache is not None else None
+    if equities is None:
+        hands_in_key = [None] * len(hands)
+        for hand, pos in zip(hands, order):
+            hands_in_key[pos] = hand
+        equities = _enumerate(hands_in_key, board)
+        logger.debug("enumerated runouts of %s", key)
+        if cache is not None:
+            cache.put(key, equities)
+    return [equities[pos] for pos in order]
+
+
+def runout_equity(view, cache: RunoutCache = None) -> Dict[str, Equity]:
+    """The exact equity of each live player at an `events.AllInRunout`, by userid
+
+    Args:
+        view (GameView): the state before the rest of the board is dealt
+    """
+    players = [p for p in view.players if p.is_normal and not p.is_fold]
+    equities = exact_equity([p.cards for p in players], view.pub_cards, cache)
+    return {p.userid: equity for p, equity in zip(players, equities)}
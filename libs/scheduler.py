@@ -0,0 +1,105 @@
+"""One asyncio loop that runs delayed callbacks for every table
+
+Deadlines are `time.monotonic()` values kept in a heap. Callbacks run one at a time in
+deadline order, and in scheduling order for equal deadlines, so they should be short.
+A callback may also be a coroutine function, which is started as a task and awaits
+Slack without holding up the other callbacks.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class Timer:
+    """A scheduled callback, which can be cancelled until it runs"""
+    __slots__ = ('deadline', 'fn', 'args', 'cancelled')
+
+    def __init__(self, deadline: float, fn: Callable, args: tuple):
+        self.deadline = deadline
+        self.fn = fn
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class LoopScheduler:
+    """Runs the callbacks on an asyncio loop, which is attached by `start`
+
+    Callbacks scheduled before `start` wait in the heap, and run once the loop is there.
+    """
+
+    def __init__(self, name: str = 'loop-scheduler'):
+        self.name = name
+        self.loop: asyncio.AbstractEventLoop = None
+        self.lock = threading.Lock()
+        self.heap = []
+        self.counter = itertools.count()
+        self.handle: asyncio.TimerHandle = None  # of the earliest deadline, on the loop
+        self.tasks = set()
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        with self.lock:
+            self.loop = loop
+        loop.call_soon_threadsafe(self._arm)
+
+    def call_at(self, deadline: float, fn: Callable, *args) -> Timer:
+        """Run `fn(*args)` at `deadline`, a `time.monotonic()` value, from any thread"""
+        timer = Timer(deadline, fn, args)
+        with self.lock:
+            earliest = not self.heap or deadline < self.heap[0][0]
+            heapq.heappush(self.heap, (deadline, next(self.counter), timer))
+            loop = self.loop
+        if earliest and loop is not None:
+            loop.call_soon_threadsafe(self._arm)
+        return timer
+
+    def call_later(self, delay: float, fn: Callable, *args) -> Timer:
+        """Run `fn(*args)` after `delay` seconds"""
+        return self.call_at(time.monotonic() + delay, fn, *args)
+
+    def _arm(self):
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+        with self.lock:
+            if not self.heap:
+                return
+            delay = self.heap[0][0] - time.monotonic()
+        self.handle = self.loop.call_later(max(delay, 0), self._run)
+
+    def _run(self):
+        self.handle = None
+        while True:
+            with self.lock:
+                if not self.heap or self.heap[0][0] > time.monotonic():
+                    break
+                _, _, timer = heapq.heappop(self.heap)
+            if timer.cancelled:
+                continue
+            try:
+                result = timer.fn(*timer.args)
+                if asyncio.iscoroutine(result):
+                    # tasks start in the order they are created, like the callbacks
+                    task = self.loop.create_task(self._await(timer.fn, result))
+                    self.tasks.add(task)
+                    task.add_done_callback(self.tasks.discard)
+            except Exception:
+                logger.exception("%s: %r failed", self.name, timer.fn)
+        self._arm()
+
+    async def _await(self, fn: Callable, coro):
+        try:
+            await coro
+        except Exception:
+            logger.exception("%s: %r failed", self.name, fn)
+
+
+default_loop_scheduler = LoopScheduler()
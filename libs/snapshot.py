@@ -0,0 +1,69 @@
+"""Little-endian binary encoding shared by snapshots and logs"""
+import struct
+from functools import lru_cache
+from typing import Optional
+
+from .card import CARDS
+
+NO_CARD = 0xFF  # a card slot that is not dealt yet
+
+
+@lru_cache(maxsize=None)
+def _struct(fmt: str) -> struct.Struct:
+    return struct.Struct('<' + fmt)
+
+
+class Writer:
+    def __init__(self):
+        self.buf = bytearray()
+
+    def pack(self, fmt: str, *values):
+        self.buf += _struct(fmt).pack(*values)
+
+    def bytes(self, data: bytes):
+        self.pack('H', len(data))
+        self.buf += data
+
+    def str(self, s: str):
+        self.bytes(s.encode())
+
+    def cards(self, cards):
+        """A sequence of `Card`s, or of zeros for undealt cards"""
+        self.pack('B', len(cards))
+        self.buf += bytes(card.index if card else NO_CARD for card in cards)
+
+    def getvalue(self) -> bytes:
+        return bytes(self.buf)
+
+
+class Reader:
+    def __init__(self, data: bytes, offset: int = 0):
+        self.data = memoryview(data)
+        self.offset = offset
+
+    def unpack(self, fmt: str) -> tuple:
+        s = _struct(fmt)
+        values = s.unpack_from(self.data, self.offset)
+        self.offset += s.size
+        return values
+
+    def one(self, fmt: str):
+        return self.unpack(fmt)[0]
+
+    def bytes(self) -> bytes:
+        n = self.one('H')
+        self.offset += n
+        return bytes(self.data[self.offset - n:self.offset])
+
+    def str(self) -> str:
+        return self.bytes().decode()
+
+    def cards(self) -> list:
+        n = self.one('B')
+        self.offset += n
+        return [CARDS[i] if i != NO_CARD else 0 for i in self.data[self.offset - n:self.offset]]
+
+    def optional(self, fmt: str, none) -> Optional[int]:
+        """Read a value that was written as `none` for None"""
+        value = self.one(fmt)
+        return None if value == none else value
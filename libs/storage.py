@@ -1,6 +1,7 @@
 import sqlite3
 from enum import Enum
 import logging
+from typing import Sequence, Tuple
 
 
 class StorageBackend(Enum):
@@ -155,6 +156,23 @@ class Storage(object):
             cursor.execute("""COMMIT;""")
             cursor.close()
 
+    def change_table_chips(self, tableid: str, chips: Sequence[Tuple[str, int]]):
+        """Set the chips of many users at a table in one transaction, `chips` is (userid, chips)"""
+        cursor = self.conn.cursor()
+        cursor.execute("""BEGIN""")
+        try:
+            cursor.executemany(
+                """UPDATE usertable
+                SET chips = ?
+                WHERE tableid=? and userid = ?;""",
+                [(chip, tableid, userid) for userid, chip in chips]
+            )
+        except Exception:
+            return "change table chips failed"
+        finally:
+            cursor.execute("""COMMIT;""")
+            cursor.close()
+
     def change_table_chip(self, userid: str, tableid: str, chips: int):
         cursor = self.conn.cursor()
         cursor.execute("""BEGIN""")
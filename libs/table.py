@@ -1,3 +1,5 @@
+import asyncio
+import math
 import time
 import random
 import threading as thread
@@ -10,8 +12,18 @@ from .poker_bot import PokerBot
 from .player import Player
 import logging
 from .storage import Storage
+from .equity import Equity
+from .runout import RunoutCache, runout_equity
+from .outs import draws, describe_outs
+from .scheduler import Timer, LoopScheduler, default_loop_scheduler
+from .events import EventBus, GameView, TurnStarted, StreetEnded, AllInRunout, HandEnded
+from .history import HandLog
 
 MAX_AWAIT = 60
+START_DELAY = 3.0  # seconds for the hole cards to reach the players before the first turn
+STREET_DELAY = 1.0  # seconds a finished street stays on screen before the next one
+HAND_DELAY = 0.5  # seconds the result stays on screen before the next hand, when continuing
+THINK_DELAY = 1.0  # seconds a bot waits before it moves, while the table is shown
 INITIAL_CHIPS = 1000
 INITIAL_TABLE_CHIPS = 200
 
@@ -19,24 +31,42 @@ logger = logging.getLogger(__name__)
 
 
 class Table:
-    def __init__(self, owner: str, storage: Storage):
+    def __init__(self, owner: str, storage: Storage, runout_cache: RunoutCache = None, hand_log: HandLog = None,
+                 scheduler: LoopScheduler = None):
         self.uid = str(uuid.uuid4())
-        self.game = lgame.Game(self.update_payload)
+        # turns, bot moves and messages of every table run on the loop of this scheduler
+        self.scheduler = scheduler if scheduler is not None else default_loop_scheduler
+        self.tick_lock = asyncio.Lock()
+        self.events = EventBus()
+        self.game = lgame.Game(self.events)
+        self.runout_cache = runout_cache
         self.owner = owner
         self.players: List[Player] = []
         self.players_user2pos: Dict[str, int] = dict()
-        self.countdown = MAX_AWAIT
+        self.deadline = math.inf  # the monotonic time the player to act times out, bots never do
+        self.turn_timer: Timer = None  # the only timer of the table in the scheduler, at most
+        self.hand_running = False  # from the deal until the result is shown
+        self.resume_at = 0.0  # no ticks before, while the hole cards are sent
+        self.closed = False
         self.exe_pos_local = -1
         self.round_status_local = ""
         self.msg_ts = ""
         self.btn = -1
         self.ante = 2
         self.counter = 0  # number of games
-        self.timer_thread = None
         self.poker_bots: Dict[str, PokerBot] = {}
         self.storage = storage
+        self.hand_log = hand_log
         self.max_name_len = 0
         self.is_stall_payload = False
+        self.display_at = 0.0  # the monotonic time the next message may be shown
+        self.display_lock = thread.Lock()
+        self.show_lock = asyncio.Lock()  # keeps the messages in order while they are awaited
+        self.view: GameView = None  # the state in the current message
+        self.auto_continue = False  # deal the next hand as soon as one ends
+        self.think_delay = THINK_DELAY
+        self.turbo = False  # headless, nothing is shown and bots move at engine speed
+        self.subscription = self.events.subscribe(self.on_event, self.scheduler)
 
     def join(self, userid, username, is_bot: bool = False):
         """Join a table, return (pos, nplayers, total_chip, table_chip, err)"""
@@ -73,9 +103,11 @@ class Table:
         return pos, self.get_ready_player_num(), chip, player.chip, None
 
     def force_close(self):
+        self.closed = True
         self.game.force_end()
-        if self.timer_thread is not None:
-            self.timer_thread.join()
+        self.events.unsubscribe(self.subscription)
+        if self.turn_timer is not None:
+            self.turn_timer.cancel()
         for player in self.players:
             self.leave(player.userid)
 
@@ -96,7 +128,15 @@ class Table:
         """Start a game, return (hands, err)"""
         if self.game.is_running():
             return None, "already running"
+        self.resume_at = time.monotonic() + (0 if self.turbo else START_DELAY)
+        hands, err = self.deal()
+        if err is not None:
+            return None, err
+        self.scheduler.call_at(self.resume_at, self.tick)
+        return hands, None
 
+    def deal(self):
+        """Seat the players and deal the next hand, return (hands, err)"""
         self.players = list(filter(lambda p: not p.is_leaving(), self.players))
         if len(self.players) < 2:
             return None, "Failed to start, because this game requires at least TWO players"
@@ -112,16 +152,16 @@ class Table:
         self.update_user2pos()
         self.game.start(active_players, self.ante, self.btn)
         logger.debug("%s: game start successfully", self.uid)
+        self.counter += 1
+        self.exe_pos_local = -1
+        self.round_status_local = ""
+        self.hand_running = True
         hands = []
         for pos, player in enumerate(active_players):
             hands.append({
                 "id": player.userid,
                 "hand": self.game.get_cards_by_pos(pos)
             })
-        if self.timer_thread is not None:
-            self.timer_thread.join()  # FIXME: necessary?
-        self.timer_thread = thread.Thread(target=self.timer_function)
-        self.timer_thread.start()
         return hands, None
 
     def update_user2pos(self):
@@ -130,15 +170,15 @@ class Table:
             self.players_user2pos[player.userid] = pos
 
     def add_bot_player(self):
+        """Add a bot, return (bot_id, pos, table_chip, err)"""
         bot_id = f"bot_{len(self.poker_bots)}"
         pos, _, _, table_chips, err = self.join(bot_id, bot_id, True)
         if err is not None:
-            return err
+            return None, -1, -1, err
         self.poker_bots[bot_id] = PokerBot(self.uid)
-        bgame.send_to_channel_by_table_id(self.uid, f"{bot_id} has joined at pos {pos} with ${table_chips}")
-        return None
+        return bot_id, pos, table_chips, None
 
-    def bot_function(self):
+    async def bot_function(self):
         game = self.game
 
         if game.get_round_status_name() == "END":
@@ -151,139 +191,276 @@ class Table:
         logger.debug("bot_function: poker_bots: %s", str(self.poker_bots))
 
         if exe_player.userid in self.poker_bots:
-            self.poker_bots[exe_player.userid].react(game, game.exe_pos)
-
-    def timer_function(self):
-        time.sleep(3)
-        while True:
-            logger.debug("%s: timer trigger", self.uid)
-            start_time = time.time()
-            should_stop = self.mainloop()
+            pos = game.exe_pos
+            think = self.think_time()
+            if think > 0:
+                await asyncio.sleep(think)
+                if self.closed or game.exe_pos != pos:
+                    return
+            await self.poker_bots[exe_player.userid].react(game, pos)
+
+    def think_time(self) -> float:
+        """How long a bot waits before it moves, no time at all unless humans watch the table"""
+        if self.turbo:
+            return 0.0
+        # and the bots do not get ahead of what is shown
+        return max(self.think_delay, self.display_at - time.monotonic())
+
+    def wake(self):
+        """Run `tick` as soon as possible, e.g. after an action"""
+        self.scheduler.call_later(0, self.tick)
+
+    async def tick(self):
+        """Advance the table, on the loop whenever the turn changes or times out
+
+        A tick with nothing to do is harmless, so ticks are never cancelled.
+        """
+        async with self.tick_lock:
+            if self.closed or not self.hand_running or time.monotonic() < self.resume_at:
+                return
+            logger.debug("%s: tick", self.uid)
+            should_stop = await self.mainloop()
             if should_stop:
                 logger.debug("%s: timer stop", self.uid)
-                break
-            self.bot_function()
-            elapsed_time = time.time() - start_time
-            if elapsed_time < 1.0:
-                time.sleep(1.0 - elapsed_time)
+                return
+            await self.bot_function()
 
-    def mainloop(self):
-        round_status = self.game.get_round_status_name()
-        exe_pos = self.game.exe_pos
+    async def mainloop(self):
+        # one consistent state for this tick, actions may go on meanwhile
+        state = self.game.state
+        round_status = state.round_status.name if state.round_status else ""
+        exe_pos = state.exe_pos
 
         logger.debug("%s: mainloop", self.uid)
 
         if round_status == "END":
-            logger.debug("%s: mainloop exit", self.uid)
-            bgame.send_to_channel_by_table_id(self.uid, "Game Over!")
-            self.game.result.execute()
-            self.update_chip()
-            self.show_result(self.game.result)
-            self.players = list(filter(lambda p: not p.is_leaving(), self.players))
-            self.is_stall_payload = True
-            self.msg_ts = ""
-            return True
+            return self.finish_hand()
 
-        if self.countdown == 0:
-            logger.debug("%s: mainloop countdown", self.uid)
-            player = self.players[exe_pos]
-            player.timeout_count += 1
-            if player.timeout_count >= 2:
-                self.game.pfold(exe_pos)
-                bgame.send_to_channel_by_table_id(
-                    self.uid, f"timeout {player.timeout_count} times: {player.username} is leaving the table")
-                player.set_leaving()
-            else:
-                if self.game.is_check_permitted(exe_pos):
-                    self.game.pcheck(exe_pos)
-                else:
-                    self.game.pfold(exe_pos)
-            self.countdown = MAX_AWAIT
+        same_turn = self.round_status_local == round_status and exe_pos == self.exe_pos_local
+        if same_turn and time.monotonic() >= self.deadline:
+            await self.timeout_turn(exe_pos)
             return False
 
-        if self.round_status_local != round_status or exe_pos != self.exe_pos_local:
+        if not same_turn:
             logger.debug("%s: mainloop next status or next exe_pos", self.uid)
             # the game has changed to the next status, while local status is behind
             # so, we should print some message
             self.round_status_local = round_status
-            exe_player = self.game.players[exe_pos]
-            # FIXME: The calculation is tedious and error prone
-            bgame.send_private_msg_to_channel_by_table_id(
-                self.uid, exe_player.userid, None, build_prompt_payload(
-                    exe_player.cards, exe_player.get_remaining_chip(), self.game.highest_bet - exe_player.chip_bet,
-                    self.game.mini_raise + self.game.last_round_bet - exe_player.chip_bet
-                ))
-
-        else:
-            logger.debug("%s: mainloop decrease countdown %d", self.uid, self.countdown)
-            # neither the game stage nor current active player are changed
-            # so, we should update the message and decrease the countdown
-            self.countdown -= 1
-            if self.msg_ts != "":
-                bgame.update_msg_by_table_id(
-                    self.uid, self.msg_ts, blocks=self._get_payload(self.game.round_status, self.is_stall_payload))
+            exe_player = state.players[exe_pos]
+            # only the player's own cards may be used here, the prompt must not leak the others
+            if not self.turbo and exe_player.userid not in self.poker_bots:
+                player_draws = ""
+                if len(state.pub_cards) in (3, 4):
+                    player_draws = describe_outs(draws(exe_player.cards, state.pub_cards))
+                # not before a message that is being shown, e.g. the hole cards of a new hand
+                async with self.show_lock:
+                    await bgame.send_private_msg_to_channel_by_table_id(
+                        self.uid, exe_player.userid, None, build_prompt_payload(
+                            exe_player.cards, self.game.legal_actions(exe_pos), player_draws))
+            # the table sleeps until the next action, or until a human player times out
+            if self.deadline != math.inf:
+                self.arm_turn_timer()
 
         if not self.game.players[self.game.exe_pos].is_normal():
             self.game.pfold(self.game.exe_pos)
-            bgame.send_to_channel_by_table_id(
+            await bgame.send_to_channel_by_table_id(
                 self.uid, f"leaving: {self.players[exe_pos].username} fold")
-            self.countdown = MAX_AWAIT
             return False
 
         self.exe_pos_local = exe_pos
         logger.debug("%s: mainloop end", self.uid)
         return False
 
-    def _get_payload(self, round_status: lgame.RoundStatus, stall: bool):
+    def arm_turn_timer(self):
+        """Make sure a timer fires by `deadline`
+
+        Deadlines only move later, so a pending timer is kept rather than cancelled for
+        every turn, and moves on to the current deadline when it fires.
+        """
+        if self.turn_timer is None:
+            self.turn_timer = self.scheduler.call_at(self.deadline, self.on_turn_timer)
+
+    async def on_turn_timer(self):
+        self.turn_timer = None
+        if self.closed or not self.hand_running or self.deadline == math.inf:
+            return
+        if time.monotonic() < self.deadline:
+            self.arm_turn_timer()
+            return
+        await self.tick()
+
+    def finish_hand(self):
+        """Settle and show the hand that ended, and deal the next one when continuing,
+        return whether the table stops"""
+        logger.debug("%s: mainloop exit", self.uid)
+        self.hand_running = False
+        self._display(self._send_text, "Game Over!")
+        self.game.result.execute()
+        chips = [(player.userid, player.chip) for player in self.game.players]
+        self.check_broke_players()
+        if not self.turbo:
+            self.show_result(self.game.result)
+        self.players = list(filter(lambda p: not p.is_leaving(), self.players))
+        self.is_stall_payload = True
+        if not self.auto_continue:
+            self.save_chips(chips)
+            return True
+        # the next hand is dealt and shown before the chips are written
+        hands, err = self.deal()
+        if err is None:
+            self._display(self._send_hands, hands)
+            # its first tick waits for the hole cards, which wait for the result, and is
+            # scheduled after them
+            self.resume_at = self.display_at
+            self.scheduler.call_at(self.resume_at, self.tick)
+        else:
+            self._display(self._send_text, f"Auto continue stops: {err}")
+        self.save_chips(chips)
+        return err is not None
+
+    async def timeout_turn(self, exe_pos: int):
+        """Check or fold for the player to act, who leaves the table on the second timeout"""
+        logger.debug("%s: mainloop timeout", self.uid)
+        player = self.players[exe_pos]
+        player.timeout_count += 1
+        if player.timeout_count >= 2:
+            self.game.pfold(exe_pos)
+            await bgame.send_to_channel_by_table_id(
+                self.uid, f"timeout {player.timeout_count} times: {player.username} is leaving the table")
+            player.set_leaving()
+        elif self.game.legal_actions(exe_pos).check:
+            self.game.pcheck(exe_pos)
+        else:
+            self.game.pfold(exe_pos)
+
+    def _get_payload(self, view: GameView, stall: bool, equities: Dict[str, Equity] = None):
+        countdown = None
+        if self.deadline != math.inf:
+            countdown = max(math.ceil(self.deadline - time.monotonic()), 0)
         info_list = []
-        pos = self.game.sb
-        exe_pos = self.game.exe_pos
-        ordered_players = self.players[pos:] + self.players[:pos]
+        pos = view.sb
+        ordered_players = view.players[pos:] + view.players[:pos]
+        exe_player = view.players[view.exe_pos]
         for player in ordered_players:
-            if player.is_normal():
-                action = self.game.round_actions[round_status.value].actions[player.userid]
+            if player.is_normal:
                 m_action = ""
                 m_chip = 0
-                if action.active and (stall or player != self.players[exe_pos]):
-                    m_action = action.action
-                    m_chip = action.chip
+                if player.action and (stall or player.userid != exe_player.userid):
+                    m_action = player.action
+                    m_chip = player.action_chip
 
-                if player.is_fold() and m_action != "fold":
+                if player.is_fold and m_action != "fold":
                     continue
 
-                info_list.append(build_info_str(
-                    player.username, self.max_name_len, player.get_remaining_chip(), m_action, m_chip,
-                    not stall and player == self.players[exe_pos], self.countdown))
-        return build_payload(self.game.pub_cards, self.game.total_pot, self.game.ante,
-                             self.players[self.game.btn].username, info_list)
+                info = build_info_str(
+                    player.username, self.max_name_len, player.remaining_chip, m_action, m_chip,
+                    not stall and player.userid == exe_player.userid, countdown)
+                equity = equities.get(player.userid) if equities else None
+                if equity is not None:
+                    info += f" {equity.share:.1%}"
+                info_list.append(info)
+        return build_payload(view.pub_cards, view.total_pot, view.ante, view.players[view.btn].username, info_list)
+
+    def on_event(self, event):
+        if isinstance(event, TurnStarted):
+            self.start_turn(event.view)
+            if not self.turbo:
+                self.update_payload(event.view, False)
+            self.wake()
+        elif isinstance(event, StreetEnded) and not self.turbo:
+            self.update_payload(event.view, True)
+        elif isinstance(event, AllInRunout) and not self.turbo:
+            self.show_runout(event.view)
+        elif isinstance(event, HandEnded):
+            if self.hand_log is not None:
+                self.hand_log.append(event.snapshot)
+            self.wake()
+
+    def start_turn(self, view: GameView):
+        """The time of the player to act runs from the start of the turn, bots have no deadline"""
+        if view.players[view.exe_pos].userid in self.poker_bots:
+            self.deadline = math.inf
+        else:
+            self.deadline = time.monotonic() + MAX_AWAIT
 
-    def update_payload(self, round_status: lgame.RoundStatus, stall: bool):
+    def update_payload(self, view: GameView, stall: bool):
         """Update the message which we sent to the table to indicate the info of current round
 
+        The payload is shown after the messages scheduled before it, and a stalled
+        payload stays on screen for `STREET_DELAY`.
+
         Args:
-            round_status (RoundStatus): An enum which implies the round
+            view (GameView): The state to show
             stall (bool): A flag which indicates whether the countdown should continue
         """
+        self.is_stall_payload = stall
+        self.view = view
+        self._display(self._send_payload, self._get_payload(view, stall), hold=STREET_DELAY if stall else 0)
+
+    def show_runout(self, view: GameView):
+        """Show the equities of an all-in before the rest of the board, like a stalled payload"""
+        self.is_stall_payload = True
+        self.view = view
+        self._display(self._send_runout, view, hold=STREET_DELAY)
+
+    def _display(self, fn, arg, hold: float = 0):
+        """Run `fn(arg)`, which shows something on the table, after what is shown before
+
+        Args:
+            hold (float): seconds to wait before showing anything else
+        """
+        if self.turbo:
+            return
+        with self.display_lock:
+            self.display_at = max(self.display_at, time.monotonic())
+            self.scheduler.call_at(self.display_at, self._show, fn, arg)
+            self.display_at += hold
+
+    async def _show(self, fn, arg):
+        async with self.show_lock:
+            await fn(arg)
+
+    async def _send_payload(self, blocks):
         old_ts = self.msg_ts
-        self.countdown = MAX_AWAIT
-        self.msg_ts, err = bgame.send_to_channel_by_table_id(
-            self.uid, blocks=self._get_payload(round_status, stall))
+        self.msg_ts, err = await bgame.send_to_channel_by_table_id(self.uid, blocks=blocks)
         if err is not None:
             raise RuntimeError  # TODO: fix later
-        self.is_stall_payload = stall
         if old_ts != "":
-            bgame.delete_msg_by_table_id(self.uid, old_ts)
+            await bgame.delete_msg_by_table_id(self.uid, old_ts)
+
+    async def _send_runout(self, view: GameView):
+        # enumerating the runouts takes up to a second or so, on a thread so that the loop
+        # serves the other tables meanwhile; what is shown after waits for it
+        equities = await asyncio.get_running_loop().run_in_executor(None, runout_equity, view, self.runout_cache)
+        await self._send_payload(self._get_payload(view, True, equities))
+
+    async def _send_text(self, text: str):
+        await bgame.send_to_channel_by_table_id(self.uid, text)
+
+    async def _send_result(self, lines: List[str]):
+        for line in lines:
+            await bgame.send_to_channel_by_table_id(self.uid, line)
+        # the last payload stays, the next game starts a new one
+        self.msg_ts = ""
+
+    async def _send_hands(self, hands: List[dict]):
+        for hand in hands:
+            card_str = "  ".join(card_to_emoji(str(card)) for card in hand["hand"])
+            await bgame.send_private_msg_to_channel_by_table_id(self.uid, hand["id"], f"Your hand is {card_str}")
+        await bgame.send_to_channel_by_table_id(self.uid, "Next hand! I have sent your hand to you personally.")
+
+    def save_chips(self, chips):
+        self.storage.change_table_chips(self.uid, chips)
 
-    def update_chip(self):
+    def check_broke_players(self):
         for player in self.game.players:
-            self.storage.change_table_chip(player.userid, self.uid, player.chip)
             if player.chip <= 0:
                 logging.debug("%s has no chips(%d) and is about to leaving", player.username, player.chip)
                 player.set_leaving()
-                bgame.send_to_channel_by_table_id(
-                    self.uid, f"{player.username} does not have any chip, and is leaving the table")
+                self._display(self._send_text, f"{player.username} does not have any chip, and is leaving the table")
 
     def show_result(self, result: lgame.Result):
+        lines = []
         players = self.game.players[self.game.last_aggressive:] + self.game.players[:self.game.last_aggressive]
         biggest_rank = players[0].rank
         for player in players:
@@ -294,12 +471,19 @@ class Table:
                 biggest_rank = player.rank
                 hand = f" ({card_to_emoji(str(player.cards[0]))}  {card_to_emoji(str(player.cards[1]))}) "
 
-            bgame.send_to_channel_by_table_id(
-                self.uid, f"{player.username} {hand} {act} {abs(chip)}, current chip: {player.chip}\n")
+            lines.append(f"{player.username} {hand} {act} {abs(chip)}, current chip: {player.chip}\n")
+
+        if len(result.pots) > 1:
+            for i, pot in enumerate(result.pots):
+                name = "main pot" if i == 0 else f"side pot {i}"
+                winners = ", ".join(f"{self.game.players[pos].username} {share}"
+                                    for pos, share in zip(pot.winners, pot.shares))
+                lines.append(f"{name} {pot.amount}: {winners}\n")
+        self._display(self._send_result, lines, hold=HAND_DELAY if self.auto_continue else 0)
 
     def call_or_check(self, user_id) -> str:
         player_pos = self.players_user2pos[user_id]
-        if self.game.is_check_permitted(player_pos):
+        if self.game.legal_actions(player_pos).check:
             return self.check(user_id)
         return self.call(user_id)
 
@@ -329,17 +513,21 @@ class Table:
             return f"{get_mentioned_string(user_id)}, invalid all in"
 
     def get_game_info(self) -> str:
-        info_str = f"{self.game.game_status.name} {self.game.get_round_status_name()}\n"
-        info_str += f"btn: {self.game.btn} {get_mentioned_string(self.players[self.game.btn].userid)}\n"
-        info_str += f"sb: {self.game.sb} {get_mentioned_string(self.players[self.game.sb].userid)}\n"
-        info_str += f"bb: {self.game.bb} {get_mentioned_string(self.players[self.game.bb].userid)}\n"
-        info_str += f"exe_pos: {self.game.exe_pos} {get_mentioned_string(self.players[self.game.exe_pos].userid)}\n"
-        info_str += f"next_round: {self.game.next_round} {get_mentioned_string(self.players[self.game.next_round].userid)}\n"
-        info_str += f"pub_card: {self.game.pub_cards}, highest_bet {self.game.highest_bet}\n"
-        for pos, player in enumerate(self.game.players):
+        # the latest state as a whole, without waiting for the game lock
+        state = self.game.state
+        players = state.players
+        round_status = state.round_status.name if state.round_status else ""
+        info_str = f"version {state.version}: {state.game_status.name} {round_status}\n"
+        info_str += f"btn: {state.btn} {get_mentioned_string(players[state.btn].userid)}\n"
+        info_str += f"sb: {state.sb} {get_mentioned_string(players[state.sb].userid)}\n"
+        info_str += f"bb: {state.bb} {get_mentioned_string(players[state.bb].userid)}\n"
+        info_str += f"exe_pos: {state.exe_pos} {get_mentioned_string(players[state.exe_pos].userid)}\n"
+        info_str += f"next_round: {state.next_round} {get_mentioned_string(players[state.next_round].userid)}\n"
+        info_str += f"pub_card: {list(state.pub_cards)}, highest_bet {state.highest_bet}\n"
+        for player in players:
             info_str += f"{get_mentioned_string(player.userid)}: chip {player.chip}, "
-            info_str += f"total_bet {player.chip_bet}, cards {player.cards}, "
-            info_str += f"can_check {self.game.is_check_permitted(pos)}, "
+            info_str += f"total_bet {player.chip_bet}, cards {list(player.cards)}, "
+            info_str += f"can_check {player.chip_bet >= state.highest_bet}, "
             info_str += f"mode {player.mode.name}, status {player.status.name}, "
             info_str += f"rank {player.rank}, hand {player.hand}\n"
         return info_str
@@ -2,9 +2,10 @@ import slack
 import os
 import ssl as ssl_lib
 import certifi
+import aiohttp
 from bots.game import handle_message
+from libs.scheduler import default_loop_scheduler
 import logging
-import threading
 import asyncio
 
 logging.basicConfig(
@@ -14,22 +15,8 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-class SyncClient(slack.WebClient):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._synclock = threading.Lock()
-
-    def api_call(self, *args, **kwargs):
-        try:
-            self._synclock.acquire()
-            res = super().api_call(*args, **kwargs)
-        finally:
-            self._synclock.release()
-        return res
-
-
 @slack.RTMClient.run_on(event="message")
-def test_rtm_client(**payload):
+async def test_rtm_client(**payload):
 
     data = payload["data"]
 
@@ -47,15 +34,25 @@ def test_rtm_client(**payload):
     if f'<@{bot_userid}>' in text:
         mentioned = True
 
-    handle_message(web_client=web_client, channel=channel,
-                   user=user, ts=ts, text=text, mentioned=mentioned)
+    await handle_message(web_client=web_client, channel=channel,
+                         user=user, ts=ts, text=text, mentioned=mentioned)
 
 
-if __name__ == "__main__":
+async def main():
+    """Everything runs on this loop: messages, tables, bots and the Slack Web API calls"""
+    global web_client, bot_userid
     slack_token = os.environ["SLACK_BOT_TOKEN"]
     ssl_context = ssl_lib.create_default_context(cafile=certifi.where())
-    web_client = SyncClient(token=slack_token, loop=asyncio.new_event_loop())
-    bot_userid = web_client.auth_test()['user_id']
+    loop = asyncio.get_running_loop()
+    default_loop_scheduler.start(loop)
+    # one HTTP session, and its connection pool, for every API call
+    async with aiohttp.ClientSession() as session:
+        web_client = slack.WebClient(token=slack_token, ssl=ssl_context, run_async=True, session=session)
+        bot_userid = (await web_client.auth_test())['user_id']
 
-    rtm_client = slack.RTMClient(token=slack_token, ssl=ssl_context)
-    rtm_client.start()
+        rtm_client = slack.RTMClient(token=slack_token, ssl=ssl_context, run_async=True, loop=loop)
+        await rtm_client.start()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
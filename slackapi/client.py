@@ -2,11 +2,11 @@ import slack
 from slack.errors import SlackApiError
 
 
-def send_msg(web_client: slack.WebClient, channel: str, msg: str, user=None, blocks=None) -> str:
+async def send_msg(web_client: slack.WebClient, channel: str, msg: str, user=None, blocks=None) -> str:
     """Send a message to a channel
 
     Args:
-        web_client (slack.WebClient): web client object
+        web_client (slack.WebClient): web client object, with `run_async=True`
         channel (str): The channel id. e.g. 'C1234567890'
         msg (str): The message you'd like to share. e.g. 'Hello world'
             text is not required when presenting blocks.
@@ -21,19 +21,19 @@ def send_msg(web_client: slack.WebClient, channel: str, msg: str, user=None, blo
     if blocks is None:
         if user is not None:
             msg = f"<@{user}> " + msg
-        slack_response = web_client.chat_postMessage(channel=channel, text=msg)
+        slack_response = await web_client.chat_postMessage(channel=channel, text=msg)
     else:
-        slack_response = web_client.chat_postMessage(
+        slack_response = await web_client.chat_postMessage(
             channel=channel, blocks=blocks)
     ts = slack_response.data["ts"]
     return ts
 
 
-def update_msg(web_client: slack.WebClient, channel: str, msg: str, ts: str, user=None, blocks=None):
+async def update_msg(web_client: slack.WebClient, channel: str, msg: str, ts: str, user=None, blocks=None):
     """Update a message
 
     Args:
-        web_client (slack.WebClient): web client object
+        web_client (slack.WebClient): web client object, with `run_async=True`
         channel (str): The channel id. e.g. 'C1234567890'
         msg (str): The new message you'd like to update to
         ts (str): The timestamp of the old message
@@ -43,27 +43,27 @@ def update_msg(web_client: slack.WebClient, channel: str, msg: str, ts: str, use
     if blocks is None:
         if user is not None:
             msg = f"<@{user}> " + msg
-        web_client.chat_update(channel=channel, ts=ts, text=msg)
+        await web_client.chat_update(channel=channel, ts=ts, text=msg)
     else:
-        web_client.chat_update(channel=channel, ts=ts, blocks=blocks)
+        await web_client.chat_update(channel=channel, ts=ts, blocks=blocks)
 
 
-def delete_msg(web_client: slack.WebClient, channel: str, ts: str):
+async def delete_msg(web_client: slack.WebClient, channel: str, ts: str):
     """Delete a message
 
     Args:
-        web_client (slack.WebClient): web client object
+        web_client (slack.WebClient): web client object, with `run_async=True`
         channel (str): The channel id. e.g. 'C1234567890'
         ts (str): The timestamp of the old message
     """
-    web_client.chat_delete(channel=channel, ts=ts)
+    await web_client.chat_delete(channel=channel, ts=ts)
 
 
-def send_private_msg_in_channel(web_client: slack.WebClient, channel: str, user: str, msg: str, blocks=None):
+async def send_private_msg_in_channel(web_client: slack.WebClient, channel: str, user: str, msg: str, blocks=None):
     """Sends an ephemeral message to a user in a channel.
 
     Args:
-        web_client (slack.WebClient): web client object
+        web_client (slack.WebClient): web client object, with `run_async=True`
         channel (str): The channel id. e.g. 'C1234567890'
         user (str): The id of user who should see the message. e.g. 'U0BPQUNTA'
         msg (str): The message you'd like to share. e.g. 'Hello world'
@@ -71,28 +71,27 @@ def send_private_msg_in_channel(web_client: slack.WebClient, channel: str, user:
         blocks (List[Object]) optional: If provided, `msg` will be emitted
     """
     if blocks is None:
-        web_client.chat_postEphemeral(channel=channel, user=user, text=msg)
+        await web_client.chat_postEphemeral(channel=channel, user=user, text=msg)
     else:
-        web_client.chat_postEphemeral(
+        await web_client.chat_postEphemeral(
             channel=channel, user=user, blocks=blocks)
 
 
-def get_username(web_client: slack.WebClient, user: str) -> str:
+async def get_username(web_client: slack.WebClient, user: str) -> str:
     try:
-        response = web_client.users_info(user=user)
+        response = await web_client.users_info(user=user)
         return response['user']['real_name']
     except SlackApiError:
         return "USER404"
 
 
 if __name__ == "__main__":
+    import asyncio
     import os
-    import slack
-    slack_token = os.environ["SLACK_BOT_TOKEN"]
-    web_client = slack.WebClient(token=slack_token)
-    # print(get_username(web_client, "UPGH1C1PF"))
-    # web_client.files_upload(content="abc", channels=["CP3P9CS2W"])
-    web_client.chat_postMessage(channel="CP3P9CS2W", text="```abc```")
-
-    # ts = send_msg(web_client, "CP3P9CS2W", None, None,
-    #               build_payload(["Qs", "8d", "5c"], 1200, 20, "UPGH1C1PF", [p1, p2, p3]))
+
+    async def main():
+        web_client = slack.WebClient(token=os.environ["SLACK_BOT_TOKEN"], run_async=True)
+        # print(await get_username(web_client, "UPGH1C1PF"))
+        await web_client.chat_postMessage(channel="CP3P9CS2W", text="```abc```")
+
+    asyncio.run(main())
@@ -1,4 +1,5 @@
-from typing import List
+from functools import lru_cache
+from typing import List, Optional
 
 
 def get_mentioned_string(user: str) -> str:
@@ -21,8 +22,9 @@ kinds = {
 }
 
 
+@lru_cache(maxsize=None)
 def card_to_emoji(card: str) -> str:
-    """convert card string to emoji
+    """convert card string to emoji, the result of each of the 52 cards is cached
 
     Args:
         card (str): card string, for example: As, 2c, Td
@@ -35,7 +37,7 @@ def card_to_emoji(card: str) -> str:
 
 
 def build_info_str(username: str, name_len: int, remaining_chip: int, action: str,
-                   chip: int, is_waiting: bool, countdown: int) -> str:
+                   chip: int, is_waiting: bool, countdown: Optional[int]) -> str:
     """Build a string to explain action of a user
 
     Args:
@@ -51,8 +53,8 @@ def build_info_str(username: str, name_len: int, remaining_chip: int, action: st
             `action` is `bet`, `raise` or `all-in`
         is_waiting (bool): a flag that indicate if this user is in
             execution position
-        countdown (int): the countdown of waiting, only meaningful
-            when `is_waiting` is `True`
+        countdown (Optional[int]): the seconds left to act, only meaningful
+            when `is_waiting` is `True`, None if there is no limit
 
     Return:
         info_str (str): a string to explain action of a user
@@ -61,7 +63,8 @@ def build_info_str(username: str, name_len: int, remaining_chip: int, action: st
     if action in ("bet", "raise", "all-in"):
         info += f" ${chip}    "
     if is_waiting:
-        info += f"{countdown}s"
+        if countdown is not None:
+            info += f"{countdown}s"
         info = "-> " + info
     else:
         info = "   " + info
@@ -107,18 +110,15 @@ def build_payload(pub_cards: List[str], pot: int, ante: int, btn_username: str,
     return ret
 
 
-def build_prompt_payload(cards: List[str], remaining: int, call_needed: int, mini_raise: int):
+def build_prompt_payload(cards: List[str], legal, draws: str = ""):
     """Build prompt payload to tell player their choices. The choices include `check`, `call`,
-    `bet`, `all in` and `fold`. Only when `call_needed` = `0`, we give `check` hint. Only when
-    `0` < `call_needed` < `remaining`, we give `call` hint. Only when `remaining` > `call_needed`
-    or `remaining` > `mini_raise`, we give `bet` option. We always give `all in` and `fold`
-    options
+    `bet`, `all in` and `fold`, we give the hints of those that the game accepts, `call` only
+    when `check` is not accepted
 
     Args:
         cards (List[str]): Player's hand
-        remaining (int): The chip that the user own at the time
-        call_needed (int): The chip that the user need to call (0 for check)
-        mini_raise (int): The minimal chip to raise
+        legal (LegalActions): The legal actions of the player, see `libs.legal`
+        draws (str): The outs that improve the hand, e.g. `9 to flush`, not shown if empty
     """
     ret = []
 
@@ -127,14 +127,17 @@ def build_prompt_payload(cards: List[str], remaining: int, call_needed: int, min
         card_str += card_to_emoji(str(card)) + " "
 
     actions = ""
-    if call_needed == 0:
+    if legal.check:
         actions += "`c`heck, "
-    if 0 < call_needed <= remaining:
-        actions += f"`c`all ${call_needed}, "
-    if remaining > call_needed or remaining > mini_raise:
-        actions += f"`b`et [chip num](at least ${mini_raise}), "
+    elif legal.call is not None:
+        actions += f"`c`all ${legal.call}, "
+    if legal.min_raise is not None:
+        actions += f"`b`et [chip num](at least ${legal.min_raise}), "
     actions += "`a`ll in, or `f`old"
 
+    if draws:
+        card_str += f"\nYour outs: {draws}"
+
     ret.append({
         "type": "section",
                 "text": {
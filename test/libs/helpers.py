@@ -0,0 +1,37 @@
+"""Players, games and random actions shared by the tests of `libs`"""
+import random
+from typing import List, Sequence
+
+from libs.deck import ShufflePool
+from libs.game import Game
+from libs.player import Player
+
+
+def make_players(chips: Sequence[int]) -> List[Player]:
+    """Players `u0`, `u1`, ... with `chips`, ready to be dealt a hand"""
+    players = [Player(f"u{i}", f"player{i}", chip) for i, chip in enumerate(chips)]
+    for player in players:
+        player.set_normal()
+    return players
+
+
+def start_game(chips: Sequence[int], btn: int = 0, seed: int = None) -> Game:
+    """Deal a hand with blinds of 10 and 20 to `make_players(chips)`, from a pool of `seed` if given"""
+    game = Game(shuffle_pool=ShufflePool(seed=seed) if seed is not None else None)
+    game.start(make_players(chips), 20, btn)
+    return game
+
+
+def random_action(rng: random.Random, game, pos: int):
+    """Pick an action, about as a careless human would, invalid ones included"""
+    action = rng.choice(("call", "call", "check", "check", "fold", "raise", "raise", "allin"))
+    if action == "raise":
+        return action, rng.choice((game.mini_raise, game.mini_raise * 2, rng.randint(1, 100)))
+    return action, None
+
+
+def apply(game, pos: int, action: str, num):
+    """Take an action of `random_action`, on a `Game` or a `HeadlessGame`"""
+    if action == "raise":
+        return game.praise(pos, num)
+    return getattr(game, "p" + action)(pos)
@@ -0,0 +1,75 @@
+import random
+import unittest
+
+import numpy as np
+
+from libs.batch_game import BatchGame, CALL, CHECK, FOLD_ACTION, RAISE, ALLIN_ACTION
+from libs.deck import ShufflePool
+from libs.game import Game
+from test.libs.helpers import start_game
+
+ACTIONS = (CALL, CALL, CHECK, CHECK, FOLD_ACTION, RAISE, RAISE, ALLIN_ACTION)
+
+
+def apply(game: Game, pos: int, action: int, num: int):
+    if action == CALL:
+        return game.pcall(pos)
+    if action == CHECK:
+        return game.pcheck(pos)
+    if action == FOLD_ACTION:
+        return game.pfold(pos)
+    if action == RAISE:
+        return game.praise(pos, num)
+    return game.pallin(pos)
+
+
+class TestBatchGame(unittest.TestCase):
+
+    def test_play(self):
+        batch = BatchGame(1000, 6, seed=0)
+        batch.start([500, 300, 100, 500, 40, 1000], 20, np.arange(1000) % 6)
+
+        def calling_station(g):
+            return np.where(g.is_check_permitted(), CHECK, CALL), None
+
+        changes = batch.play(calling_station)
+        self.assertFalse(batch.running.any())
+        self.assertTrue((changes.sum(axis=1) == 0).all())
+        self.assertTrue((batch.board_len == 5).all())
+
+    def test_same_as_game(self):
+        rng = random.Random(0)
+        for n in (2, 3, 6):
+            n_tables = 40
+            chips = [[rng.choice((40, 100, 500)) for _ in range(n)] for _ in range(n_tables)]
+            btn = [rng.randrange(n) for _ in range(n_tables)]
+            orders = [ShufflePool(seed=t).next_order() for t in range(n_tables)]
+            batch = BatchGame(n_tables, n)
+            batch.start(chips, 20, btn, np.frombuffer(b''.join(orders), dtype=np.uint8).reshape(n_tables, 52))
+            games, players = [], []
+            for t in range(n_tables):
+                game = start_game(chips[t], btn[t], seed=t)
+                players.append(game.players)
+                games.append(game)
+
+            while batch.running.any():
+                actions = np.array([rng.choice(ACTIONS) for _ in range(n_tables)])
+                amounts = np.array([rng.choice((int(m), int(m) * 2, rng.randint(1, 100))) for m in batch.mini_raise])
+                expected = []
+                for t, game in enumerate(games):
+                    self.assertEqual(batch.running[t], game.is_running())
+                    if game.is_running():
+                        self.assertEqual(batch.exe_pos[t], game.exe_pos)
+                        self.assertEqual(batch.round_status[t], game.round_status.value)
+                        expected.append(apply(game, game.exe_pos, actions[t], amounts[t]) == 0)
+                    else:
+                        expected.append(False)
+                self.assertEqual(batch.step(actions, amounts).tolist(), expected)
+
+            for t, game in enumerate(games):
+                self.assertFalse(game.is_running())
+                self.assertEqual(batch.chip_changes[t].tolist(), [game.result.chip_changes[p] for p in players[t]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import pickle
+import unittest
+from libs.card import Card, CARDS, to_index
+from libs.poker_cmp import poker7
+from libs.poker_eval import card_index
+
+
+class TestCard(unittest.TestCase):
+
+    def test_interned(self):
+        self.assertIs(Card(0, 1), Card(0, 1))
+        self.assertIs(pickle.loads(pickle.dumps(Card(2, 10))), Card(2, 10))
+        self.assertEqual(len(set(CARDS)), 52)
+        with self.assertRaises(AttributeError):
+            Card(0, 1).foo = 1
+        with self.assertRaises(ValueError):
+            Card(4, 1)
+
+    def test_fields(self):
+        for i, card in enumerate(CARDS):
+            self.assertEqual(card.index, i)
+            self.assertEqual(card_index(str(card)), i)
+            self.assertEqual(card.mask, 1 << i)
+            self.assertEqual(to_index(card), to_index(str(card)))
+        self.assertEqual(str(Card(0, 1)), "As")
+        self.assertEqual(Card(0, 1).rank, 12)
+        self.assertEqual(str(Card(3, 10)), "Td")
+
+    def test_poker7(self):
+        cards = [CARDS[card_index(c)] for c in "8s Ks Qs Js As 9s Ts".split()]
+        hand, rank = poker7(cards)
+        self.assertSetEqual(set(map(str, hand)), set("Ts Js Qs Ks As".split()))
+        self.assertEqual(rank, poker7(list(map(str, cards)))[1])
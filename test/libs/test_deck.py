@@ -0,0 +1,34 @@
+import unittest
+from libs.deck import Deck, ShufflePool
+from test.libs.helpers import start_game
+
+
+class TestDeck(unittest.TestCase):
+
+    def test_deal(self):
+        deck = Deck(ShufflePool(seed=1))
+        cards = [deck.get_card() for _ in range(52)]
+        self.assertEqual(len(set(cards)), 52)
+        self.assertEqual(deck.dealt, (1 << 52) - 1)
+        self.assertEqual(deck.remaining(), 0)
+
+        deck = Deck(order=range(52))
+        card = deck.get_card()
+        self.assertEqual(card.index, 0)
+        self.assertTrue(deck.is_dealt(card))
+
+    def test_seeded_stream(self):
+        # batches are refilled in the background, the stream must not depend on it
+        pool1 = ShufflePool(seed=7, batch_size=3)
+        pool2 = ShufflePool(seed=7, batch_size=3)
+        orders = [pool1.next_order() for _ in range(10)]
+        self.assertEqual(orders, [pool2.next_order() for _ in range(10)])
+        self.assertEqual(len(set(orders)), 10)
+        self.assertNotEqual(orders[0], ShufflePool(seed=8).next_order())
+
+    def test_game_with_pool(self):
+        hands = []
+        for _ in range(2):
+            game = start_game([500, 500], seed=3)
+            hands.append([str(c) for p in game.players for c in p.cards])
+        self.assertEqual(hands[0], hands[1])
@@ -0,0 +1,46 @@
+import unittest
+from libs.equity import EquityEngine, game_equity
+from test.libs.helpers import start_game
+
+
+class TestEquity(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = EquityEngine(workers=0)
+
+    def test_river(self):
+        equities, n = self.engine.estimate([["As", "Ah"], ["Ks", "Kh"]], "2c 7d 9h Jc 3s".split())
+        self.assertEqual(n, 1)
+        self.assertEqual(equities[0].win, 1)
+        self.assertEqual(equities[1].share, 0)
+
+        equities, _ = self.engine.estimate([["As", "2h"], ["Ad", "3h"]], "Kc Kd Qh Qc Js".split())
+        self.assertEqual([e.tie for e in equities], [1, 1])
+        self.assertEqual([e.share for e in equities], [0.5, 0.5])
+
+    def test_preflop(self):
+        equities, n = self.engine.estimate([["As", "Ah"], ["Ks", "Kh"]], margin=0.01)
+        self.assertAlmostEqual(equities[0].share, 0.82, delta=0.015)
+        self.assertAlmostEqual(sum(e.share for e in equities), 1)
+        self.assertLess(n, 200000)
+
+    def test_deterministic(self):
+        args = ([["As", "Kd"], ["7h", "7c"], ["Qs", "Js"]], ["2s", "7s", "Td"])
+        self.assertEqual(self.engine.estimate(*args, samples=20000, seed=3),
+                         self.engine.estimate(*args, samples=20000, seed=3))
+        with EquityEngine(workers=2) as engine:
+            self.assertEqual(engine.estimate(*args, samples=20000, seed=3),
+                             engine.estimate(*args, samples=20000, seed=3))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            self.engine.estimate([["As", "Ah"], ["As", "Kh"]])
+        with self.assertRaises(ValueError):
+            self.engine.estimate([["As", "Ah"]])
+
+    def test_game_equity(self):
+        game = start_game([500, 500, 500])
+        game.pfold(game.exe_pos)
+        equities = game_equity(game, self.engine, samples=10000)
+        self.assertEqual(len(equities), 2)
+        self.assertAlmostEqual(sum(e.share for e in equities.values()), 1)
@@ -0,0 +1,158 @@
+import asyncio
+import random
+import threading
+import time
+import unittest
+from libs.events import EventBus, TurnStarted, ActionTaken, StreetEnded, HandEnded
+from libs.game import Game, RoundStatus
+from libs.scheduler import LoopScheduler
+from test.libs.helpers import make_players, random_action, apply
+
+
+class TestEvents(unittest.TestCase):
+
+    def setUp(self):
+        self.bus = EventBus()
+        self.game = Game(self.bus)
+        self.players = make_players([500, 500, 500])
+
+    def test_hand(self):
+        events = []
+        self.bus.subscribe(events.append)
+        game = self.game
+        game.start(self.players, 20, 1)
+        self.assertEqual(game.pcall(1), 0)
+        self.assertEqual(game.pfold(2), 0)
+        self.assertEqual(game.pcheck(0), 0)
+        self.assertEqual(game.pfold(0), 0)
+        self.bus.join()
+
+        self.assertEqual([type(e) for e in events], [
+            TurnStarted, ActionTaken, TurnStarted, ActionTaken, TurnStarted, ActionTaken,
+            StreetEnded, TurnStarted, ActionTaken, StreetEnded, HandEnded])
+        first = events[0].view
+        self.assertEqual(first.exe_pos, 1)
+        self.assertEqual(first.total_pot, 30)  # the blinds are in
+        self.assertEqual((events[1].pos, events[1].action, events[1].chip), (1, "call", 20))
+        preflop_end = events[6].view
+        self.assertEqual(preflop_end.round_status, RoundStatus.PREFLOP)
+        self.assertEqual(preflop_end.pub_cards, ())
+        self.assertEqual([p.action for p in preflop_end.players], ["check", "call", "fold"])
+        self.assertEqual(len(events[7].view.pub_cards), 3)
+        self.assertEqual(events[-1].result.chip_changes[self.players[1]], 30)
+
+    def test_state(self):
+        game = self.game
+        self.assertEqual(game.state.version, 0)
+        game.start(self.players, 20, 1)
+        started = game.state
+        self.assertEqual((started.version, started.exe_pos, started.total_pot), (1, 1, 30))
+        self.assertEqual(game.pcheck(1), -1)
+        self.assertIs(game.state, started)
+        self.assertEqual(game.pcall(1), 0)
+        self.assertEqual(game.state.version, 2)
+        self.assertEqual((started.exe_pos, started.total_pot), (1, 30))
+        self.assertEqual(game.state.players[1].action, "call")
+
+    def test_state_readers(self):
+        rng = random.Random(0)
+        seen = []
+        done = threading.Event()
+
+        def read():
+            while not done.is_set():
+                state = self.game.state
+                seen.append((state.version, state.total_pot, sum(p.chip_bet for p in state.players)))
+                time.sleep(0.0001)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        for btn in range(50):
+            for player in self.players:
+                player.chip = 500
+                player.set_normal()
+            self.game.start(self.players, 20, btn % 3)
+            while self.game.is_running():
+                apply(self.game, self.game.exe_pos, *random_action(rng, self.game, self.game.exe_pos))
+        done.set()
+        reader.join()
+        self.assertTrue(all(pot == bets for _, pot, bets in seen))
+        versions = [v for v, _, _ in seen]
+        self.assertEqual(versions, sorted(versions))
+
+    def test_slow_subscriber(self):
+        consumed = threading.Event()
+
+        def slow(event):
+            time.sleep(0.2)
+            consumed.set()
+
+        self.bus.subscribe(slow)
+        start = time.monotonic()
+        self.game.start(self.players, 20, 1)
+        self.assertEqual(self.game.pcall(1), 0)
+        self.assertLess(time.monotonic() - start, 0.1)
+        self.assertFalse(consumed.is_set())
+        self.bus.join()
+        self.assertTrue(consumed.is_set())
+
+    def test_scheduled_subscriber(self):
+        events = []
+        threads = set()
+
+        def record(event):
+            events.append(type(event))
+            threads.add(threading.current_thread().name)
+
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, name='events')
+        thread.start()
+        scheduler = LoopScheduler()
+        scheduler.start(loop)
+        subscription = self.bus.subscribe(record, scheduler)
+        self.game.start(self.players, 20, 1)
+        self.assertEqual(self.game.pcall(1), 0)
+        self.bus.join()
+        self.assertEqual(events, [TurnStarted, ActionTaken, TurnStarted])
+        self.assertEqual(threads, {'events'})
+        self.bus.unsubscribe(subscription)
+        self.assertEqual(self.game.pfold(2), 0)
+        time.sleep(0.05)
+        self.assertEqual(len(events), 3)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    def test_unstarted_loop(self):
+        events = []
+        scheduler = LoopScheduler()
+        self.bus.subscribe(events.append, scheduler)
+        self.assertEqual(self.game.start(self.players, 20, 1), 0)
+        self.assertEqual(self.game.state.version, 1)
+
+        async def main():
+            scheduler.start(asyncio.get_running_loop())
+            await asyncio.sleep(0.05)
+
+        asyncio.run(main())
+        self.assertEqual([type(e) for e in events], [TurnStarted])
+
+    def test_full_scheduled_subscriber(self):
+        bus = EventBus(maxsize=2)
+        events = []
+        scheduler = LoopScheduler()
+        bus.subscribe(events.append, scheduler)
+        with self.assertLogs('libs.events', 'WARNING'):
+            for i in range(3):
+                bus.publish(i)  # nobody can run the loop yet, so the third one is dropped
+
+        async def main():
+            scheduler.start(asyncio.get_running_loop())
+            await asyncio.sleep(0.05)
+
+        asyncio.run(main())
+        self.assertEqual(events, [0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import random
+import unittest
+from libs.fuzz import Case, fuzz, random_case, run_case, shrink
+
+
+class TestFuzz(unittest.TestCase):
+
+    def test_no_broken_invariant(self):
+        report = fuzz(500, workers=0)
+        self.assertEqual(report.hands, 500)
+        self.assertIsNone(report.failure)
+
+    def test_workers(self):
+        report = fuzz(200, workers=2, seed=1000, chunk_size=50)
+        self.assertEqual(report.hands, 200)
+        self.assertIsNone(report.failure)
+
+    def test_fallback_ends_the_hand(self):
+        case, message = run_case(random_case(random.Random(0)))
+        self.assertIsNone(message)
+        self.assertTrue(all(action in ("check", "fold") for _, action, _ in case.actions))
+
+    def test_rejected_actions(self):
+        case = random_case(random.Random(1))._replace(actions=((-1, "fold", 0), (1, "call", 0), (0, "raise", -5)))
+        case, message = run_case(case)
+        self.assertIsNone(message)
+
+    def test_shrink(self):
+        actions = tuple((0, "call", 0) for _ in range(20)) + ((2, "raise", 50), (0, "all-in", 0))
+        case = Case((100, 100), 20, 0, bytes(range(52)), actions)
+
+        def fails(c: Case) -> bool:
+            return any(action == "all-in" for _, action, _ in c.actions)
+
+        self.assertEqual(shrink(case, fails).actions, ((0, "all-in", 0),))
+
+
+if __name__ == '__main__':
+    unittest.main()
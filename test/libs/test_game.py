@@ -1,6 +1,9 @@
 import unittest
+from libs.events import EventBus, AllInRunout
 from libs.game import Game, GameStatus, RoundStatus
 from libs.player import Player
+from libs.poker_cmp import poker7
+from libs.runout import runout_equity
 
 
 INITIAL_CHIPS = 500
@@ -33,11 +36,44 @@ class TestGameKernel(unittest.TestCase):
         self.assertEqual(game.game_status, GameStatus.WAITING)
 
     def test_all_in(self):
-        pass
+        bus = EventBus()
+        runouts = []
+        bus.subscribe(lambda e: isinstance(e, AllInRunout) and runouts.append(e.view))
+        game = Game(bus)
+        game.start(self.players, 20, 1)
+        self.assertEqual(game.pallin(1), 0)
+        self.assertEqual(game.pallin(2), 0)
+        self.assertEqual(game.pcall(0), 0)
+        self.assertEqual(game.round_status, RoundStatus.END)
+        self.assertEqual(len(game.pub_cards), 5)
+        self.assertEqual(sum(game.result.chip_changes.values()), 0)
+        bus.join()
+        # the equities are worked out from the board before the runout
+        self.assertEqual(len(runouts), 1)
+        self.assertEqual(runouts[0].pub_cards, ())
+        equities = runout_equity(runouts[0])
+        self.assertEqual(set(equities), {p.userid for p in self.players})
+        self.assertAlmostEqual(sum(e.share for e in equities.values()), 1)
 
     def test_show_hand1(self):
         pass
 
+    def test_showdown_rank(self):
+        game = self.g
+        self.assertEqual(game.pcall(1), 0)
+        self.assertEqual(game.pcall(2), 0)
+        self.assertEqual(game.pcheck(0), 0)
+        for _ in range(3):
+            for pos in (2, 0, 1):
+                self.assertEqual(game.pcheck(pos), 0)
+        self.assertEqual(game.round_status, RoundStatus.END)
+        self.assertEqual(len(game.pub_cards), 5)
+        for player in self.players:
+            hand, rank = poker7(player.cards + game.pub_cards)
+            self.assertEqual(player.rank, rank)
+            self.assertSetEqual(set(player.hand), set(hand))
+        self.assertEqual(sum(game.result.chip_changes.values()), 0)
+
     def test_wrong_pos_take_action(self):
         game = self.g
         self.assertEqual(game.exe_pos, 1)
@@ -0,0 +1,47 @@
+import random
+import unittest
+from libs.deck import ShufflePool
+from libs.headless import HeadlessGame, play_hand
+from test.libs.helpers import start_game, random_action, apply
+
+
+class TestHeadlessGame(unittest.TestCase):
+
+    def test_play_hand(self):
+        game = HeadlessGame(ShufflePool(seed=1))
+
+        def calling_station(g, pos):
+            return g.pcheck(pos) if g.is_check_permitted(pos) else g.pcall(pos)
+
+        for btn in range(3):
+            changes = play_hand(game, calling_station, [500, 300, 100], 20, btn)
+            self.assertEqual(sum(changes), 0)
+            self.assertEqual(len(game.board), 5)
+            self.assertFalse(game.running)
+            self.assertEqual(game.pcall(game.exe_pos), -1)
+
+    def test_same_as_game(self):
+        rng = random.Random(0)
+        for hand in range(200):
+            n = rng.randint(2, 6)
+            chips = [rng.choice((40, 100, 500)) for _ in range(n)]
+            btn = rng.randrange(n)
+            game = start_game(chips, btn, seed=hand)
+            players = game.players
+            headless = HeadlessGame(ShufflePool(seed=hand))
+            headless.start(chips, 20, btn)
+
+            while game.is_running():
+                self.assertEqual(headless.exe_pos, game.exe_pos)
+                self.assertEqual(headless.round_status, game.round_status.value)
+                pos = game.exe_pos
+                self.assertEqual(headless.legal_actions(pos), game.legal_actions(pos))
+                action, num = random_action(rng, game, pos)
+                self.assertEqual(apply(headless, pos, action, num), apply(game, pos, action, num))
+            self.assertFalse(headless.running)
+            self.assertEqual(headless.board, [c.index for c in game.pub_cards])
+            self.assertEqual(headless.chip_changes, [game.result.chip_changes[p] for p in players])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from libs.deck import ShufflePool
+from libs.events import EventBus, HandEnded
+from libs.game import Game
+from libs.history import HandLog, read_records, read_hands, segments
+from test.libs.helpers import make_players
+
+
+class TestHandLog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def play(self, log: HandLog, n: int):
+        """Play `n` hands where the button folds to the big blind, return their results"""
+        bus = EventBus()
+        bus.subscribe(lambda e: isinstance(e, HandEnded) and log.append(e.snapshot))
+        game = Game(bus, shuffle_pool=ShufflePool(seed=0))
+        players = make_players([500, 500, 500])
+        results = []
+        for hand in range(n):
+            for player in players:
+                player.set_normal()
+            game.start(players, 20, hand % 3)
+            game.pfold(game.exe_pos)
+            game.pfold(game.exe_pos)
+            results.append(([p.cards for p in players], {p.userid: c for p, c in game.result.chip_changes.items()}))
+            game.result.execute()
+        bus.join()
+        return results
+
+    def test_round_trip(self):
+        log = HandLog(self.directory, segment_size=2000, sync_interval=0.01, batch_size=4)
+        results = self.play(log, 20)
+        log.close()
+        self.assertGreater(len(segments(self.directory)), 1)
+
+        hands = list(read_hands(self.directory))
+        self.assertEqual(len(hands), 20)
+        for game, (cards, changes) in zip(hands, results):
+            self.assertEqual([p.cards for p in game.players], cards)
+            self.assertEqual({p.userid: c for p, c in game.result.chip_changes.items()}, changes)
+            self.assertEqual([a.action for a in game.round_actions[0].actions.values()].count("fold"), 2)
+
+    def test_opened_by_first_append(self):
+        directory = os.path.join(self.directory, "hands")
+        log = HandLog(directory)
+        self.assertFalse(os.path.exists(directory))
+        self.play(log, 1)
+        log.close()
+        self.assertEqual(len(list(read_records(directory))), 1)
+
+    def test_torn_record(self):
+        log = HandLog(self.directory)
+        self.play(log, 3)
+        log.close()
+        path = segments(self.directory)[-1]
+        with open(path, 'r+b') as f:
+            f.truncate(os.path.getsize(path) - 5)
+        self.assertEqual(len(list(read_records(self.directory))), 2)
+
+        # a reopened log writes to a new segment, after the torn one
+        log = HandLog(self.directory)
+        self.play(log, 1)
+        log.flush()
+        self.assertEqual(len(segments(self.directory)), 2)
+        self.assertEqual(len(list(read_records(self.directory))), 3)
+        log.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import random
+import unittest
+from libs.legal import NO_ACTIONS
+from test.libs.helpers import start_game, random_action, apply
+
+
+class TestLegalActions(unittest.TestCase):
+
+    def test_blinds(self):
+        game = start_game([500, 500, 30], seed=0)
+        # the button acts first, after the blinds of 10 and 20
+        legal = game.legal_actions(0)
+        self.assertEqual((legal.check, legal.call, legal.min_raise, legal.max_raise, legal.allin),
+                         (False, 20, 40, 500, 500))
+        self.assertIs(game.legal_actions(0), legal)
+        self.assertEqual(game.legal_actions(1), NO_ACTIONS)
+        game.praise(0, 60)
+        self.assertEqual(game.legal_actions(1)[:5], (False, 50, 70, 490, 490))
+        game.pfold(1)
+        # the big blind cannot cover the raise
+        self.assertEqual(game.legal_actions(2)[:5], (False, None, None, None, 10))
+
+    def test_game_accepts_exactly_the_legal_actions(self):
+        rng = random.Random(0)
+        for hand in range(100):
+            chips = [rng.choice((40, 100, 500)) for _ in range(rng.randint(2, 6))]
+            game = start_game(chips, rng.randrange(len(chips)), seed=hand)
+            players = game.players
+            while game.is_running():
+                pos = game.exe_pos
+                legal = game.legal_actions(pos)
+                self.assertEqual(game.clone().pcheck(pos) == 0, legal.check)
+                self.assertEqual(game.clone().pcall(pos) == 0, legal.call is not None)
+                self.assertEqual(game.clone().pallin(pos) == 0, legal.allin is not None)
+                self.assertEqual(game.clone().pfold(pos) == 0, legal.fold)
+                for num in {game.mini_raise - 1, game.mini_raise, legal.min_raise or 0, (legal.min_raise or 1) - 1,
+                            players[pos].get_remaining_chip(), players[pos].get_remaining_chip() + 1}:
+                    clone = game.clone()
+                    bet = clone.players[pos].chip_bet
+                    self.assertEqual(clone.praise(pos, num) == 0, legal.can_raise(num), num)
+                    if legal.can_raise(num):
+                        self.assertEqual(clone.players[pos].chip_bet, bet + num)
+                if legal.call is not None and not legal.check:
+                    clone = game.clone()
+                    clone.pcall(pos)
+                    self.assertEqual(clone.players[pos].chip_bet, players[pos].chip_bet + legal.call)
+                apply(game, pos, *random_action(rng, game, pos))
+                if pos != game.exe_pos or not game.is_running():
+                    self.assertEqual(game.legal_actions(pos), NO_ACTIONS)
+
+
+if __name__ == '__main__':
+    unittest.main()
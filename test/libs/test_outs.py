@@ -0,0 +1,56 @@
+import unittest
+from libs.outs import outs, draws, describe_outs, street_outs
+from libs.poker_cmp import poker7
+from libs.poker_eval import FLUSH, STRAIGHT, THREE_OF_A_KIND, hand_category
+from test.libs.helpers import start_game
+
+
+class TestOuts(unittest.TestCase):
+
+    def test_outs(self):
+        hands = [["As", "Ks"], ["Qh", "Qd"]]
+        board = ["2s", "7s", "Jc", "3d"]
+        result = outs(hands, board)
+        self.assertEqual(result[1], [])  # the leader
+        cards = {str(o.card): o.category for o in result[0]}
+        self.assertEqual(len(cards), 9 + 3 + 3)  # spades, aces, kings
+        self.assertEqual(cards["5s"], FLUSH)
+        self.assertNotIn("Qc", cards)  # trips for the other player
+
+        # the same as brute force on the whole board
+        known = {c for hand in hands for c in hand} | set(board)
+        expected = {}
+        for card in (r + s for r in "23456789TJQKA" for s in "shcd"):
+            if card in known:
+                continue
+            ranks = [poker7(hand + board + [card])[1] for hand in hands]
+            if ranks[0] > ranks[1]:
+                expected[card] = hand_category(ranks[0])
+        self.assertEqual(cards, expected)
+
+    def test_draws(self):
+        result = draws(["9h", "8h"], ["7h", "6c", "2h"])
+        categories = {str(o.card): o.category for o in result}
+        self.assertEqual(categories["Th"], FLUSH)
+        self.assertEqual(categories["Tc"], STRAIGHT)
+        self.assertEqual(categories["5d"], STRAIGHT)
+        self.assertNotIn("2c", categories)  # pairs the board only
+        self.assertEqual(describe_outs(result).split(", ")[:2], ["9 to flush", "6 to straight"])
+        self.assertEqual({o.category for o in draws(["9h", "9c"], ["7h", "6c", "2d"])}, {THREE_OF_A_KIND})
+
+        with self.assertRaises(ValueError):
+            draws(["9h", "8h"], ["7h", "6c", "2h", "3d", "4c"])
+
+    def test_street_outs(self):
+        game = start_game([500, 500], seed=0)
+        self.assertEqual(street_outs(game), {})
+        self.assertEqual(game.pcall(0), 0)
+        self.assertEqual(game.pcheck(1), 0)
+        self.assertEqual(len(game.pub_cards), 3)
+        result = street_outs(game)
+        self.assertEqual(set(result), set(game.players))
+        self.assertEqual(list(result.values()), outs([p.cards for p in game.players], game.pub_cards))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+import numpy as np
+from libs.poker_batch import evaluate_batch, hand_categories
+from libs.poker_cmp import poker7, _poker7_combinations
+from libs.poker_eval import RANKS, SUITS, card_index, evaluate, CARD_VALUES
+
+
+class TestPokerBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.deck = [r + s for s in SUITS for r in RANKS]
+
+    def random_hands(self, n, k=7):
+        return np.argsort(self.rng.random((n, 52)), axis=1)[:, :k]
+
+    def test_matches_poker7(self):
+        cards = self.random_hands(5000)
+        strengths = evaluate_batch(cards)
+        categories = hand_categories(strengths)
+        for row, strength, category in zip(cards, strengths, categories):
+            names = [self.deck[i] for i in row]
+            self.assertEqual(poker7(names)[1], strength, names)
+            self.assertEqual(_poker7_combinations(names)[1][0], category, names)
+
+    def test_fewer_cards(self):
+        for k in (5, 6):
+            cards = self.random_hands(500, k)
+            expected = [evaluate(CARD_VALUES[i] for i in row) for row in cards]
+            self.assertListEqual(evaluate_batch(cards).tolist(), expected)
+
+    def test_flush_and_straight_flush(self):
+        hands = ["2s 3s 4s 5s As 9d Td", "8h Kh Qh Jh Ah 9h Th", "2c 7c 9c Jc Kc 2d 2h"]
+        cards = [[card_index(c) for c in h.split()] for h in hands]
+        self.assertListEqual(hand_categories(evaluate_batch(cards)).tolist(), [8, 8, 5])
+
+    def test_bad_shape(self):
+        with self.assertRaises(ValueError):
+            evaluate_batch(np.zeros((3, 4), dtype=int))
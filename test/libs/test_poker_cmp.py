@@ -1,5 +1,8 @@
+import random
 import unittest
-from libs.poker_cmp import poker7
+from libs.card import CARDS
+from libs.poker_cmp import Board, poker7, _poker7_combinations, _hand_rank
+from libs.poker_eval import RANKS, SUITS
 
 TEST_CASE = [
     # TODO: to be filled
@@ -19,3 +22,31 @@ class TestPokerCmp(unittest.TestCase):
         for i in TEST_CASE:
             h, r = poker7(i[0].split())
             self.assertSetEqual(set(h), set(i[1].split()), i)
+
+    def test_poker7_random(self):
+        rng = random.Random(0)
+        deck = [r + s for s in SUITS for r in RANKS]
+        previous = None
+        for _ in range(3000):
+            cards = rng.sample(deck, 7)
+            hand, rank = poker7(cards)
+            ref_hand, ref_rank = _poker7_combinations(cards)
+            self.assertEqual(_hand_rank(hand), ref_rank, cards)
+            self.assertTrue(set(hand) <= set(cards), cards)
+            if previous is not None:
+                self.assertEqual(rank > previous[0], ref_rank > previous[1], cards)
+                self.assertEqual(rank == previous[0], ref_rank == previous[1], cards)
+            previous = rank, ref_rank
+
+    def test_board(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            cards = rng.sample(CARDS, 9)
+            board = Board(cards[2:5])
+            self.assertEqual(board.strength(cards[:2]), poker7(cards[:5])[1])
+            board.add(cards[5])
+            board.add(cards[6])
+            self.assertEqual(board.strength(cards[:2]), poker7(cards[:7])[1])
+            board.remove(cards[6])
+            board.add(cards[7])
+            self.assertEqual(board.strength(cards[:2]), poker7(cards[:6] + cards[7:8])[1])
@@ -0,0 +1,112 @@
+import asyncio
+import unittest
+from unittest import mock
+from libs.deck import ShufflePool
+from libs.pool import FastFoldPool
+from libs.scheduler import LoopScheduler
+from libs.storage import Storage
+
+
+class TestFastFoldPool(unittest.TestCase):
+
+    def setUp(self):
+        self.storage = Storage(':memory:')
+        for i in range(8):
+            self.storage.create_user(f"u{i}", 1000)
+        self.scheduler = LoopScheduler()
+        self.pool = FastFoldPool(self.storage, hand_size=3, ante=20, shuffle_pool=ShufflePool(seed=0),
+                                 scheduler=self.scheduler)
+
+    def total_chips(self):
+        """The chips of the users, at stake in the pool or not"""
+        total = sum(self.storage.fetch_user_chip(f"u{i}")[0] for i in range(8))
+        total += sum(e.chip for e in self.pool.entries.values() if e.hand is None)
+        for hand in self.pool.hands.values():
+            total += hand.game.total_pot
+            total += sum(p.chip - p.chip_bet for e, p in zip(hand.entries, hand.game.players) if e.hand is hand)
+        return total
+
+    def test_seating(self):
+        for i in range(5):
+            self.assertEqual(self.pool.join(f"u{i}", f"player{i}"), (200, None))
+        # one hand of three, two waiting
+        self.assertEqual(len(self.pool.hands), 1)
+        self.assertEqual(self.pool.n_waiting, 2)
+        hand = next(iter(self.pool.hands.values()))
+        self.assertEqual([e.userid for e in hand.entries], ["u0", "u1", "u2"])
+
+        # the first to act folds and is dealt a new hand with the two who waited
+        folder = hand.entries[hand.game.exe_pos]
+        self.assertIsNone(self.pool.act(folder.userid, "fold"))
+        self.assertEqual(len(self.pool.hands), 2)
+        self.assertIsNot(self.pool.hand_of(folder.userid), hand)
+        self.assertEqual(self.pool.n_waiting, 0)
+        self.assertTrue(hand.game.is_running())
+        self.assertEqual(self.pool.act(folder.userid, "raise", 1), "invalid raise")
+
+    def test_chips_are_conserved(self):
+        for i in range(8):
+            self.pool.join(f"u{i}", f"player{i}")
+        total = self.total_chips()
+        for step in range(300):
+            hand = next(iter(self.pool.hands.values()))
+            legal = hand.game.legal_actions(hand.game.exe_pos)
+            action = "fold" if step % 3 == 0 else "check" if legal.check else "call"
+            self.assertIsNone(self.pool.act(hand.entries[hand.game.exe_pos].userid, action))
+            self.assertEqual(self.total_chips(), total)
+        self.pool.flush()
+        self.assertEqual(self.pool.dirty, {})
+        for i in range(8):
+            self.assertIsNone(self.pool.leave(f"u{i}"))
+        # the players still in a hand leave when it ends
+        while self.pool.hands:
+            hand = next(iter(self.pool.hands.values()))
+            entry = hand.entries[hand.game.exe_pos]
+            self.pool.act(entry.userid, "fold")
+        self.assertEqual(self.pool.entries, {})
+        self.assertEqual(sum(self.storage.fetch_user_chip(f"u{i}")[0] for i in range(8)), 8000)
+
+    def test_flush_failure(self):
+        for i in range(3):
+            self.pool.join(f"u{i}", f"player{i}")
+        hand = next(iter(self.pool.hands.values()))
+        self.pool.act(hand.entries[hand.game.exe_pos].userid, "fold")
+        dirty = dict(self.pool.dirty)
+        self.assertTrue(dirty)
+        with mock.patch.object(self.storage, 'change_table_chips', return_value="change table chips failed"):
+            self.assertEqual(self.pool.flush(), "change table chips failed")
+        self.assertEqual(self.pool.dirty, dirty)
+        self.assertIsNone(self.pool.flush())
+        self.assertEqual(self.pool.dirty, {})
+
+    def test_timeout(self):
+        self.pool.max_await = 0.05
+        messages = []
+
+        async def notify(userid, msg, blocks):
+            messages.append((userid, msg))
+
+        async def main():
+            self.scheduler.start(asyncio.get_running_loop())
+            for i in range(3):
+                self.pool.join(f"u{i}", f"player{i}")
+            hand = next(iter(self.pool.hands.values()))
+            first = hand.entries[hand.game.exe_pos].userid
+            while not hand.game.action_log:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0)
+            return hand, first
+
+        self.pool.notify = notify
+        hand, first = asyncio.run(main())
+        # the first to act faces the big blind, folds, and waits for the next hand
+        self.assertEqual(hand.game.action_log, [(hand.entries.index(self.pool.entries[first]), "fold", 0)])
+        self.assertIsNone(self.pool.entries[first].hand)
+        self.assertEqual(self.pool.entries[first].timeout_count, 1)
+        self.assertEqual(self.pool.n_waiting, 1)
+        self.assertIn((first, "timeout: you fold"), messages)
+        self.assertEqual(sum(msg.startswith("New pool hand") for _, msg in messages if msg), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
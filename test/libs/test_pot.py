@@ -0,0 +1,42 @@
+import unittest
+from libs.pot import build_pots, settle_pots
+
+
+class TestPot(unittest.TestCase):
+
+    def test_side_pots(self):
+        # seat 1 folded after putting in 30, seat 2 is all-in with 50
+        pots = build_pots([100, 30, 50, 100], [True, False, True, True])
+        self.assertEqual([p.amount for p in pots], [180, 100])
+        self.assertEqual([sorted(p.eligible) for p in pots], [[0, 2, 3], [0, 3]])
+
+        payouts = settle_pots(pots, [5, 9, 7, 6])
+        self.assertEqual(payouts, [0, 0, 180, 100])
+        self.assertEqual(pots[1].winners, [3])
+
+    def test_all_fold(self):
+        pots = build_pots([10, 20, 5], [False, True, False])
+        self.assertEqual(len(pots), 1)
+        self.assertEqual(settle_pots(pots, [0, 0, 0]), [0, 35, 0])
+
+    def test_split_with_odd_chips(self):
+        # three-way tie over 100 chips, the odd chip goes to the first seat from `first`
+        pots = build_pots([40, 30, 30], [True, True, True])
+        self.assertEqual([p.amount for p in pots], [90, 10])
+        payouts = settle_pots(pots, [3, 3, 3], first=1)
+        self.assertEqual(payouts, [40, 30, 30])
+        self.assertEqual(pots[0].winners, [1, 2, 0])
+        self.assertEqual(pots[0].shares, [30, 30, 30])
+
+        pots = build_pots([25, 25, 25, 25], [True, True, False, True])
+        payouts = settle_pots(pots, [2, 2, 0, 1], first=1)
+        self.assertEqual(payouts, [50, 50, 0, 0])
+        pots = build_pots([25, 25, 26], [True, True, False])
+        payouts = settle_pots(pots, [2, 2, 0], first=1)
+        self.assertEqual(payouts, [38, 38, 0])
+        pots = build_pots([25, 25, 27], [True, True, False])
+        self.assertEqual(settle_pots(pots, [2, 2, 0], first=1), [38, 39, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
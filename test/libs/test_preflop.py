@@ -0,0 +1,36 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from libs import preflop
+
+
+class TestPreflop(unittest.TestCase):
+
+    def test_classes(self):
+        combos = [preflop.class_combos(cls) for cls in range(preflop.N_CLASSES)]
+        self.assertEqual(sum(map(len, combos)), 1326)
+        self.assertEqual(sorted(set(map(len, combos))), [4, 6, 12])
+        self.assertEqual(len({preflop.class_name(cls) for cls in range(preflop.N_CLASSES)}), 169)
+        self.assertEqual(preflop.class_name(preflop.hand_class("As", "Ah")), "AA")
+        self.assertEqual(preflop.class_name(preflop.hand_class("Qs", "Ks")), "KQs")
+        self.assertEqual(preflop.class_name(preflop.hand_class("2d", "7s")), "72o")
+
+    def test_generate(self):
+        # the tables loaded below are the module's, put back the ones of the other tests afterwards
+        tables = {name: getattr(preflop, name, None) for name in ('_buf', '_heads_up', '_multiway')}
+        patcher = mock.patch.multiple(preflop, create=True, **tables)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "preflop.tbl")
+            preflop.generate(path, 40, 400, workers=2)
+            preflop.load_tables(path)
+        aa = preflop.hand_class("As", "Ah")
+        kk = preflop.hand_class("Ks", "Kh")
+        self.assertAlmostEqual(preflop.heads_up_equity(aa, kk), 0.82, delta=0.05)
+        self.assertAlmostEqual(preflop.heads_up_equity(aa, kk) + preflop.heads_up_equity(kk, aa), 1, delta=1e-4)
+        self.assertAlmostEqual(preflop.heads_up_equity(aa, aa), 0.5, delta=1e-4)
+        self.assertGreater(preflop.multiway_equity(aa, 1), preflop.multiway_equity(aa, 8))
+        with self.assertRaises(ValueError):
+            preflop.multiway_equity(aa, 9)
@@ -0,0 +1,47 @@
+import random
+import unittest
+from libs.deck import ShufflePool
+from libs.game import Game
+from libs.replay import replay
+from test.libs.helpers import make_players, random_action, apply
+
+
+def record_hands(n: int):
+    rng = random.Random(0)
+    game = Game(shuffle_pool=ShufflePool(seed=0))
+    records = []
+    for hand in range(n):
+        players = make_players([rng.choice((40, 100, 500)) for _ in range(rng.randint(2, 6))])
+        game.start(players, 20, rng.randrange(len(players)))
+        while game.is_running():
+            apply(game, game.exe_pos, *random_action(rng, game, game.exe_pos))
+        records.append(game.snapshot())
+    return records
+
+
+class TestReplay(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.records = record_hands(300)
+
+    def test_replay(self):
+        report = replay(self.records, workers=0)
+        self.assertEqual(report.hands, 300)
+        self.assertIsNone(report.divergence)
+
+    def test_divergence(self):
+        records = list(self.records)
+        game = Game().restore(records[123])
+        player = game.players[0]
+        game.result.chip_changes[player] += 1
+        records[123] = game.snapshot()
+        report = replay(records, workers=2, chunk_size=50)
+        self.assertEqual(report.divergence.index, 123)
+        self.assertEqual(report.divergence.game_id, str(game.id))
+        self.assertTrue(report.divergence.reason.startswith("chip changes"))
+        self.assertEqual(report.hands, 124)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+from libs.runout import RunoutCache, canonical_key, exact_equity
+from libs.card import to_index
+
+
+def indexes(s):
+    return [to_index(c) for c in s.split()]
+
+
+class TestRunout(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db = os.path.join(self.directory.name, "runout.dat")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_canonical_key(self):
+        key1, order1 = canonical_key([indexes("As Ks"), indexes("Qh Qd")], indexes("2s 3s 4h"))
+        key2, order2 = canonical_key([indexes("Qs Qc"), indexes("Kd Ad")], indexes("4s 3d 2d"))
+        self.assertEqual(key1, key2)
+        self.assertEqual(order1, order2[::-1])
+
+    def test_exact_equity(self):
+        equities = exact_equity([["As", "Ah"], ["Ks", "Kh"]])
+        self.assertAlmostEqual(equities[0].win, 0.8236, places=4)
+        self.assertAlmostEqual(equities[1].tie, 0.0054, places=4)
+        self.assertAlmostEqual(sum(e.share for e in equities), 1)
+
+        equities = exact_equity([["As", "2h"], ["Ad", "3h"]], "Kc Kd Qh Qc Js".split())
+        self.assertEqual([e.share for e in equities], [0.5, 0.5])
+
+    def test_cache(self):
+        cache = RunoutCache(self.db, max_entries=2)
+        self.assertFalse(os.path.exists(self.db))
+        hands = [["As", "Kd"], ["7h", "7c"]]
+        first = exact_equity(hands, ["2s", "7s", "Td"], cache)
+        swapped = exact_equity([["7d", "7s"], ["Ah", "Kc"]], ["2h", "7h", "Tc"], cache)
+        self.assertEqual(first, swapped[::-1])
+        self.assertEqual(cache.size, 1)
+
+        exact_equity(hands, ["2s", "7s", "Jd"], cache)
+        exact_equity(hands, ["2s", "7s", "Qd"], cache)
+        self.assertEqual(cache.size, 2)
+        reopened = RunoutCache(self.db, max_entries=2)
+        self.assertIsNone(reopened.get(canonical_key([indexes("As Kd"), indexes("7h 7c")], indexes("2s 7s Td"))[0]))
+        self.assertEqual(reopened.size, 2)
+        key = canonical_key([indexes("As Kd"), indexes("7h 7c")], indexes("2s 7s Qd"))[0]
+        self.assertIsNotNone(reopened.get(key))
@@ -0,0 +1,36 @@
+import asyncio
+import threading
+import time
+import unittest
+from libs.scheduler import LoopScheduler
+
+
+class TestScheduler(unittest.TestCase):
+
+    def test_loop(self):
+        scheduler = LoopScheduler()
+        calls = []
+        scheduler.call_later(0, calls.append, "early")  # waits for the loop
+
+        async def send(name):
+            await asyncio.sleep(0.01)
+            calls.append(name)
+
+        async def main():
+            scheduler.start(asyncio.get_running_loop())
+            now = time.monotonic()
+            scheduler.call_at(now + 0.05, calls.append, "c")
+            scheduler.call_at(now, send, "b")  # a coroutine runs as a task, without holding up the rest
+            scheduler.call_at(now, calls.append, "a")
+            scheduler.call_later(0.02, lambda: 1 / 0)
+            scheduler.call_later(0.03, calls.append, "cancelled").cancel()
+            # from another thread too
+            threading.Thread(target=scheduler.call_later, args=(0.06, calls.append, "d")).start()
+            await asyncio.sleep(0.2)
+
+        asyncio.run(main())
+        self.assertEqual(calls, ["early", "a", "b", "c", "d"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import random
+import unittest
+from libs.game import Game, RoundStatus
+from libs.player import Player
+from test.libs.helpers import start_game, random_action, apply
+
+
+def state(game: Game):
+    return (game.snapshot(), [(p.userid, p.chip, p.chip_bet, p.status, p.cards, p.rank, p.hand) for p in game.players],
+            {p.userid: c for p, c in game.result.chip_changes.items()}, game.pub_cards)
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def test_player(self):
+        player = Player("u1", "alice", 500)
+        player.set_normal()
+        player.chip_bet = 40
+        restored = Player("", "", 0).restore(player.snapshot())
+        self.assertEqual(restored.__dict__, player.__dict__)
+
+    def test_waiting_game(self):
+        game = Game()
+        restored = Game().restore(game.snapshot())
+        self.assertEqual(restored.snapshot(), game.snapshot())
+        self.assertIsNone(restored.round_status)
+
+    def test_restore_and_clone_continue_the_same(self):
+        rng = random.Random(0)
+        for hand in range(100):
+            game = start_game([rng.choice((40, 100, 500)) for _ in range(rng.randint(2, 6))], seed=hand)
+            for _ in range(rng.randrange(8)):
+                if not game.is_running():
+                    break
+                apply(game, game.exe_pos, *random_action(rng, game, game.exe_pos))
+            restored = Game().restore(game.snapshot())
+            clone = game.clone()
+            self.assertEqual(state(restored), state(game))
+            self.assertEqual(state(clone), state(game))
+
+            seed = rng.random()
+            for g in (game, restored, clone):
+                moves = random.Random(seed)
+                while g.is_running():
+                    apply(g, g.exe_pos, *random_action(moves, g, g.exe_pos))
+            self.assertEqual(state(restored), state(game))
+            self.assertEqual(state(clone), state(game))
+
+    def test_clone_is_independent(self):
+        game = start_game([500, 500, 500], seed=1)
+        snapshot = game.snapshot()
+        clone = game.clone()
+        while clone.is_running():
+            clone.pcall(clone.exe_pos) and clone.pcheck(clone.exe_pos)
+        self.assertEqual(clone.round_status, RoundStatus.END)
+        self.assertEqual(game.snapshot(), snapshot)
+        self.assertEqual(game.pub_cards, [])
+        self.assertEqual(clone.result.chip_changes.keys(), set(clone.players))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import asyncio
+import sys
+import time
+import types
+import unittest
+from unittest import mock
+
+from libs.storage import Storage
+from libs.scheduler import LoopScheduler
+
+
+class FakeSlack(types.ModuleType):
+    """Stands in for `bots.game`, which opens the storage of the bot on import, and records the calls"""
+
+    def __init__(self):
+        super().__init__('bots.game')
+        self.calls = []
+
+    async def send_to_channel_by_table_id(self, table_id, msg="void", blocks=None):
+        self.calls.append(('send', msg))
+        return "ts", None
+
+    async def send_private_msg_to_channel_by_table_id(self, table_id, user, msg="void", blocks=None):
+        self.calls.append(('private', msg))
+        return None
+
+    async def update_msg_by_table_id(self, table_id, ts, msg="void", blocks=None):
+        self.calls.append(('update', msg))
+        return None
+
+    async def delete_msg_by_table_id(self, table_id, ts):
+        self.calls.append(('delete', ts))
+        return None
+
+
+slack = FakeSlack()
+sys.modules.setdefault('bots.game', slack)
+from libs import table as ltable  # noqa: E402
+from libs import poker_bot  # noqa: E402
+
+
+async def until(cond, timeout: float = 5.0):
+    end = time.monotonic() + timeout
+    while not cond():
+        if time.monotonic() > end:
+            raise AssertionError("timed out")
+        await asyncio.sleep(0.01)
+
+
+class TestTable(unittest.TestCase):
+
+    def setUp(self):
+        slack.calls.clear()
+        for module in (ltable, poker_bot):
+            patcher = mock.patch.object(module, 'bgame', slack)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.multiple(ltable, START_DELAY=0, STREET_DELAY=0, HAND_DELAY=0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # the table is made before the loop runs, its asyncio locks belong to this loop on 3.7
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(asyncio.set_event_loop, None)
+        self.addCleanup(self.loop.close)
+        self.scheduler = LoopScheduler()
+        self.table = ltable.Table("owner", Storage(':memory:'), scheduler=self.scheduler)
+        self.table.think_delay = 0
+
+    def run_table(self, main):
+        async def run():
+            self.scheduler.start(asyncio.get_running_loop())
+            try:
+                await main()
+            finally:
+                self.table.force_close()
+                tasks = list(self.scheduler.tasks)
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        self.loop.run_until_complete(run())
+
+    def join(self, n: int):
+        for i in range(n):
+            self.assertIsNone(self.table.join(f"u{i}", f"player{i}")[-1])
+
+    def actions(self):
+        return [action for _, action, _ in self.table.game.action_log]
+
+    def test_auto_continue(self):
+        self.join(2)
+        self.table.auto_continue = True
+
+        async def main():
+            self.assertIsNone(self.table.start("u0")[1])
+            game = self.table.game
+            await until(lambda: self.table.exe_pos_local != -1)
+            self.assertIsNone(self.table.fold(game.players[game.exe_pos].userid))
+            self.table.wake()
+            await until(lambda: self.table.counter == 2)
+            self.assertTrue(game.is_running())
+            self.assertEqual(self.actions(), [])
+
+        self.run_table(main)
+
+    @mock.patch.object(ltable, 'MAX_AWAIT', 0.2)
+    def test_timeout(self):
+        self.join(3)
+
+        async def main():
+            self.table.start("u0")
+            game = self.table.game
+            # the first to act faces the big blind and folds
+            await until(lambda: len(game.action_log) == 1, timeout=2)
+            self.assertEqual(self.actions(), ["fold"])
+            self.assertEqual(sum(p.timeout_count for p in self.table.players), 1)
+            self.assertIsNone(self.table.call(game.players[game.exe_pos].userid))
+            self.table.wake()
+            # the big blind may check, and does
+            await until(lambda: game.get_round_status_name() == "FLOP", timeout=2)
+            self.assertEqual(self.actions(), ["fold", "call", "check"])
+            self.assertEqual(sum(p.timeout_count for p in self.table.players), 2)
+
+        self.run_table(main)
+
+    def test_turbo(self):
+        self.table.turbo = True
+        self.table.auto_continue = True
+        self.table.think_delay = 10
+        for _ in range(3):
+            self.assertIsNone(self.table.add_bot_player()[-1])
+
+        async def main():
+            self.table.start("bot_0")
+            await until(lambda: self.table.counter >= 20 or not self.table.hand_running)
+            self.assertGreaterEqual(self.table.counter, 20)
+
+        self.run_table(main)
+        self.assertEqual(slack.calls, [])
+
+    def test_think_time(self):
+        self.table.think_delay = 10
+        self.assertGreaterEqual(self.table.think_time(), 10)
+        self.table.turbo = True
+        self.assertEqual(self.table.think_time(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()